@@ -1,30 +1,39 @@
 import os
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+# data_store / forecasting / model_runner 会导入 pandas 与 numpy，只在用到时导入，窗口先显示出来
 
 # ------------------loading data function------------------
 def load_data(file_path):
+    import data_store
     try:
-        df = pd.read_csv(file_path)
+        df = data_store.load_frame(file_path)
     except Exception as e:
         print(f"data loading failed: {e}")
         return None
     return df
 
+# ------------------background image decoding------------------
+def decode_thumbnail(file_path, size):
+    """在线程池中解码并缩放图片；ImageTk.PhotoImage 必须在主线程创建"""
+    pil_img = Image.open(file_path)
+    pil_img.thumbnail(size)
+    return pil_img
+
 class EnergyPredictionGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Ontario Energy Demand System")
         self.root.state('zoomed')
 
-        # 加载示例数据
-        self.df = load_data('data.csv')
+        # 数据在后台线程加载（见下方 executor），加载完成前为 None
+        self.df = None
+        self.data_state = "loading"
 
         # ===================== 顶部黑色栏 =====================
         self.top_frame = tk.Frame(root, bg="#000000", height=200)
@@ -64,6 +73,9 @@ class EnergyPredictionGUI:
         self.green_label = tk.Label(self.green_bar, text="Ontario Energy Forecasting",
                                     fg="white", bg="#006A4D", font=("Arial", 14, "bold"))
         self.green_label.pack(side="left", padx=30, pady=5)
+        self.data_status_label = tk.Label(self.green_bar, text="Loading data...",
+                                          fg="white", bg="#006A4D", font=("Arial", 10))
+        self.data_status_label.pack(side="right", padx=30, pady=5)
 
         # ===================== 下拉菜单框架 =====================
         self.dropdown_frame = tk.Frame(self.root, bg="white", relief="solid", borderwidth=2)
@@ -81,16 +93,94 @@ class EnergyPredictionGUI:
         self.content_frame = tk.Frame(self.root, bg="#f5f5f5")
         self.content_frame.pack(fill="both", expand=True)
 
-        # 创建各个页面
-        self.create_home_page()
-        self.create_visualization_page()
-        self.create_predict_page()   # 使用新的预测页面逻辑
-        self.create_evaluation_page()
+        # 后台线程池：图片解码/缩放与预测计算，结果经 root.after 回到主线程
+        self.executor = ThreadPoolExecutor(max_workers=max(2, min(4, os.cpu_count() or 1)))
+        self.ui_queue = queue.Queue()
+        self.root.after(50, self._process_ui_queue)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.run_in_background(lambda: load_data('data.csv'), self._on_data_loaded, self._on_data_failed)
+
+        # 各个页面在第一次 show_page 时才创建
+        self.page_builders = {
+            "Home": (self.create_home_page, "home_frame"),
+            "Visualization": (self.create_visualization_page, "visualization_frame"),
+            "Prediction": (self.create_predict_page, "predict_frame"),   # 使用新的预测页面逻辑
+            "Evaluation": (self.create_evaluation_page, "evaluation_frame"),
+        }
+        self.page_frames = {}
+        self.run_all_cancel = None
 
         # 默认显示首页
         self.show_page("Home")
         self.current_page = None
 
+    # ------------------后台任务------------------
+    def run_in_background(self, func, on_done, on_error=None):
+        """
+        在线程池中执行 func，完成后在主线程调用 on_done(result) 或 on_error(exception)
+        """
+        future = self.executor.submit(func)
+        future.add_done_callback(lambda f: self.call_in_ui(self._finish_future, f, on_done, on_error))
+        return future
+
+    def call_in_ui(self, callback, *args):
+        """
+        可在任意线程调用：callback(*args) 会在主线程的下一次队列轮询时执行
+        """
+        self.ui_queue.put((callback, args))
+
+    def _finish_future(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            on_done(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            print(f"Background task failed: {error}")
+
+    def _process_ui_queue(self):
+        while True:
+            try:
+                callback, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        self.root.after(50, self._process_ui_queue)
+
+    def load_image_async(self, label, file_path, size, images):
+        """
+        先显示占位文字，图片在后台解码完成后替换到 label 上
+        """
+        def on_done(pil_img):
+            img_obj = ImageTk.PhotoImage(pil_img)
+            images.append(img_obj)
+            label.config(image=img_obj, text="", width=0, height=0)
+
+        def on_error(error):
+            label.config(text=f"Error loading {os.path.basename(file_path)}: {error}", fg="red")
+
+        self.run_in_background(lambda: decode_thumbnail(file_path, size), on_done, on_error)
+
+    def _on_data_loaded(self, df):
+        if df is None:
+            self._on_data_failed("see console")
+            return
+        self.df = df
+        self.data_state = "ready"
+        self.data_status_label.config(text=f"{len(df):,} hourly rows loaded")
+
+    def _on_data_failed(self, error):
+        # 预测时 forecasting 会自行再读取 data.csv
+        self.data_state = "failed"
+        self.data_status_label.config(text=f"Data loading failed: {error}")
+
+    def on_close(self):
+        self.cancel_run_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
     # ------------------顶部菜单相关------------------
     def toggle_dropdown_menu(self, event):
         if self.menu_visible:
@@ -225,19 +315,15 @@ class EnergyPredictionGUI:
 
             tk.Label(column_frame, text=title_text, font=("Times New Roman", 16, "bold"), bg="#ffffff").pack(pady=(10, 2))
 
-            try:
-                pil_img = Image.open(file_path)
-                pil_img.thumbnail((600, 450))
-                img_obj = ImageTk.PhotoImage(pil_img)
-                self.loaded_images_vis.append(img_obj)
-
-                tk.Label(column_frame, image=img_obj, bg="#ffffff").pack(pady=5)
+            # 占位标签，图片解码完成后替换
+            img_label = tk.Label(column_frame, text="Loading...", bg="#eeeeee", fg="#666666",
+                                 width=60, height=20)
+            img_label.pack(pady=5)
+            self.load_image_async(img_label, file_path, (600, 450), self.loaded_images_vis)
 
-                description = descriptions.get(img_file, "No description available.")
-                tk.Label(column_frame, text=description, font=("Arial", 12), bg="#ffffff",
-                         wraplength=550, justify="left").pack(pady=(0, 15))
-            except Exception as e:
-                tk.Label(column_frame, text=f"Error loading {img_file}: {e}", fg="red", bg="#ffffff").pack()
+            description = descriptions.get(img_file, "No description available.")
+            tk.Label(column_frame, text=description, font=("Arial", 12), bg="#ffffff",
+                     wraplength=550, justify="left").pack(pady=(0, 15))
 
         self.visualization_frame.pack(fill="both", expand=True)
 
@@ -248,7 +334,7 @@ class EnergyPredictionGUI:
         1. 下拉选择模型（ARIMA, LightGBM, XGboost, RandomForest）
         2. 下拉选择预测目标（Electricity Demand, Electricity Price, Electricity Demand & Electricity Price）
         3. 点击按钮后先显示 "Running {model} for {target} (5 Years)...",
-           再延迟几秒后显示对应的单张图片作为预测结果
+           预测完成后绘制 forecasting 模块返回的预测曲线
         """
         self.predict_frame = tk.Frame(self.content_frame, bg="#f5f5f5")
 
@@ -268,6 +354,7 @@ class EnergyPredictionGUI:
                                    values=["ARIMA", "LightGBM", "XGboost", "RandomForest"],
                                    state='readonly', width=30)
         model_combo.grid(row=0, column=1, padx=10, pady=5)
+        model_combo.bind("<<ComboboxSelected>>", lambda e: self.cancel_run_all())
 
         # Select Target
         ttk.Label(config_frame, text="Prediction Target:").grid(row=1, column=0, sticky="w", padx=10, pady=5)
@@ -277,11 +364,16 @@ class EnergyPredictionGUI:
                                             "Electricity Demand & Electricity Price"],
                                     state='readonly', width=30)
         target_combo.grid(row=1, column=1, padx=10, pady=5)
+        target_combo.bind("<<ComboboxSelected>>", lambda e: self.cancel_run_all())
 
         # Run Prediction 按钮
         run_button = ttk.Button(config_frame, text="Run Prediction", command=self.run_prediction)
         run_button.grid(row=2, column=0, columnspan=2, pady=10)
 
+        # 所有模型/目标并行运行，切换选择时取消
+        run_all_button = ttk.Button(config_frame, text="Run All Models", command=self.run_all_predictions)
+        run_all_button.grid(row=3, column=0, columnspan=2, pady=(0, 10))
+
         # 输出结果文本框（显示 "Running ..." 等提示信息）
         self.output_text = tk.Text(self.predict_frame, height=5, width=80, state="disabled")
         self.output_text.pack(pady=10)
@@ -320,26 +412,6 @@ class EnergyPredictionGUI:
         # 鼠标滚轮事件绑定
         self.predict_canvas.bind_all("<MouseWheel>", self._on_mousewheel_predict)
 
-        # ========== 模型-目标 与 文件名的映射表 ==========
-        # 请确保与 ./predict 文件夹下的图片名匹配
-        self.model_target_map = {
-            ("ARIMA", "Electricity Price"): "Arima forcast for electricity price.png",
-            ("ARIMA", "Electricity Demand"): "Arima Forecast for electricity demand.png",
-            ("ARIMA", "Electricity Demand & Electricity Price"): "Arima-prediction.png",
-
-            ("LightGBM", "Electricity Price"): "prediction-price-lightgbm.png",
-            ("LightGBM", "Electricity Demand"): "prediction-demand-lightgbm.png",
-            ("LightGBM", "Electricity Demand & Electricity Price"): "prediciton-lightgbm.png",
-
-            ("XGboost", "Electricity Price"): "prediction-price-xgboost.png",
-            ("XGboost", "Electricity Demand"): "prediction-demand-xgboost.png",
-            ("XGboost", "Electricity Demand & Electricity Price"): "prediction-xgboost.png",
-
-            ("RandomForest", "Electricity Price"): "prediction-price-randomforest.png",
-            ("RandomForest", "Electricity Demand"): "prediction-demand-RandomForest.png",
-            ("RandomForest", "Electricity Demand & Electricity Price"): "prediction-randomforest.png",
-        }
-
         self.predict_frame.pack(fill="both", expand=True)
 
     def _on_mousewheel_predict(self, event):
@@ -352,7 +424,7 @@ class EnergyPredictionGUI:
         """
         点击 'Run Prediction' 后的逻辑：
         1. 显示 "Running ..." 提示
-        2. 延迟若干秒后加载并显示对应图片
+        2. 在后台线程中训练模型并预测，完成后在主线程绘制结果
         """
         selected_model = self.model_var.get()
         selected_target = self.target_var.get()
@@ -360,55 +432,139 @@ class EnergyPredictionGUI:
         if not selected_model or not selected_target:
             messagebox.showerror("Error", "Please select Model and Target before running prediction.")
             return
+        if self.data_state == "loading":
+            self._set_output_text("Data is still loading, please try again in a moment.")
+            return
 
         # 显示运行提示
         result_text = f"Running {selected_model} for {selected_target} (5 Years)...\nPrediction results will be displayed here."
+        self._set_output_text(result_text)
+
+        # 预测在后台线程运行，避免界面卡死；结果通过 root.after 回到主线程
+        df = self.df
+
+        def predict():
+            import forecasting
+            return forecasting.run_forecast(selected_model, selected_target, df=df)
+
+        self.run_in_background(
+            predict,
+            self._show_prediction_result,
+            self._show_prediction_error,
+        )
+
+    def run_all_predictions(self):
+        """
+        并行运行所有模型与目标的组合，进度逐条显示在输出框中
+        """
+        self.cancel_run_all()
+        cancel_event = threading.Event()
+        self.run_all_cancel = cancel_event
+        self.run_all_status = {}
+        self.run_all_results = []
+        self._set_output_text("Running all models for all targets (5 Years)...")
+
+        def stream():
+            import model_runner
+            for event in model_runner.run_all(cancel_event=cancel_event):
+                self.call_in_ui(self._show_run_all_progress, event, cancel_event)
+
+        def on_error(error):
+            if cancel_event is self.run_all_cancel:
+                self._show_prediction_error(error)
+
+        self.run_in_background(stream, lambda _: None, on_error)
+
+    def cancel_run_all(self):
+        if self.run_all_cancel is not None:
+            self.run_all_cancel.set()
+            self.run_all_cancel = None
+
+    def _show_run_all_progress(self, event, cancel_event):
+        # 已取消或被新一轮替换的运行仍可能有事件排在队列中，直接丢弃
+        if cancel_event is not self.run_all_cancel:
+            return
+        status = event["status"] if not event["error"] else f"{event['status']} ({event['error']})"
+        self.run_all_status[(event["model"], event["target"])] = \
+            f"{event['model']} / {event['target']}: {status} {event['elapsed']:.1f}s"
+        header = f"Finished {event['completed']}/{event['total']} jobs"
+        self._set_output_text("\n".join([header] + list(self.run_all_status.values())))
+
+        if event["status"] == "done":
+            self.run_all_results.append(event["result"])
+        if event["completed"] == event["total"] and event["status"] != "cancelled":
+            self._show_run_all_results(self.run_all_results)
+
+    def _show_run_all_results(self, results):
+        """
+        将所有模型的需求与价格预测叠加绘制，便于比较
+        """
+        for child in self.predict_images_frame.winfo_children():
+            child.destroy()
+
+        # matplotlib 只在第一次绘图时导入，缩短启动时间
+        import forecasting
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(9, 6), dpi=100)
+        for i, target in enumerate(["Electricity Demand", "Electricity Price"]):
+            ax = fig.add_subplot(2, 1, i + 1)
+            column = forecasting.TARGETS[target][0]
+            for result in results:
+                if result["target"] == target:
+                    daily = forecasting.forecast_frame(result)[column].resample("D").mean()
+                    ax.plot(daily.index, daily.to_numpy(), linewidth=0.8, label=result["model"])
+            ax.set_title(f"All models - {target}")
+            ax.grid(True, alpha=0.3)
+            if ax.lines:
+                ax.legend(loc="upper right")
+        fig.tight_layout()
+
+        canvas = FigureCanvasTkAgg(fig, master=self.predict_images_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(pady=10)
+        self.prediction_canvas = canvas
+
+    def _set_output_text(self, text):
         self.output_text.config(state="normal")
         self.output_text.delete("1.0", tk.END)
-        self.output_text.insert(tk.END, result_text)
+        self.output_text.insert(tk.END, text)
         self.output_text.config(state="disabled")
 
-        # 延迟 2 秒后显示结果（模拟预测耗时）
-        self.root.after(2000, lambda: self._show_single_prediction_image(selected_model, selected_target))
+    def _show_prediction_error(self, error):
+        self._set_output_text(f"Prediction failed: {error}")
 
-    def _show_single_prediction_image(self, model, target):
+    def _show_prediction_result(self, result):
         """
-        延迟后，加载并显示对应的单张图片，覆盖面板
+        绘制预测结果曲线，覆盖面板
         """
         # 清空预测图片区域
         for child in self.predict_images_frame.winfo_children():
             child.destroy()
 
-        # 获取文件名
-        filename = self.model_target_map.get((model, target), None)
-        if not filename:
-            tk.Label(self.predict_images_frame, text="No matching image found for this selection.",
-                     fg="red", bg="#ffffff").pack(pady=10)
-            return
-
-        file_path = os.path.join("./predict", filename)
-        if not os.path.exists(file_path):
-            tk.Label(self.predict_images_frame, text=f"Image not found: {filename}",
-                     fg="red", bg="#ffffff").pack(pady=10)
-            return
-
-        try:
-            pil_img = Image.open(file_path)
-            pil_img.thumbnail((900, 600))
-            img_obj = ImageTk.PhotoImage(pil_img)
-
-            # 保存引用以防被回收
-            if not hasattr(self, 'single_prediction_image'):
-                self.single_prediction_image = []
-            self.single_prediction_image.clear()
-            self.single_prediction_image.append(img_obj)
-
-            tk.Label(self.predict_images_frame, image=img_obj, bg="#ffffff").pack(pady=10)
-            desc = f"This is the predicted result of {model} for {target}."
-            tk.Label(self.predict_images_frame, text=desc, font=("Arial", 12), bg="#ffffff").pack(pady=(0, 10))
-        except Exception as e:
-            tk.Label(self.predict_images_frame, text=f"Error loading image: {e}",
-                     fg="red", bg="#ffffff").pack(pady=10)
+        import forecasting
+        model, target = result["model"], result["target"]
+        forecast = forecasting.forecast_frame(result).resample("D").mean()
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(9, 3 * len(forecast.columns)), dpi=100)
+        for i, column in enumerate(forecast.columns):
+            ax = fig.add_subplot(len(forecast.columns), 1, i + 1)
+            ax.plot(forecast.index, forecast[column].to_numpy(), linewidth=0.8)
+            ax.set_title(f"{model} forecast - {column}")
+            ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+
+        canvas = FigureCanvasTkAgg(fig, master=self.predict_images_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(pady=10)
+        # 保存引用以防被回收
+        self.prediction_canvas = canvas
+
+        desc = f"This is the predicted result of {model} for {target}."
+        tk.Label(self.predict_images_frame, text=desc, font=("Arial", 12), bg="#ffffff").pack(pady=(0, 10))
+        self._set_output_text(f"{model} for {target} (5 Years) finished: {len(result['index'])} hourly steps.")
 
     # ------------------Evaluation Page------------------
     def create_evaluation_page(self):
@@ -463,15 +619,11 @@ class EnergyPredictionGUI:
     
             tk.Label(column_frame, text=title_text, font=("Arial", 14, "bold"), bg="#ffffff").pack(pady=(10, 2))
     
-            try:
-                pil_img = Image.open(file_path)
-                pil_img.thumbnail((600, 450))
-                img_obj = ImageTk.PhotoImage(pil_img)
-                self.loaded_images_eval.append(img_obj)
-    
-                tk.Label(column_frame, image=img_obj, bg="#ffffff").pack(pady=5)
-            except Exception as e:
-                tk.Label(column_frame, text=f"Error loading {img_file}: {e}", fg="red", bg="#ffffff").pack()
+            # 占位标签，图片解码完成后替换
+            img_label = tk.Label(column_frame, text="Loading...", bg="#eeeeee", fg="#666666",
+                                 width=60, height=20)
+            img_label.pack(pady=5)
+            self.load_image_async(img_label, file_path, (600, 450), self.loaded_images_eval)
     
             description_text = f"Description for {title_text}: This image illustrates the evaluation results and key performance indicators for the model."
             tk.Label(column_frame, text=description_text, font=("Arial", 12), bg="#ffffff",
@@ -481,23 +633,16 @@ class EnergyPredictionGUI:
     
     # ------------------页面切换------------------
     def show_page(self, page_name):
-        if hasattr(self, 'home_frame'):
-            self.home_frame.pack_forget()
-        if hasattr(self, 'visualization_frame'):
-            self.visualization_frame.pack_forget()
-        if hasattr(self, 'predict_frame'):
-            self.predict_frame.pack_forget()
-        if hasattr(self, 'evaluation_frame'):
-            self.evaluation_frame.pack_forget()
-    
-        if page_name == "Home":
-            self.home_frame.pack(fill="both", expand=True)
-        elif page_name == "Visualization":
-            self.visualization_frame.pack(fill="both", expand=True)
-        elif page_name == "Prediction":
-            self.predict_frame.pack(fill="both", expand=True)
-        elif page_name == "Evaluation":
-            self.evaluation_frame.pack(fill="both", expand=True)
+        for frame in self.page_frames.values():
+            frame.pack_forget()
+
+        # 第一次访问时才创建页面
+        if page_name not in self.page_frames:
+            builder, frame_attr = self.page_builders[page_name]
+            builder()
+            self.page_frames[page_name] = getattr(self, frame_attr)
+
+        self.page_frames[page_name].pack(fill="both", expand=True)
     
         self.current_page = page_name
 
@@ -0,0 +1,341 @@
+import json
+import os
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import features
+import profiling
+
+# ------------------Anomaly configuration------------------
+# Every hour gets a uint8 bitmask of the FLAGS it triggers. Demand spikes use
+# a rolling mean/variance z-score; price spikes and temperature anomalies use
+# a robust rolling median/MAD score, since prices are heavy-tailed. Both
+# compare an hour with the window of hours *before* it, so a spike does not
+# hide itself. Heat and cold are absolute thresholds.
+FLAGS = {"demand_spike": 1, "price_spike": 2, "heat": 4, "cold": 8, "temp_anomaly": 16}
+ALL_FLAGS = sum(FLAGS.values())
+LABELS = {"demand_spike": "Demand spike", "price_spike": "Price spike", "heat": "Extreme heat",
+          "cold": "Extreme cold", "temp_anomaly": "Temperature anomaly"}
+
+DEMAND_WINDOW = 7 * 24
+DEMAND_Z = 4.0
+PRICE_WINDOW = 7 * 24
+PRICE_SCORE = 6.0
+TEMP_WINDOW = 14 * 24
+TEMP_SCORE = 3.0
+# robust score = |x - median| / (MAD_SCALE * MAD); the scale makes MAD a std estimate for normal data
+MAD_SCALE = 1.4826
+# fewer valid hours than this in a window and the rolling tests don't fire
+MIN_PERIODS = 24
+HEAT_TEMP = 30.0
+COLD_WIND_CHILL = -20.0
+COLD_TEMP = -15.0
+
+FLAGS_FILE = "anomaly_flags.bin"
+FLAGS_META = "anomaly_flags.json"
+
+
+def _params():
+    return {"demand": [DEMAND_WINDOW, DEMAND_Z], "price": [PRICE_WINDOW, PRICE_SCORE],
+            "temp": [TEMP_WINDOW, TEMP_SCORE], "min_periods": MIN_PERIODS,
+            "heat": HEAT_TEMP, "cold": [COLD_WIND_CHILL, COLD_TEMP], "flags": FLAGS}
+
+
+def _column(arrays, name, rows=slice(None)):
+    if name not in arrays:
+        return np.full(len(np.asarray(arrays[data_store.EPOCH_COLUMN])[rows]), np.nan)
+    return np.asarray(arrays[name][rows], dtype=np.float64)
+
+
+def _threshold_flags(temp, wind_chill):
+    flags = np.zeros(len(temp), dtype=np.uint8)
+    with np.errstate(invalid="ignore"):
+        flags[temp >= HEAT_TEMP] |= FLAGS["heat"]
+        flags[(wind_chill <= COLD_WIND_CHILL) | (temp <= COLD_TEMP)] |= FLAGS["cold"]
+    return flags
+
+
+# ------------------Batch detection------------------
+def _row_medians(windows, count):
+    # NaNs sort last, so each row's median sits at the middle of its first `count` entries
+    ordered = np.sort(windows, axis=1)
+    rows = np.arange(len(windows))
+    lo = np.maximum(count - 1, 0) // 2
+    hi = np.minimum(count // 2, windows.shape[1] - 1)
+    return np.where(count > 0, (ordered[rows, lo] + ordered[rows, hi]) / 2, np.nan)
+
+
+def _rolling_median_mad(values, window, block=4096):
+    """
+    Median and MAD of the previous `window` values (NaNs skipped) for every
+    row, computed per window.
+    """
+    padded = np.concatenate([np.full(window, np.nan), values])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)[:len(values)]
+    median = np.empty(len(values))
+    mad = np.empty(len(values))
+    count = np.empty(len(values), dtype=np.int64)
+    for lo in range(0, len(values), block):
+        chunk = windows[lo:lo + block]
+        rows = slice(lo, lo + len(chunk))
+        count[rows] = (~np.isnan(chunk)).sum(axis=1)
+        median[rows] = _row_medians(chunk, count[rows])
+        mad[rows] = _row_medians(np.abs(chunk - median[rows, None]), count[rows])
+    return median, mad, count
+
+
+def _robust_exceeds(values, window, threshold):
+    median, mad, count = _rolling_median_mad(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.abs(values - median) / (MAD_SCALE * mad)
+    return (count >= MIN_PERIODS) & (mad > 0) & (score > threshold)
+
+
+def _zscore_exceeds(values, window, threshold):
+    mean, std = features._rolling_stats(values, window, 0)
+    count = np.convolve(np.isfinite(values), np.ones(window, dtype=np.int64))[:len(values)]
+    count = np.concatenate([[0], count[:-1]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.abs(values - mean) / std
+    return (count >= MIN_PERIODS) & (std > 0) & (z > threshold)
+
+
+@profiling.timed("anomalies.detect")
+def detect(arrays):
+    """uint8 flag bitmask for every row of a load_arrays-style dict of columns."""
+    demand = _column(arrays, "hourly_demand")
+    price = _column(arrays, "hourly_average_price")
+    temp = _column(arrays, "Temp (deg C)")
+    flags = _threshold_flags(temp, _column(arrays, "Wind Chill"))
+    flags[_zscore_exceeds(demand, DEMAND_WINDOW, DEMAND_Z)] |= FLAGS["demand_spike"]
+    flags[_robust_exceeds(price, PRICE_WINDOW, PRICE_SCORE)] |= FLAGS["price_spike"]
+    flags[_robust_exceeds(temp, TEMP_WINDOW, TEMP_SCORE)] |= FLAGS["temp_anomaly"]
+    return flags
+
+
+# ------------------Streaming detection------------------
+class RollingMoments:
+    """Mean and sample variance of the last `window` values in O(1) per update; NaNs are skipped."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def stats(self):
+        if self.count < 2:
+            return self.count, np.nan, np.nan
+        return self.count, self.mean, self.m2 / (self.count - 1)
+
+    def push(self, x):
+        self.values.append(x)
+        if x == x:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.count -= 1
+                if self.count == 0:
+                    self.mean, self.m2 = 0.0, 0.0
+                else:
+                    delta = old - self.mean
+                    self.mean -= delta / self.count
+                    self.m2 = max(0.0, self.m2 - delta * (old - self.mean))
+
+
+def _kth_of_two(below, above, n_below, n_above, k):
+    """k-th smallest (0-based) of two ascending sequences given as index -> value functions, in O(log n)."""
+    lo, hi = max(0, k + 1 - n_above), min(k + 1, n_below)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if below(i) < above(k - i):
+            lo = i + 1
+        else:
+            hi = i
+    taken = k + 1 - lo
+    return max(below(lo - 1) if lo else -np.inf, above(taken - 1) if taken else -np.inf)
+
+
+class RollingMedian:
+    """
+    Median and MAD of the last `window` values, kept in a sorted list (NaNs
+    skipped). The median is read by index; the absolute deviations on either
+    side of it are two sorted runs, so the MAD is a binary search too.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.ordered = []
+
+    def stats(self):
+        ordered = self.ordered
+        n = len(ordered)
+        if n == 0:
+            return 0, np.nan, np.nan
+        median = (ordered[(n - 1) // 2] + ordered[n // 2]) / 2
+        split = bisect_left(ordered, median)
+
+        def below(i):
+            return abs(ordered[split - 1 - i] - median)
+
+        def above(j):
+            return abs(ordered[split + j] - median)
+
+        low = _kth_of_two(below, above, split, n - split, (n - 1) // 2)
+        high = low if n % 2 else _kth_of_two(below, above, split, n - split, n // 2)
+        return n, median, (low + high) / 2
+
+    def push(self, x):
+        self.values.append(x)
+        if x == x:
+            insort(self.ordered, x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                del self.ordered[bisect_left(self.ordered, old)]
+
+
+class AnomalyDetector:
+    """
+    Incremental counterpart of detect(): seeded with the trailing hours of
+    the history, it flags new hours one at a time, using the same windows
+    and thresholds as the batch pass.
+    """
+
+    def __init__(self):
+        self.demand = RollingMoments(DEMAND_WINDOW)
+        self.price = RollingMedian(PRICE_WINDOW)
+        self.temp = RollingMedian(TEMP_WINDOW)
+
+    @classmethod
+    def from_history(cls, arrays, stop=None):
+        """Detector whose windows hold the hours just before row `stop` (default: the end)."""
+        rows = len(arrays[data_store.EPOCH_COLUMN]) if stop is None else stop
+        detector = cls()
+        lookback = slice(max(0, rows - max(DEMAND_WINDOW, PRICE_WINDOW, TEMP_WINDOW)), rows)
+        demand, price, temp = (_column(arrays, c, lookback)
+                               for c in ("hourly_demand", "hourly_average_price", "Temp (deg C)"))
+        for d, p, t in zip(demand, price, temp):
+            detector.demand.push(d)
+            detector.price.push(p)
+            detector.temp.push(t)
+        return detector
+
+    @staticmethod
+    def _robust(window, x, threshold):
+        count, median, mad = window.stats()
+        return count >= MIN_PERIODS and mad > 0 and abs(x - median) / (MAD_SCALE * mad) > threshold
+
+    def update(self, rows):
+        """Flags for new hours given as {column: array}; the windows then advance past them."""
+        demand, price, temp = (np.atleast_1d(np.asarray(rows.get(c, np.nan), dtype=np.float64))
+                               for c in ("hourly_demand", "hourly_average_price", "Temp (deg C)"))
+        n = max(len(demand), len(price), len(temp))
+        demand, price, temp = (np.broadcast_to(v, n) for v in (demand, price, temp))
+        wind_chill = np.broadcast_to(np.asarray(rows.get("Wind Chill", np.nan), dtype=np.float64), n)
+        flags = _threshold_flags(temp, wind_chill)
+        for i in range(n):
+            count, mean, variance = self.demand.stats()
+            if count >= MIN_PERIODS and variance > 0 and abs(demand[i] - mean) / np.sqrt(variance) > DEMAND_Z:
+                flags[i] |= FLAGS["demand_spike"]
+            if self._robust(self.price, price[i], PRICE_SCORE):
+                flags[i] |= FLAGS["price_spike"]
+            if self._robust(self.temp, temp[i], TEMP_SCORE):
+                flags[i] |= FLAGS["temp_anomaly"]
+            self.demand.push(demand[i])
+            self.price.push(price[i])
+            self.temp.push(temp[i])
+        return flags
+
+
+# ------------------Flag column------------------
+def _flag_paths(csv_path, cache_dir):
+    store = data_store.ensure_store(csv_path, cache_dir)
+    return os.path.join(store, FLAGS_FILE), os.path.join(store, FLAGS_META)
+
+
+def update_flags(csv_path="data.csv", cache_dir=data_store.CACHE_DIR):
+    """
+    Bring the flag column stored next to the columnar store up to date and
+    return it memory-mapped. A rebuilt store or changed thresholds trigger a
+    batch pass; hours appended since the last call are flagged incrementally.
+    """
+    arrays = data_store.load_arrays(csv_path, cache_dir)
+    rows = len(arrays[data_store.EPOCH_COLUMN])
+    flags_path, meta_path = _flag_paths(csv_path, cache_dir)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        done = meta["rows"] if meta["params"] == json.loads(json.dumps(_params())) else 0
+    except (OSError, ValueError, KeyError):
+        done = 0
+    done = min(done, os.path.getsize(flags_path) if os.path.exists(flags_path) else 0)
+
+    if done < rows:
+        if done == 0:
+            flags = detect(arrays)
+        else:
+            with profiling.stage("anomalies.update"):
+                new_rows = {col: arrays[col][done:] for col in arrays}
+                new_flags = AnomalyDetector.from_history(arrays, done).update(new_rows)
+                flags = np.concatenate([np.fromfile(flags_path, dtype=np.uint8, count=done), new_flags])
+        # rewrite into a sibling file and swap it in, so readers never see a partial column
+        tmp_path = f"{flags_path}.{os.getpid()}.tmp"
+        flags.tofile(tmp_path)
+        os.replace(tmp_path, flags_path)
+        with open(f"{meta_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "params": _params()}, f)
+        os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+    if rows == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(flags_path, dtype=np.uint8, mode="r", shape=(rows,))
+
+
+# ------------------Queries------------------
+def flag_mask(names):
+    return sum(FLAGS[name] for name in names)
+
+
+def flag_names(value):
+    return [name for name, bit in FLAGS.items() if value & bit]
+
+
+def query(start=None, end=None, names=None, csv_path="data.csv", columns=None):
+    """
+    Flagged hours in [start, end] as a DataFrame with a "flags" label column
+    and the readings behind them. Only the range's rows are read.
+    """
+    import downsample
+    flags = update_flags(csv_path)
+    arrays = data_store.load_arrays(csv_path)
+    rows = downsample.viewport(arrays[data_store.EPOCH_COLUMN], start, end)
+    mask = ALL_FLAGS if names is None else flag_mask(names)
+    hits = rows.start + np.flatnonzero(np.asarray(flags[rows]) & mask)
+    columns = columns or ["hourly_demand", "hourly_average_price", "Temp (deg C)", "Wind Chill"]
+    frame = pd.DataFrame({col: np.asarray(arrays[col])[hits] for col in columns},
+                         index=pd.DatetimeIndex(np.asarray(arrays[data_store.EPOCH_COLUMN])[hits]
+                                                .astype("datetime64[s]"), name="datetime"))
+    frame.insert(0, "flags", [", ".join(LABELS[n] for n in flag_names(v)) for v in np.asarray(flags)[hits]])
+    return frame
+
+
+def counts(start=None, end=None, freq="MS", csv_path="data.csv"):
+    """Flagged hours per flag and period (monthly by default) within [start, end]."""
+    import downsample
+    flags = update_flags(csv_path)
+    arrays = data_store.load_arrays(csv_path)
+    rows = downsample.viewport(arrays[data_store.EPOCH_COLUMN], start, end)
+    values = np.asarray(flags[rows])
+    index = pd.DatetimeIndex(np.asarray(arrays[data_store.EPOCH_COLUMN][rows]).astype("datetime64[s]"))
+    bits = pd.DataFrame({LABELS[name]: (values & bit) > 0 for name, bit in FLAGS.items()}, index=index)
+    return bits.resample(freq).sum()
@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import evaluation
+import forecasting
+import profiling
+
+# ------------------API configuration------------------
+# Headless HTTP/JSON front end over the same engine as main.py and 2.py.
+# Requests are served by one asyncio loop; model training and forecasting
+# run in a process pool, and identical in-flight requests (same model,
+# target, horizon and data version) share a single computation.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+READ_TIMEOUT = 10
+MAX_SLICE_ROWS = 2 * 366 * 24
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------Worker jobs (run in the process pool)------------------
+def _forecast_job(model_name, target, horizon, data_path):
+    return forecasting.run_forecast(model_name, target, data_path=data_path, horizon=horizon)
+
+
+def _metrics_job(models, holdout_hours, data_path):
+    table = evaluation.evaluate_models(models, data_path, holdout_hours)
+    return table.to_dict(orient="records")
+
+
+# ------------------Request coalescing------------------
+class Coalescer:
+    """
+    Share one in-flight computation between identical concurrent requests.
+    The shared task is shielded, so a client that disconnects does not
+    cancel the work the other waiting clients depend on.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+# ------------------JSON helpers------------------
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _clean_floats(values):
+    """Array -> list with NaN/inf as null, which plain JSON cannot encode."""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        # stored weather readings have at most two decimals; drop float32 noise like -7.599999904
+        values = np.round(values.astype(np.float64), 4)
+    return [None if not math.isfinite(v) else v for v in values.astype(np.float64).tolist()]
+
+
+def _records(frame):
+    """DataFrame rows as dicts, with NaN (e.g. no memory figures) as null."""
+    return [{key: None if isinstance(value, float) and math.isnan(value) else value for key, value in row.items()}
+            for row in frame.to_dict(orient="records")]
+
+
+def _iso(index):
+    return pd.DatetimeIndex(index).strftime("%Y-%m-%dT%H:%M").tolist()
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _int_param(query, name, default):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer") from None
+
+
+def _time_param(query, name):
+    value = _param(query, name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a date or timestamp, e.g. 2020-01-31T00:00") from None
+
+
+# ------------------Service------------------
+class ForecastService:
+    def __init__(self, data_path="data.csv", max_workers=None):
+        self.data_path = data_path
+        self.max_workers = max_workers or max(1, min(os.cpu_count() or 1, 4))
+        self.pool = None
+        self.coalescer = Coalescer()
+        self.started_at = time.time()
+        self.requests = 0
+
+    def start(self):
+        # build the store before workers start so they only memory-map it
+        data_store.ensure_store(self.data_path)
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _in_pool(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    async def forecast(self, query):
+        model_name = _param(query, "model", forecasting.MODELS[0])
+        target = _param(query, "target", next(iter(forecasting.TARGETS)))
+        horizon = _int_param(query, "horizon", forecasting.HORIZON_HOURS)
+        if model_name not in forecasting.MODELS:
+            raise HTTPError(400, f"model must be one of {forecasting.MODELS}")
+        if target not in forecasting.TARGETS:
+            raise HTTPError(400, f"target must be one of {list(forecasting.TARGETS)}")
+        if not 1 <= horizon <= forecasting.HORIZON_HOURS:
+            raise HTTPError(400, f"horizon must be between 1 and {forecasting.HORIZON_HOURS}")
+
+        version = await asyncio.to_thread(data_store.data_version, self.data_path)
+        key = ("forecast", model_name, target, horizon, version)
+        result = await self.coalescer.run(
+            key, lambda: self._in_pool(_forecast_job, model_name, target, horizon, self.data_path))
+        return {
+            "model": result["model"],
+            "target": result["target"],
+            "horizon": horizon,
+            "index": _iso(result["index"]),
+            "values": {col: _clean_floats(values) for col, values in result["values"].items()},
+        }
+
+    async def metrics(self, query):
+        models = _param(query, "models")
+        models = models.split(",") if models else list(forecasting.MODELS)
+        unknown = [m for m in models if m not in forecasting.MODELS]
+        if unknown:
+            raise HTTPError(400, f"unknown models: {unknown}")
+        holdout_hours = _int_param(query, "holdout_hours", evaluation.HOLDOUT_HOURS)
+        if holdout_hours < 1:
+            raise HTTPError(400, "holdout_hours must be positive")
+
+        version = await asyncio.to_thread(data_store.data_version, self.data_path)
+        key = ("metrics", tuple(models), holdout_hours, version)
+        rows = await self.coalescer.run(
+            key, lambda: self._in_pool(_metrics_job, models, holdout_hours, self.data_path))
+        return {"holdout_hours": holdout_hours, "metrics": rows}
+
+    def _slice(self, start, end, columns):
+        arrays = data_store.load_arrays(self.data_path)
+        epoch = arrays[data_store.EPOCH_COLUMN]
+        missing = [c for c in columns if c not in arrays or c == data_store.EPOCH_COLUMN]
+        if missing:
+            raise HTTPError(400, f"unknown columns: {missing}")
+        # epoch is sorted, so the row range is two binary searches on the memory map
+        lo = 0 if start is None else int(np.searchsorted(epoch, start.value // 10 ** 9, side="left"))
+        hi = len(epoch) if end is None else int(np.searchsorted(epoch, end.value // 10 ** 9, side="right"))
+        if hi - lo > MAX_SLICE_ROWS:
+            raise HTTPError(400, f"slice spans {hi - lo} rows; at most {MAX_SLICE_ROWS} per request")
+        index = np.asarray(epoch[lo:hi]).astype("datetime64[s]")
+        return {
+            "index": _iso(index),
+            "columns": {col: _clean_floats(arrays[col][lo:hi]) for col in columns},
+        }
+
+    async def data(self, query):
+        start, end = _time_param(query, "start"), _time_param(query, "end")
+        if start is None and end is None:
+            raise HTTPError(400, "give start and/or end")
+        columns = _param(query, "columns")
+        columns = columns.split(",") if columns else list(data_store.TARGET_COLUMNS)
+        return await asyncio.to_thread(self._slice, start, end, columns)
+
+    async def health(self, query):
+        return {
+            "status": "ok",
+            "uptime": time.time() - self.started_at,
+            "requests": self.requests,
+            "workers": self.max_workers,
+            "in_flight": len(self.coalescer),
+            "computations": self.coalescer.started,
+            "coalesced": self.coalescer.coalesced,
+        }
+
+    async def profile(self, query):
+        since = _time_param(query, "since")
+        # the shared log covers the worker processes; the snapshot only this server process
+        summary = await asyncio.to_thread(profiling.log_summary, None, since.timestamp() if since is not None else None)
+        return {"stages": _records(summary),
+                "server": _records(pd.DataFrame(profiling.snapshot()))}
+
+    async def dispatch(self, method, target):
+        routes = {"/forecast": self.forecast, "/metrics": self.metrics, "/data": self.data,
+                  "/health": self.health, "/profile": self.profile}
+        url = urlsplit(target)
+        handler = routes.get(url.path.rstrip("/") or "/")
+        if handler is None:
+            raise HTTPError(404, f"no endpoint {url.path}; try {sorted(routes)}")
+        if method != "GET":
+            raise HTTPError(405, "only GET is supported")
+        self.requests += 1
+        with profiling.stage(f"api{url.path.rstrip('/')}"):
+            return await handler(parse_qs(url.query))
+
+
+# ------------------HTTP/1.1 over asyncio streams------------------
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise HTTPError(400, "malformed request line")
+    return parts[0], parts[1]
+
+
+async def _write_json(writer, status, payload):
+    body = json.dumps(payload, default=_json_default, allow_nan=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def make_handler(service):
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await asyncio.wait_for(_read_request(reader), READ_TIMEOUT)
+                if request is None:
+                    return
+                payload = await service.dispatch(*request)
+                await _write_json(writer, 200, payload)
+            except HTTPError as e:
+                await _write_json(writer, e.status, {"error": str(e)})
+            except ValueError as e:
+                await _write_json(writer, 400, {"error": str(e)})
+            except asyncio.TimeoutError:
+                await _write_json(writer, 400, {"error": "timed out reading the request"})
+            except Exception as e:
+                await _write_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, data_path="data.csv", max_workers=None):
+    service = ForecastService(data_path, max_workers)
+    service.start()
+    server = await asyncio.start_server(make_handler(service), host, port)
+    print(f"Forecast API listening on http://{host}:{port} ({service.max_workers} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless forecasting HTTP API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", default="data.csv")
+    parser.add_argument("--workers", type=int, default=None, help="model worker processes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.data, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import data_store
+import evaluation
+import forecasting
+
+# ------------------Backtest configuration------------------
+MODES = ["expanding", "sliding"]
+DEFAULT_FOLDS = 5
+DEFAULT_HORIZON = 30 * 24
+# sliding-window training length
+DEFAULT_WINDOW = 3 * 365 * 24
+# lead-time buckets scored per fold: metrics over the first N forecast hours
+HORIZON_BUCKETS = [24, 7 * 24, 30 * 24, 90 * 24, 365 * 24]
+OUTPUT_DIR = os.path.join(".cache", "backtests")
+
+
+def make_folds(n_rows, n_folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, mode="expanding",
+               window=DEFAULT_WINDOW, step=None):
+    """
+    Rolling forecast origins ending at the last row. Each fold trains on
+    [train_start, origin) and is scored on [origin, origin + horizon).
+    Expanding folds always start training at row 0; sliding folds use the
+    `window` rows before the origin.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown backtest mode: {mode}")
+    step = step or horizon
+    folds = []
+    for k in reversed(range(n_folds)):
+        origin = n_rows - horizon - k * step
+        train_start = 0 if mode == "expanding" else max(0, origin - window)
+        if origin - train_start < 2 * horizon:
+            continue
+        folds.append({"fold": len(folds), "train_start": train_start, "origin": origin,
+                      "test_end": origin + horizon})
+    return folds
+
+
+def run_fold(csv_path, model_name, column, fold, buckets):
+    """
+    Train and score one fold with the params the app uses for column (tuned
+    if available). Runs in a worker process: the data is read from the shared
+    read-only memory-mapped store and only the fold's rows are copied.
+    """
+    started = time.time()
+    arrays = data_store.load_arrays(csv_path)
+    train = data_store.frame_from_arrays(arrays, fold["train_start"], fold["origin"])
+    test = data_store.frame_from_arrays(arrays, fold["origin"], fold["test_end"])
+
+    fitted = forecasting.train_model(model_name, train, column, forecasting.model_params(model_name, column))
+    predicted = forecasting.predict(model_name, fitted, train, test.index)
+    actual = test[column].to_numpy(dtype=float)
+    elapsed = time.time() - started
+
+    rows = []
+    for hours in buckets:
+        if hours > len(actual):
+            continue
+        metrics = evaluation.OnlineMetrics().update(actual[:hours], predicted[:hours]).regression()
+        rows.append({
+            "model": model_name,
+            "target": column,
+            "fold": fold["fold"],
+            "train_start": train.index[0],
+            "origin": test.index[0],
+            "horizon_hours": hours,
+            **metrics,
+            "seconds": elapsed,
+        })
+    return rows
+
+
+def run_backtest(models=None, targets=None, csv_path="data.csv", n_folds=DEFAULT_FOLDS,
+                 horizon=DEFAULT_HORIZON, mode="expanding", window=DEFAULT_WINDOW,
+                 max_workers=None, progress=None):
+    """
+    Run every (model, target, fold) combination across a process pool and
+    return one row per fold and lead-time bucket. `progress`, if given, is
+    called with (completed, total) as folds finish.
+    """
+    models = models or forecasting.MODELS
+    targets = targets or data_store.TARGET_COLUMNS
+    buckets = [h for h in HORIZON_BUCKETS if h < horizon] + [horizon]
+
+    # build the store once here so every worker just memory-maps it
+    data_store.ensure_store(csv_path)
+    n_rows = len(data_store.load_arrays(csv_path)[data_store.EPOCH_COLUMN])
+    folds = make_folds(n_rows, n_folds, horizon, mode, window)
+    jobs = [(model, column, fold) for model in models for column in targets for fold in folds]
+    if not jobs:
+        raise ValueError("Not enough history for the requested folds and horizon.")
+
+    rows = []
+    max_workers = max_workers or max(1, min(os.cpu_count() or 1, len(jobs)))
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=forecasting.limit_fit_threads,
+                             initargs=(forecasting.worker_threads(max_workers),)) as pool:
+        futures = [pool.submit(run_fold, csv_path, model, column, fold, buckets)
+                   for model, column, fold in jobs]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            rows.extend(future.result())
+            if progress is not None:
+                progress(completed, len(futures))
+
+    results = pd.DataFrame(rows)
+    results.insert(0, "mode", mode)
+    return results.sort_values(["model", "target", "fold", "horizon_hours"]).reset_index(drop=True)
+
+
+def summarize(results):
+    """Mean metrics per model, target and lead-time bucket across folds."""
+    metrics = [m for m in evaluation.REGRESSION_METRICS if m in results.columns]
+    return results.groupby(["model", "target", "horizon_hours"])[metrics].mean().reset_index()
+
+
+def save_results(results, path=None):
+    if path is None:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        path = os.path.join(OUTPUT_DIR, f"backtest_{results['mode'].iloc[0]}.csv")
+    results.to_csv(path, index=False)
+    return path
+
+
+# ------------------Command line------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecasting models.")
+    parser.add_argument("--data", default="data.csv", help="hourly dataset (default: data.csv)")
+    parser.add_argument("--models", nargs="+", choices=forecasting.MODELS, default=forecasting.MODELS)
+    parser.add_argument("--targets", nargs="+", choices=data_store.TARGET_COLUMNS,
+                        default=data_store.TARGET_COLUMNS)
+    parser.add_argument("--mode", choices=MODES, default="expanding")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="forecast hours per fold")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="training hours for sliding mode")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="CSV path for per-fold results")
+    args = parser.parse_args(argv)
+
+    results = run_backtest(args.models, args.targets, args.data, args.folds, args.horizon,
+                           args.mode, args.window, args.workers,
+                           progress=lambda done, total: print(f"{done}/{total} folds finished"))
+    path = save_results(results, args.output)
+    print(summarize(results).to_string(index=False))
+    print(f"Per-fold results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
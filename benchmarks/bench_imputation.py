@@ -0,0 +1,102 @@
+"""
+Benchmark imputation.impute_frame against the per-station pandas routine
+from group2-1-data-collection-preprocessing.ipynb (impute_missing_data).
+
+    python benchmarks/bench_imputation.py --rows 177553 --stations 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import imputation  # noqa: E402
+
+
+def synthetic_station(rows, seed, missing=0.05):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2003-01-01", periods=rows, freq="h", name="datetime")
+    hours = np.arange(rows)
+    df = pd.DataFrame({
+        "Temp (deg C)": 8 - 15 * np.cos(2 * np.pi * hours / 8766) + rng.normal(0, 2, rows),
+        "Dew Point Temp (deg C)": rng.normal(0, 8, rows),
+        "Rel Hum (%)": rng.integers(30, 100, rows).astype(float),
+        "Wind Dir (10s deg)": rng.integers(1, 37, rows).astype(float),
+        "Wind Spd (km/h)": rng.integers(0, 40, rows).astype(float),
+        "Visibility (km)": rng.uniform(5, 25, rows),
+        "Stn Press (kPa)": rng.normal(100.5, 0.8, rows),
+        "Wind Chill": np.nan,
+    }, index=index)
+    for column in df.columns[:-1]:
+        df.loc[rng.random(rows) < missing, column] = np.nan
+    return df
+
+
+# ------------------Notebook reference (ported to data.csv column names)------------------
+def notebook_impute(df):
+    for col in ["Temp (deg C)", "Dew Point Temp (deg C)", "Wind Spd (km/h)"]:
+        if col in df.columns and df[col].notna().sum() > 1:
+            df.loc[:, col] = df[col].interpolate(method="linear", limit_direction="both")
+            df.loc[:, col] = df[col].bfill().ffill().round(2)
+    df.loc[:, "Temp (deg C)"] = df["Temp (deg C)"].clip(lower=-40, upper=40)
+    df.loc[:, "Wind Spd (km/h)"] = df["Wind Spd (km/h)"].clip(lower=1, upper=100)
+    df.loc[:, "Wind Spd (km/h)"] = df["Wind Spd (km/h)"].fillna(df["Wind Spd (km/h)"].median()).round(2)
+    for col in ["Rel Hum (%)", "Stn Press (kPa)"]:
+        df.loc[:, col] = df[col].replace(0, np.nan)
+        df.loc[:, col] = df[col].bfill().ffill().round(2)
+    col = "Wind Dir (10s deg)"
+    df.loc[:, col] = df[col].replace(0, np.nan)
+    df.loc[:, col] = df[col].apply(lambda x: np.deg2rad(x) if pd.notnull(x) else np.nan)
+    df.loc[:, col] = df[col].interpolate()
+    df.loc[:, col] = df[col].apply(lambda x: np.rad2deg(x)).round(2)
+    df.loc[:, "Visibility (km)"] = df["Visibility (km)"].replace(0, np.nan)
+    df.loc[:, "Visibility (km)"] = df["Visibility (km)"].fillna(df["Visibility (km)"].median()).round(2)
+    mask = df["Wind Chill"].isna() & (df["Wind Spd (km/h)"] > 0)
+    t, v = df.loc[mask, "Temp (deg C)"], df.loc[mask, "Wind Spd (km/h)"]
+    df.loc[mask, "Wind Chill"] = 13.12 + 0.6215 * t - 11.37 * v ** 0.16 + 0.3965 * t * v ** 0.16
+    df.loc[:, "Wind Chill"] = df["Wind Chill"].bfill().ffill().round(2)
+    return df
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=177553, help="hourly rows per station")
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    stations = [synthetic_station(args.rows, seed) for seed in range(args.stations)]
+    merged = pd.concat([s.assign(station=i) for i, s in enumerate(stations)])
+
+    notebook_seconds, notebook_out = timed(
+        lambda: [notebook_impute(s.copy()) for s in stations], repeat=args.repeat)
+    vectorized_seconds, vectorized_out = timed(
+        lambda: imputation.impute_frame(merged, station_column="station"), repeat=args.repeat)
+
+    # the linear columns must agree with the notebook's interpolate/bfill/ffill
+    reference = pd.concat(notebook_out)["Temp (deg C)"].to_numpy()
+    ours = vectorized_out.sort_values(["station"], kind="stable")["Temp (deg C)"].to_numpy()
+    max_diff = np.nanmax(np.abs(reference - ours))
+
+    total = args.rows * args.stations
+    print(f"rows: {total:,} ({args.stations} stations x {args.rows:,} hours)")
+    print(f"notebook impute_missing_data: {notebook_seconds:8.3f}s")
+    print(f"imputation.impute_frame:      {vectorized_seconds:8.3f}s  ({notebook_seconds / vectorized_seconds:.1f}x)")
+    print(f"max |difference| on Temp (deg C): {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start report for the Streamlit app: import cost of main.py per
+top-level module (python -X importtime) and the time to first paint of the
+Home page, each measured in a fresh interpreter.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget 1.0 --top 15
+
+Streamlit itself is imported before the clock starts, as the server has it
+loaded before the first session connects. Writes a JSON report and exits 1
+when the first paint exceeds --budget seconds.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(".cache", "bench", "startup.json")
+DEFAULT_BUDGET = 1.0
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+FIRST_PAINT = """
+import json, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=60).run()
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "exceptions": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def import_report(module="main"):
+    """(total seconds, [(module, cumulative seconds)]) for importing `module` in a fresh interpreter."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    total, children, pending = 0.0, [], []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if not match:
+            continue
+        name, seconds, depth = match.group(4), int(match.group(2)) / 1e6, len(match.group(3)) // 2
+        # a parent is reported after its children, so depth-1 lines collect until their parent's line
+        if depth == 1:
+            pending.append((name, seconds))
+        elif depth == 0:
+            if name == module:
+                total, children = seconds, pending
+            pending = []
+    return total, sorted(children, key=lambda row: -row[1])
+
+
+def first_paint(path="main.py"):
+    """Seconds from script start to the rendered Home page, in a fresh interpreter."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", FIRST_PAINT.format(path=os.path.join(ROOT, path))],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - started
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="first-paint budget in seconds")
+    parser.add_argument("--top", type=int, default=10, help="modules listed in the import report")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    total, modules = import_report()
+    paint = first_paint()
+    print(f"import main: {total:.3f}s (after streamlit)")
+    for name, seconds in modules[:args.top]:
+        print(f"  {name:<30} {seconds:8.3f}s")
+    print(f"first paint of Home: {paint['seconds']:.3f}s (budget {args.budget:.1f}s)")
+    for error in paint["exceptions"]:
+        print(f"  exception: {error}")
+
+    report = {"created": time.time(), "python": sys.version.split()[0], "import_seconds": total,
+              "imports": [{"module": name, "seconds": seconds} for name, seconds in modules],
+              "first_paint_seconds": paint["seconds"], "budget_seconds": args.budget,
+              "exceptions": paint["exceptions"]}
+    output = os.path.join(ROOT, args.output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {output}")
+    return 1 if paint["seconds"] > args.budget or paint["exceptions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
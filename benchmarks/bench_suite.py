@@ -0,0 +1,253 @@
+"""
+Benchmark the data and forecasting hot paths on synthetic hourly datasets
+shaped like data.csv (same 12 columns), and compare against a stored baseline.
+
+    python benchmarks/bench_suite.py --sizes 10k,177k
+    python benchmarks/bench_suite.py --sizes all --models LightGBM,XGboost
+    python benchmarks/bench_suite.py --sizes 10k,177k --save-baseline
+
+Synthetic CSVs are generated once per size (fixed seed) under .cache/bench/.
+Results go to --output as JSON; every (size, stage) also present in the
+baseline is compared, and the exit status is 1 when any stage is slower than
+baseline by more than --tolerance. Baselines are machine-specific, so none
+is shipped: --save-baseline records one under .cache/bench/ on the machine
+the comparisons will run on, and until then a run only reports its timings.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# keep benchmark runs out of the app's Diagnostics log
+os.environ.setdefault("ONTARIO_PROFILE_LOG", "")
+
+import chunked  # noqa: E402
+import data_store  # noqa: E402
+import evaluation  # noqa: E402
+import features  # noqa: E402
+import forecasting  # noqa: E402
+import imputation  # noqa: E402
+
+SIZES = {"10k": 10_000, "177k": 177_553, "1M": 1_000_000, "10M": 10_000_000}
+DEFAULT_SIZES = ["10k", "177k"]
+BENCH_DIR = os.path.join(".cache", "bench")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+# slower than baseline by more than this fraction (and MIN_DELTA seconds) is a regression
+DEFAULT_TOLERANCE = 0.30
+MIN_DELTA = 0.005
+# models are trained on at most this many of the most recent rows
+DEFAULT_TRAIN_ROWS = 1_000_000
+WARMUP_ROWS = 500
+CSV_CHUNK_ROWS = 500_000
+# 10M hourly rows run from 2003 into the 32nd century; pandas' microsecond timestamps cover that
+START = "2003-05-01"
+
+
+# ------------------Synthetic data------------------
+def synthetic_chunk(epoch, rng, missing=0.02):
+    """data.csv columns for the given epoch seconds: seasonal demand/price driven by the weather."""
+    rows = len(epoch)
+    year_phase = 2 * np.pi * (epoch / 3600 % 8766) / 8766
+    day_phase = 2 * np.pi * (epoch / 3600 % 24) / 24
+    temp = 8 - 15 * np.cos(year_phase) - 4 * np.cos(day_phase) + rng.normal(0, 2, rows)
+    demand = 16000 + 90 * np.abs(temp - 18) + 1500 * np.sin(day_phase - 1.5) + rng.normal(0, 400, rows)
+    chunk = pd.DataFrame({
+        "datetime": pd.to_datetime(epoch, unit="s").strftime(data_store.DATETIME_FORMAT),
+        "hourly_demand": demand,
+        "hourly_average_price": np.maximum(0, 20 + demand / 1000 + rng.gamma(2, 8, rows)),
+        # steps once a year, like the census figures in data.csv
+        "population": 8_000_000 + 130_000 * (epoch // (8766 * 3600)),
+        "Temp (deg C)": temp.round(1),
+        "Dew Point Temp (deg C)": (temp - rng.uniform(1, 8, rows)).round(1),
+        "Rel Hum (%)": rng.integers(30, 100, rows).astype(float),
+        "Wind Dir (10s deg)": rng.integers(1, 37, rows).astype(float),
+        "Wind Spd (km/h)": rng.integers(0, 40, rows).astype(float),
+        "Visibility (km)": rng.uniform(5, 25, rows).round(1),
+        "Stn Press (kPa)": rng.normal(100.5, 0.8, rows).round(2),
+        "Wind Chill": np.where(temp < 0, temp - 5, np.nan).round(1),
+    })
+    for column in data_store.WEATHER_COLUMNS[:-1]:
+        chunk.loc[rng.random(rows) < missing, column] = np.nan
+    return chunk
+
+
+def synthetic_csv(size, bench_dir=BENCH_DIR, seed=0):
+    """Path of the synthetic CSV for a size name, generating it on first use."""
+    path = os.path.join(bench_dir, f"synthetic-{size}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(bench_dir, exist_ok=True)
+    rows = SIZES[size]
+    rng = np.random.default_rng(seed)
+    first = pd.Timestamp(START).value // 10 ** 9
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        for lo in range(0, rows, CSV_CHUNK_ROWS):
+            epoch = first + 3600 * np.arange(lo, min(lo + CSV_CHUNK_ROWS, rows), dtype=np.int64)
+            synthetic_chunk(epoch, rng).to_csv(f, header=lo == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------------Timing------------------
+def measure(func, repeat):
+    """(best, median) wall time of `repeat` calls, plus the last result."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+    return min(times), float(np.median(times)), result
+
+
+def read_csv_frame(path):
+    """The pre-store load path: parse the CSV text and its datetime column."""
+    df = pd.read_csv(path)
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("datetime"), format=data_store.DATETIME_FORMAT),
+                                name="datetime")
+    return df
+
+
+def _blocks(df):
+    return (df.iloc[lo:lo + chunked.BLOCK_ROWS] for lo in range(0, len(df), chunked.BLOCK_ROWS))
+
+
+def run_size(size, models, repeat, train_rows, bench_dir=BENCH_DIR):
+    """Time every stage on one synthetic dataset; returns a list of result rows."""
+    rows = SIZES[size]
+    csv_path = synthetic_csv(size, bench_dir)
+    cache_dir = os.path.join(bench_dir, f"store-{size}")
+    results = []
+
+    def add(stage, func, repeat=repeat, items=rows):
+        best, median, result = measure(func, repeat)
+        results.append({"size": size, "rows": rows, "stage": stage, "seconds": best, "median": median,
+                        "repeat": repeat, "items_per_second": items / best if best else None})
+        print(f"  {stage:<34} {best:10.4f}s  (median {median:.4f}s)")
+        return result
+
+    print(f"{size} ({rows:,} rows)")
+    # repeated builds would otherwise be skipped as fresh
+    add("load.build_store", lambda: (shutil.rmtree(cache_dir, ignore_errors=True),
+                                     data_store.build_store(csv_path, cache_dir)), repeat=1)
+    add("load.csv", lambda: read_csv_frame(csv_path), repeat=1 if rows > 1_000_000 else repeat)
+    df = add("load.columnar", lambda: data_store.load_frame(csv_path, cache_dir))
+    arrays = data_store.load_arrays(csv_path, cache_dir)
+
+    add("imputation", lambda: imputation.impute_frame(df))
+    add("features.build", lambda: features.build_features(arrays))
+    add("features.history", lambda: forecasting.history_features(df))
+
+    actual = df["hourly_demand"].to_numpy()
+    predicted = actual + np.random.default_rng(1).normal(0, 500, len(actual))
+    add("metrics", lambda: (evaluation.regression_metrics(actual, predicted),
+                            evaluation.classification_metrics(actual, predicted)))
+
+    train_frame = df.iloc[-train_rows:]
+    for model_name in models:
+        # untimed warm-up fit, so the library import isn't charged to the first model
+        forecasting.train_model(model_name, train_frame.iloc[-WARMUP_ROWS:], "hourly_demand")
+        fitted = add(f"train.{model_name}", lambda: forecasting.train_model(model_name, train_frame,
+                                                                            "hourly_demand"),
+                     repeat=1, items=len(train_frame))
+        add(f"inference.single.{model_name}",
+            lambda: forecasting.predict(model_name, fitted, df, forecasting.future_index(df.index[-1], 1)),
+            items=1)
+        if model_name == "ARIMA":
+            # recursive forecasts can't be scored in blocks; time a one-year horizon instead
+            index = forecasting.future_index(df.index[-1], 365 * 24)
+            add(f"inference.batch.{model_name}", lambda: forecasting.predict(model_name, fitted, df, index),
+                items=len(index))
+        else:
+            add(f"inference.batch.{model_name}",
+                lambda: sum(len(p) for _, p in chunked.iter_scores(model_name, fitted, _blocks(df))))
+    return results
+
+
+# ------------------Baseline comparison------------------
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Rows present in both runs, with the time ratio and whether it counts as a regression."""
+    reference = {(r["size"], r["stage"]): r["seconds"] for r in baseline.get("results", [])}
+    rows = []
+    for r in results:
+        base = reference.get((r["size"], r["stage"]))
+        if base is None:
+            continue
+        ratio = r["seconds"] / base if base else float("inf")
+        rows.append({"size": r["size"], "stage": r["stage"], "baseline": base, "seconds": r["seconds"],
+                     "ratio": ratio,
+                     "regression": ratio > 1 + tolerance and r["seconds"] - base > MIN_DELTA})
+    return rows
+
+
+def environment():
+    import lightgbm
+    import sklearn
+    import xgboost
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+            "lightgbm": lightgbm.__version__, "xgboost": xgboost.__version__, "sklearn": sklearn.__version__}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"comma-separated, from {list(SIZES)}, or all")
+    parser.add_argument("--models", default=",".join(forecasting.MODELS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--train-rows", type=int, default=DEFAULT_TRAIN_ROWS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    args = parser.parse_args(argv)
+
+    sizes = list(SIZES) if args.sizes == "all" else args.sizes.split(",")
+    models = args.models.split(",") if args.models else []
+    unknown = [s for s in sizes if s not in SIZES] + [m for m in models if m not in forecasting.MODELS]
+    if unknown:
+        parser.error(f"unknown sizes/models: {unknown}")
+
+    results = []
+    for size in sizes:
+        results.extend(run_size(size, models, args.repeat, args.train_rows))
+    run = {"created": time.time(), "environment": environment(), "train_rows": args.train_rows,
+           "results": results}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        if os.path.dirname(args.baseline):
+            os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against; rerun with --save-baseline to record one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        comparison = compare(results, json.load(f), args.tolerance)
+    regressions = [c for c in comparison if c["regression"]]
+    for c in comparison:
+        flag = "  REGRESSION" if c["regression"] else ""
+        print(f"  {c['size']:>5} {c['stage']:<34} {c['baseline']:9.4f}s -> {c['seconds']:9.4f}s "
+              f"({c['ratio']:.2f}x){flag}")
+    print(f"{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import features
+import forecasting
+
+# ------------------Chunked execution configuration------------------
+# Out-of-core counterparts of the in-memory paths: rows stream through as
+# fixed-size blocks, and only the state a later block depends on (lag and
+# rolling lookback, running climatology totals) is carried between them.
+# Peak memory is set by block_rows, not by the length of the history, and
+# every function returns exactly what the whole-frame path would.
+BLOCK_ROWS = 100_000
+
+
+# ------------------Loading------------------
+def iter_blocks(csv_path="data.csv", block_rows=BLOCK_ROWS, start=0, stop=None):
+    """
+    Yield rows [start:stop] of data.csv as datetime-indexed DataFrames of at
+    most block_rows rows, sliced from the memory-mapped columnar store.
+    """
+    arrays = data_store.load_arrays(csv_path)
+    rows = len(arrays[data_store.EPOCH_COLUMN])
+    stop = rows if stop is None else min(stop, rows)
+    for block_start in range(start, stop, block_rows):
+        yield data_store.frame_from_arrays(arrays, block_start, min(block_start + block_rows, stop))
+
+
+def iter_csv_blocks(path, block_rows=BLOCK_ROWS):
+    """
+    Yield blocks of a raw hourly CSV in data.csv's layout without building a
+    store, e.g. per-station or per-zone files with tens of millions of rows.
+    Rows must be time-sorted (within each station, for multi-station files).
+    """
+    for chunk in pd.read_csv(path, chunksize=block_rows):
+        stamps = pd.to_datetime(chunk.pop("datetime"), format=data_store.DATETIME_FORMAT)
+        chunk.index = pd.DatetimeIndex(stamps, name="datetime")
+        yield chunk
+
+
+def _split_stations(blocks, station_column):
+    for block in blocks:
+        if station_column is None:
+            yield None, block
+        else:
+            for station, group in block.groupby(station_column, sort=False):
+                yield station, group
+
+
+# ------------------Feature building------------------
+def _block_arrays(block):
+    arrays = {data_store.EPOCH_COLUMN: block.index.to_numpy(dtype="datetime64[s]").astype(np.int64)}
+    for col in features.SOURCE_COLUMNS:
+        if col in block.columns:
+            arrays[col] = block[col].to_numpy(dtype=np.float64)
+        else:
+            arrays[col] = np.full(len(block), np.nan)
+    return arrays
+
+
+def iter_features(blocks, station_column=None):
+    """
+    Yield (station, epoch, matrix) per block, where matrix is the float32
+    features.feature_columns() matrix for the block's rows. Each station
+    carries its last features.MAX_LOOKBACK raw rows into its next block, so
+    the output matches features.build_features on the station's full history.
+    """
+    tails, seen = {}, {}
+    for station, block in _split_stations(blocks, station_column):
+        arrays = _block_arrays(block)
+        tail = tails.get(station)
+        if tail is None:
+            raw, start = arrays, 0
+        else:
+            raw = {col: np.concatenate([tail[col], values]) for col, values in arrays.items()}
+            start = len(tail[data_store.EPOCH_COLUMN])
+
+        matrix = np.empty((len(block), len(features.feature_columns())), dtype=np.float32)
+        offset = seen.get(station, 0) - start
+        features._compute(raw, raw[data_store.EPOCH_COLUMN], start, matrix, offset)
+        seen[station] = seen.get(station, 0) + len(block)
+        tails[station] = {col: values[-features.MAX_LOOKBACK:] for col, values in raw.items()}
+        yield station, arrays[data_store.EPOCH_COLUMN], matrix
+
+
+def exogenous_summary(blocks):
+    """forecasting.ExogenousSummary accumulated one block at a time."""
+    summary = forecasting.ExogenousSummary()
+    for block in blocks:
+        summary.update(block)
+    return summary
+
+
+# ------------------Batch scoring------------------
+def iter_scores(model_name, fitted, blocks):
+    """
+    Yield (index, predictions) per block for a fitted tree model, scoring
+    forecasting.history_features block by block; regressors score rows
+    independently, so this equals predicting the whole frame at once.
+    """
+    if model_name == "ARIMA":
+        raise ValueError("ARIMA forecasts recursively and cannot be scored in independent blocks")
+    for block in blocks:
+        if block.empty:
+            continue
+        yield block.index, np.asarray(fitted.predict(forecasting.history_features(block)), dtype=float)
+
+
+def iter_forecast(model_name, fitted, summary, last_timestamp, horizon=forecasting.HORIZON_HOURS,
+                  block_rows=BLOCK_ROWS):
+    """
+    Yield (index, predictions) blocks of a tree-model forecast over the
+    horizon, building future features per block from an ExogenousSummary
+    instead of the full history frame.
+    """
+    if model_name == "ARIMA":
+        raise ValueError("ARIMA forecasts recursively and cannot be scored in independent blocks")
+    index = forecasting.future_index(last_timestamp, horizon)
+    for block_start in range(0, len(index), block_rows):
+        block_index = index[block_start:block_start + block_rows]
+        exog = forecasting.future_features(None, block_index, summary)
+        yield block_index, np.asarray(fitted.predict(exog), dtype=float)
+
+
+def score_to_csv(model_name, fitted, blocks, output_path, column="prediction"):
+    """Stream iter_scores to a CSV with data.csv's datetime format; returns the row count."""
+    rows = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        for block_index, predictions in iter_scores(model_name, fitted, blocks):
+            out = pd.DataFrame({"datetime": block_index.strftime(data_store.DATETIME_FORMAT),
+                                column: predictions})
+            out.to_csv(f, header=rows == 0, index=False)
+            rows += len(out)
+    return rows
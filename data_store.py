@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import profiling
+
+# ------------------Columnar store configuration------------------
+# data.csv is converted once into one raw binary file per column plus a
+# meta.json holding dtypes, row count and the source fingerprint; later loads
+# memory-map the arrays instead of re-parsing 177k rows of text. Raw files
+# (rather than .npy) let new hours be appended without rewriting history.
+CACHE_DIR = ".cache"
+STORE_VERSION = 3
+# the source fingerprint is one sha1 per block of the CSV, so an append only
+# rehashes the last (partial) block and the new bytes
+FINGERPRINT_BLOCK_BYTES = 1 << 20
+# the CSV is parsed this many rows at a time, so building the store never
+# holds more than one chunk of text in memory
+BUILD_CHUNK_ROWS = 500_000
+
+# one build at a time per process: a build swaps the store directory out
+# from under any thread reading its meta.json
+_build_lock = threading.Lock()
+
+DATETIME_FORMAT = "%d/%m/%Y %H:%M"
+EPOCH_COLUMN = "epoch"
+
+TARGET_COLUMNS = ["hourly_demand", "hourly_average_price"]
+INTEGER_COLUMNS = ["population"]
+WEATHER_COLUMNS = [
+    "Temp (deg C)", "Dew Point Temp (deg C)", "Rel Hum (%)", "Wind Dir (10s deg)",
+    "Wind Spd (km/h)", "Visibility (km)", "Stn Press (kPa)", "Wind Chill",
+]
+
+
+def column_dtype(column):
+    if column in WEATHER_COLUMNS:
+        return np.float32
+    if column in INTEGER_COLUMNS:
+        return np.int64
+    return np.float64
+
+
+def store_path(csv_path="data.csv", cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, "data_store", stem)
+
+
+# ------------------Source fingerprint------------------
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def block_hashes(path, first_block=0, block_bytes=FINGERPRINT_BLOCK_BYTES):
+    """sha1 of each block_bytes block of path, starting at block first_block."""
+    with open(path, "rb") as f:
+        f.seek(first_block * block_bytes)
+        return [hashlib.sha1(block).hexdigest() for block in iter(lambda: f.read(block_bytes), b"")]
+
+
+def _read_meta(store):
+    try:
+        with open(os.path.join(store, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(store, meta):
+    tmp_path = os.path.join(store, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(store, "meta.json"))
+
+
+def is_fresh(meta, csv_path):
+    """
+    A store is fresh when the CSV's size and mtime are unchanged. If only the
+    mtime moved (e.g. a copy or touch), the block hashes decide and the
+    recorded mtime is refreshed so the next check is cheap again.
+    """
+    if meta is None or meta.get("version") != STORE_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if stat.st_size != meta["size"]:
+        return False
+    if stat.st_mtime_ns == meta["mtime_ns"]:
+        return True
+    return block_hashes(csv_path) == meta["blocks"]
+
+
+# ------------------Build------------------
+def _write_columns_streaming(csv_path, tmp_store, chunk_rows):
+    """
+    Convert data.csv chunk by chunk, appending to the column files. Returns
+    (rows, columns), or None when the rows are out of order, duplicated or
+    an integer column has gaps; those files take the in-memory path instead.
+    """
+    columns = None
+    rows = 0
+    last_epoch = None
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        stamps = pd.to_datetime(chunk.pop("datetime"), format=DATETIME_FORMAT)
+        epoch = stamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        if np.any(np.diff(epoch) <= 0) or (last_epoch is not None and len(epoch) and epoch[0] <= last_epoch):
+            return None
+        if columns is None:
+            columns = [{"name": EPOCH_COLUMN, "file": f"{EPOCH_COLUMN}.bin", "dtype": "int64"}]
+            for i, column in enumerate(chunk.columns):
+                columns.append({"name": column, "file": f"col_{i:02d}.bin",
+                                "dtype": np.dtype(column_dtype(column)).name})
+        if len(epoch):
+            last_epoch = epoch[-1]
+
+        with open(os.path.join(tmp_store, f"{EPOCH_COLUMN}.bin"), "ab") as f:
+            epoch.tofile(f)
+        for column in columns[1:]:
+            values = pd.to_numeric(chunk[column["name"]], errors="coerce")
+            if np.dtype(column["dtype"]).kind == "i" and values.isna().any():
+                return None
+            with open(os.path.join(tmp_store, column["file"]), "ab") as f:
+                values.to_numpy(dtype=column["dtype"]).tofile(f)
+        rows += len(chunk)
+    if columns is None:
+        return None
+    return rows, columns
+
+
+def _write_columns_in_memory(csv_path, tmp_store):
+    df = pd.read_csv(csv_path)
+    index = pd.to_datetime(df.pop("datetime"), format=DATETIME_FORMAT)
+    df.index = pd.DatetimeIndex(index)
+    df = df.sort_index()
+    df = df[~df.index.duplicated(keep="last")]
+
+    epoch = df.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    epoch.tofile(os.path.join(tmp_store, f"{EPOCH_COLUMN}.bin"))
+    columns = [{"name": EPOCH_COLUMN, "file": f"{EPOCH_COLUMN}.bin", "dtype": "int64"}]
+
+    for i, column in enumerate(df.columns):
+        dtype = column_dtype(column)
+        values = pd.to_numeric(df[column], errors="coerce")
+        if dtype is np.int64 and values.isna().any():
+            dtype = np.float64
+        file_name = f"col_{i:02d}.bin"
+        values.to_numpy(dtype=dtype).tofile(os.path.join(tmp_store, file_name))
+        columns.append({"name": column, "file": file_name, "dtype": np.dtype(dtype).name})
+    return len(df), columns
+
+
+@profiling.timed("data.build_store")
+def build_store(csv_path="data.csv", cache_dir=CACHE_DIR, chunk_rows=BUILD_CHUNK_ROWS):
+    """
+    Parse data.csv once and write the typed columnar store. Sorted files are
+    converted in chunks of chunk_rows; anything else is sorted and
+    de-duplicated in memory.
+    """
+    store = store_path(csv_path, cache_dir)
+    stat = os.stat(csv_path)
+
+    # write into a private sibling directory and swap it in, so readers never
+    # see a half-built store and concurrent builders don't clobber each other
+    tmp_store = f"{store}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp_store, ignore_errors=True)
+    os.makedirs(tmp_store)
+
+    written = _write_columns_streaming(csv_path, tmp_store, chunk_rows)
+    if written is None:
+        shutil.rmtree(tmp_store, ignore_errors=True)
+        os.makedirs(tmp_store)
+        written = _write_columns_in_memory(csv_path, tmp_store)
+    rows, columns = written
+
+    meta = {
+        "version": STORE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "blocks": block_hashes(csv_path),
+        "data_version": file_hash(csv_path),
+        "rows": int(rows),
+        "columns": columns,
+    }
+    _write_meta(tmp_store, meta)
+
+    shutil.rmtree(store, ignore_errors=True)
+    os.makedirs(os.path.dirname(store), exist_ok=True)
+    try:
+        os.replace(tmp_store, store)
+    except OSError:
+        # another process installed its build first; keep it if it is current
+        shutil.rmtree(tmp_store, ignore_errors=True)
+        if not is_fresh(_read_meta(store), csv_path):
+            raise
+    return store
+
+
+def ensure_store(csv_path="data.csv", cache_dir=CACHE_DIR):
+    """Return the store directory for csv_path, rebuilding it if the CSV changed."""
+    store = store_path(csv_path, cache_dir)
+    meta = _read_meta(store)
+    if not is_fresh(meta, csv_path):
+        with _build_lock:
+            # a thread that waited here finds the build the first one made
+            if not is_fresh(_read_meta(store), csv_path):
+                return build_store(csv_path, cache_dir)
+        return store
+    if os.stat(csv_path).st_mtime_ns != meta["mtime_ns"]:
+        meta["mtime_ns"] = os.stat(csv_path).st_mtime_ns
+        _write_meta(store, meta)
+    return store
+
+
+# ------------------Load------------------
+@profiling.timed("data.load")
+def load_arrays(csv_path="data.csv", cache_dir=CACHE_DIR, mmap_mode="r"):
+    """
+    Return {column: array} for every column of data.csv plus "epoch"
+    (int64 seconds since 1970-01-01), memory-mapped read-only by default.
+    """
+    store = ensure_store(csv_path, cache_dir)
+    meta = _read_meta(store)
+    rows = meta["rows"]
+    arrays = {}
+    for column in meta["columns"]:
+        path = os.path.join(store, column["file"])
+        dtype = np.dtype(column["dtype"])
+        if mmap_mode is None or rows == 0:
+            arrays[column["name"]] = np.fromfile(path, dtype=dtype, count=rows)
+        else:
+            arrays[column["name"]] = np.memmap(path, dtype=dtype, mode=mmap_mode, shape=(rows,))
+    return arrays
+
+
+def frame_from_arrays(arrays, start=None, stop=None):
+    """
+    DataFrame for rows [start:stop] of a load_arrays result. Only the slice is
+    copied out of the memory map, so workers sharing one store stay light.
+    """
+    rows = slice(start, stop)
+    index = pd.DatetimeIndex(np.asarray(arrays[EPOCH_COLUMN][rows]).astype("datetime64[s]"), name="datetime")
+    columns = {name: np.array(values[rows]) for name, values in arrays.items() if name != EPOCH_COLUMN}
+    return pd.DataFrame(columns, index=index)
+
+
+def load_frame(csv_path="data.csv", cache_dir=CACHE_DIR):
+    """Return data.csv as a DataFrame indexed by its parsed hourly datetime."""
+    return frame_from_arrays(load_arrays(csv_path, cache_dir))
+
+
+def data_version(csv_path="data.csv", cache_dir=CACHE_DIR):
+    """
+    Version of the data behind the store: the CSV's content hash when the
+    store was built, then chained over each batch of appended bytes. It is
+    kept apart from meta["blocks"], the file fingerprint is_fresh compares,
+    so a touch or copy of the CSV leaves it (and everything keyed on it) alone.
+    """
+    store = ensure_store(csv_path, cache_dir)
+    return _read_meta(store)["data_version"]
+
+
+# ------------------Append------------------
+def _csv_lines(epoch, named_values):
+    out = pd.DataFrame(named_values)
+    out.insert(0, "datetime", pd.DatetimeIndex(epoch.astype("datetime64[s]")).strftime(DATETIME_FORMAT))
+    return out.to_csv(header=False, index=False, lineterminator="\n")
+
+
+def append_rows(frame, csv_path="data.csv", cache_dir=CACHE_DIR):
+    """
+    Append new hourly rows (a DataFrame indexed by datetime, strictly after
+    the last stored hour) to data.csv and to the columnar store. Existing
+    bytes are never rewritten: CSV lines and column values are appended, and
+    meta.json is updated so the store stays fresh for the grown CSV.
+    """
+    if frame.empty:
+        return 0
+    store = ensure_store(csv_path, cache_dir)
+    meta = _read_meta(store)
+    columns = meta["columns"]
+
+    epoch = frame.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    if meta["rows"]:
+        last_epoch = np.fromfile(os.path.join(store, f"{EPOCH_COLUMN}.bin"), dtype=np.int64,
+                                 offset=(meta["rows"] - 1) * 8)[0]
+        if epoch[0] <= last_epoch:
+            raise ValueError("append_rows only accepts hours after the last stored hour")
+    if np.any(np.diff(epoch) <= 0):
+        raise ValueError("appended rows must be sorted and unique")
+
+    # convert and check every column before anything is written
+    typed = {}
+    for column in columns:
+        name = column["name"]
+        dtype = np.dtype(column["dtype"])
+        if name == EPOCH_COLUMN:
+            values = epoch
+        elif name in frame.columns:
+            values = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            values = np.full(len(frame), np.nan)
+        if dtype.kind == "i" and np.isnan(values.astype(np.float64)).any():
+            raise ValueError(f"{name} is an integer column and cannot hold missing values")
+        typed[name] = values.astype(dtype)
+
+    needs_newline = False
+    with open(csv_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    named_values = {name: values for name, values in typed.items() if name != EPOCH_COLUMN}
+    payload = (("\n" if needs_newline else "") + _csv_lines(epoch, named_values)).encode("utf-8")
+    with open(csv_path, "ab") as f:
+        f.write(payload)
+
+    for column in columns:
+        with open(os.path.join(store, column["file"]), "ab") as f:
+            typed[column["name"]].tofile(f)
+
+    stat = os.stat(csv_path)
+    # only the block the old end fell in and the new ones are hashed again
+    first_block = meta["size"] // FINGERPRINT_BLOCK_BYTES
+    meta["blocks"] = meta["blocks"][:first_block] + block_hashes(csv_path, first_block)
+    meta["rows"] += len(frame)
+    meta["size"] = stat.st_size
+    meta["mtime_ns"] = stat.st_mtime_ns
+    # chained rather than rehashed, so versions of appended data stay cheap and distinct
+    meta["data_version"] = hashlib.sha1(meta["data_version"].encode("ascii") + payload).hexdigest()
+    _write_meta(store, meta)
+    return len(frame)
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import profiling
+
+# ------------------Downsampling configuration------------------
+# Long hourly series are decimated on the server before they are charted, so
+# the browser receives about DEFAULT_POINTS points per viewport whatever the
+# length of the series. "minmax" keeps each bucket's extremes (peaks never
+# disappear); "lttb" (Largest-Triangle-Three-Buckets) keeps the points that
+# best preserve the visual shape of the line.
+METHODS = ["lttb", "minmax"]
+DEFAULT_POINTS = 2000
+
+
+def _valid(x, y):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(y)
+    return x[keep], y[keep]
+
+
+# ------------------Decimators (return indices into x/y)------------------
+def minmax_indices(y, points):
+    """Indices of the minimum and maximum of each of points // 2 equal-width buckets, in order."""
+    n = len(y)
+    buckets = max(1, points // 2)
+    if n <= points:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded_low = np.full(buckets * size, np.inf)
+    padded_high = np.full(buckets * size, -np.inf)
+    padded_low[:n] = y
+    padded_high[:n] = y
+    offsets = np.arange(buckets) * size
+    low = offsets + padded_low.reshape(buckets, size).argmin(axis=1)
+    high = offsets + padded_high.reshape(buckets, size).argmax(axis=1)
+    indices = np.unique(np.concatenate([low, high]))
+    return indices[indices < n]
+
+
+def lttb_indices(x, y, points):
+    """Largest-Triangle-Three-Buckets: first and last point plus one point per bucket."""
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    indices = np.empty(points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # the next bucket's centroid is the third vertex of each candidate triangle
+        next_lo, next_hi = edges[b + 1], (edges[b + 2] if b + 2 < len(edges) else n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs((x[selected] - avg_x) * (y[lo:hi] - y[selected])
+                       - (x[selected] - x[lo:hi]) * (avg_y - y[selected]))
+        selected = lo + int(areas.argmax())
+        indices[b + 1] = selected
+    return indices
+
+
+def decimate(x, y, points=DEFAULT_POINTS, method="lttb"):
+    """Return (x, y) reduced to about `points` points; NaN readings are dropped first."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    x, y = _valid(x, y)
+    if method == "minmax":
+        indices = minmax_indices(y, points)
+    else:
+        x_numeric = x.astype("datetime64[s]").astype(np.int64) if x.dtype.kind == "M" else x
+        indices = lttb_indices(x_numeric, y, points)
+    return x[indices], y[indices]
+
+
+# ------------------Viewport queries------------------
+def viewport(epoch, start=None, end=None):
+    """Row slice of a sorted epoch array (seconds) covering [start, end]."""
+    lo = 0 if start is None else int(np.searchsorted(epoch, pd.Timestamp(start).value // 10 ** 9, side="left"))
+    hi = len(epoch) if end is None else int(np.searchsorted(epoch, pd.Timestamp(end).value // 10 ** 9, side="right"))
+    return slice(lo, hi)
+
+
+def _long_frame(parts):
+    frames = [pd.DataFrame({"datetime": x, "series": name, "value": y}) for name, (x, y) in parts.items()]
+    if not frames:
+        return pd.DataFrame({"datetime": pd.Series(dtype="datetime64[ns]"), "series": [], "value": []})
+    return pd.concat(frames, ignore_index=True)
+
+
+@profiling.timed("render.decimate")
+def history_series(columns, start=None, end=None, points=DEFAULT_POINTS, method="lttb",
+                   csv_path="data.csv"):
+    """
+    Decimated history for the viewport [start, end] as a long DataFrame
+    (datetime, series, value). Only the viewport's rows are read from the
+    memory-mapped store.
+    """
+    arrays = data_store.load_arrays(csv_path)
+    epoch = arrays[data_store.EPOCH_COLUMN]
+    rows = viewport(epoch, start, end)
+    x = np.asarray(epoch[rows]).astype("datetime64[s]")
+    parts = {col: decimate(x, arrays[col][rows], points, method) for col in columns}
+    return _long_frame(parts)
+
+
+@profiling.timed("render.decimate")
+def frame_series(frame, start=None, end=None, points=DEFAULT_POINTS, method="lttb"):
+    """Same as history_series for an in-memory datetime-indexed frame, e.g. a forecast."""
+    epoch = frame.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    rows = viewport(epoch, start, end)
+    x = frame.index.to_numpy()[rows]
+    parts = {col: decimate(x, frame[col].to_numpy()[rows], points, method) for col in frame.columns}
+    return _long_frame(parts)
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import forecasting
+import model_registry
+
+# ------------------Evaluation configuration------------------
+REGRESSION_METRICS = ["MSE", "RMSE", "MAE", "MAPE", "R2"]
+CLASSIFICATION_METRICS = ["Accuracy", "Precision", "Recall", "F1-score"]
+
+# hold out the final year of data.csv when scoring models
+HOLDOUT_HOURS = 365 * 24
+
+
+def _valid_pairs(actual, predicted):
+    actual = np.asarray(actual, dtype=np.float64).ravel()
+    predicted = np.asarray(predicted, dtype=np.float64).ravel()
+    if actual.shape != predicted.shape:
+        raise ValueError(f"actual and predicted differ in length: {actual.shape} vs {predicted.shape}")
+    mask = np.isfinite(actual) & np.isfinite(predicted)
+    return actual[mask], predicted[mask]
+
+
+# ------------------Streaming metrics------------------
+class OnlineMetrics:
+    """
+    Regression and classification metrics kept as running sums, so new
+    forecast/actual batches update them in O(batch) without revisiting
+    history. Classification treats values above `threshold` as the positive
+    ("high") class, matching the high/low hour split used in the notebook.
+    The threshold must be fixed up front (e.g. median_threshold of the full
+    series); without one only the regression metrics are kept.
+    """
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+        self.count = 0
+        self.sum_abs_error = 0.0
+        self.sum_sq_error = 0.0
+        self.sum_abs_pct_error = 0.0
+        self.pct_count = 0
+        self.sum_actual = 0.0
+        self.sum_sq_actual = 0.0
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+
+    def update(self, actual, predicted):
+        actual, predicted = _valid_pairs(actual, predicted)
+        if actual.size == 0:
+            return self
+        error = predicted - actual
+        nonzero = actual != 0
+        self.count += actual.size
+        self.sum_abs_error += np.abs(error).sum()
+        self.sum_sq_error += np.dot(error, error)
+        self.sum_abs_pct_error += np.abs(error[nonzero] / actual[nonzero]).sum()
+        self.pct_count += int(nonzero.sum())
+        self.sum_actual += actual.sum()
+        self.sum_sq_actual += np.dot(actual, actual)
+
+        if self.threshold is not None:
+            # confusion[actual, predicted] via one bincount over the 4 combinations
+            codes = 2 * (actual > self.threshold) + (predicted > self.threshold)
+            self.confusion += np.bincount(codes, minlength=4).reshape(2, 2)
+        return self
+
+    def merge(self, other):
+        """Combine with metrics accumulated elsewhere (e.g. another fold or process)."""
+        if self.threshold != other.threshold:
+            raise ValueError(f"Cannot merge metrics with thresholds {self.threshold} and {other.threshold}")
+        self.count += other.count
+        self.sum_abs_error += other.sum_abs_error
+        self.sum_sq_error += other.sum_sq_error
+        self.sum_abs_pct_error += other.sum_abs_pct_error
+        self.pct_count += other.pct_count
+        self.sum_actual += other.sum_actual
+        self.sum_sq_actual += other.sum_sq_actual
+        self.confusion += other.confusion
+        return self
+
+    def regression(self):
+        if self.count == 0:
+            return {name: np.nan for name in REGRESSION_METRICS}
+        mse = self.sum_sq_error / self.count
+        ss_tot = self.sum_sq_actual - self.sum_actual ** 2 / self.count
+        return {
+            "MSE": mse,
+            "RMSE": np.sqrt(mse),
+            "MAE": self.sum_abs_error / self.count,
+            "MAPE": 100.0 * self.sum_abs_pct_error / self.pct_count if self.pct_count else np.nan,
+            "R2": 1.0 - self.sum_sq_error / ss_tot if ss_tot > 0 else np.nan,
+        }
+
+    def classification(self):
+        if self.threshold is None:
+            raise ValueError("Classification metrics need a threshold")
+        (tn, fp), (fn, tp) = self.confusion
+        total = self.confusion.sum()
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            "Accuracy": (tp + tn) / total if total else np.nan,
+            "Precision": precision,
+            "Recall": recall,
+            "F1-score": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        }
+
+    def result(self):
+        return {**self.regression(), **(self.classification() if self.threshold is not None else {})}
+
+
+# ------------------Batch helpers------------------
+def median_threshold(actual):
+    """High/low split at the median of the finite actual values."""
+    actual = np.asarray(actual, dtype=np.float64)
+    return float(np.median(actual[np.isfinite(actual)]))
+
+
+def regression_metrics(actual, predicted):
+    return OnlineMetrics().update(actual, predicted).regression()
+
+
+def classification_metrics(actual, predicted, threshold=None):
+    """Classification metrics and confusion matrix; threshold defaults to the median of all of actual."""
+    threshold = median_threshold(actual) if threshold is None else threshold
+    metrics = OnlineMetrics(threshold).update(actual, predicted)
+    return metrics.classification(), metrics.confusion.copy()
+
+
+# ------------------Model holdout evaluation------------------
+def holdout_predictions(model_name, column, df, holdout_hours=HOLDOUT_HOURS):
+    """
+    Train on everything before the final holdout_hours and forecast them the
+    same way the Prediction page does. Returns (actual, predicted) arrays.
+    """
+    train, test = df.iloc[:-holdout_hours], df.iloc[-holdout_hours:]
+    params = forecasting.model_params(model_name, column)
+    fitted = forecasting.train_model(model_name, train, column, params)
+    predicted = forecasting.predict(model_name, fitted, train, test.index)
+    return test[column].to_numpy(dtype=np.float64), predicted
+
+
+def evaluate_models(models=None, data_path="data.csv", holdout_hours=HOLDOUT_HOURS, df=None):
+    """
+    Score every model on the demand and price holdouts. Returns a DataFrame
+    with one row per (model, target column) and the REGRESSION_METRICS,
+    CLASSIFICATION_METRICS and confusion-matrix counts as columns.
+    """
+    models = models or forecasting.MODELS
+    if df is None:
+        df = data_store.load_frame(data_path)
+    version = data_store.data_version(data_path)
+
+    rows = []
+    for column in data_store.TARGET_COLUMNS:
+        for model_name in models:
+            actual, predicted = holdout_predictions(model_name, column, df, holdout_hours)
+            metrics = OnlineMetrics(median_threshold(actual)).update(actual, predicted)
+            (tn, fp), (fn, tp) = metrics.confusion
+            rows.append({"Model": model_name, "Target": column, **metrics.result(),
+                         "TN": tn, "FP": fp, "FN": fn, "TP": tp})
+            # record the configuration's holdout score on the registered full-data model, if any
+            holdout = {name: float(value) for name, value in metrics.result().items()}
+            params = forecasting.model_params(model_name, column)
+            model_registry.update_metrics(model_name, column, version, params,
+                                          {"holdout": {**holdout, "hours": holdout_hours}})
+    return pd.DataFrame(rows)
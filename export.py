@@ -0,0 +1,242 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import chunked
+import data_store
+import forecasting
+import model_registry
+import profiling
+
+# ------------------Export configuration------------------
+# Each run writes one partition per (model, target) under
+#   <output>/run=<run id>/model=<model>/target=<column>/part-00000.<format>
+# (Hive-style, so Spark, DuckDB and pyarrow datasets read the directory as a
+# table) and finishes with <output>/run=<run id>/_manifest.json. Forecasts are
+# generated and written CHUNK_HOURS at a time, one Parquet row group per
+# chunk, so memory does not grow with the horizon. The manifest is written
+# last: a run directory without one is incomplete.
+FORMATS = ["parquet", "csv"]
+EXPORT_DIR = "exports"
+CHUNK_HOURS = 365 * 24
+# the leading underscore makes dataset readers skip it
+MANIFEST_FILE = "_manifest.json"
+
+
+def run_id():
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+
+
+def partition_path(output_dir, run, model_name, column, fmt):
+    return os.path.join(output_dir, f"run={run}", f"model={model_name}", f"target={column}", f"part-00000.{fmt}")
+
+
+# ------------------Writers------------------
+class _ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow); or use --format csv") from e
+        self._pa = pa
+        self._schema = pa.schema([("datetime", pa.timestamp("s")), ("forecast", pa.float64())])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, index, values):
+        table = self._pa.table({"datetime": index.to_numpy(dtype="datetime64[s]"), "forecast": values},
+                               schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._header = True
+
+    def write(self, index, values):
+        # ISO 8601 timestamps for downstream tools rather than data.csv's day-first format
+        out = pd.DataFrame({"datetime": index.strftime("%Y-%m-%dT%H:%M:%S"), "forecast": values})
+        out.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+
+
+SINKS = {"parquet": _ParquetSink, "csv": _CsvSink}
+
+
+# ------------------Partitions------------------
+def _forecast_blocks(model_name, fitted, df, horizon, chunk_hours):
+    if model_name != "ARIMA":
+        summary = forecasting.ExogenousSummary().update(df)
+        yield from chunked.iter_forecast(model_name, fitted, summary, df.index[-1], horizon, chunk_hours)
+        return
+    # ARIMA forecasts recursively in one call; the result (8 bytes per hour) is still written in chunks
+    index = forecasting.future_index(df.index[-1], horizon)
+    values = forecasting.predict(model_name, fitted, df, index)
+    for lo in range(0, horizon, chunk_hours):
+        yield index[lo:lo + chunk_hours], values[lo:lo + chunk_hours]
+
+
+def export_partition(csv_path, model_name, column, horizon, chunk_hours, fmt, path):
+    """
+    Train (or load from the registry) one model and stream its forecast for
+    column to path. Runs in a worker process; returns the partition's
+    manifest entry.
+    """
+    started = time.time()
+    with profiling.stage("export.partition", model=model_name, column=column):
+        df = data_store.load_frame(csv_path)
+        version = data_store.data_version(csv_path)
+        params = forecasting.model_params(model_name, column)
+        fitted = forecasting.get_model(model_name, df, column, csv_path)
+        meta = model_registry.find(model_name, column, version, params) or {}
+        trained = time.time()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        sink = SINKS[fmt](tmp_path)
+        rows, first, last = 0, None, None
+        try:
+            for index, values in _forecast_blocks(model_name, fitted, df, horizon, chunk_hours):
+                sink.write(index, values)
+                rows += len(index)
+                first = index[0] if first is None else first
+                last = index[-1]
+        finally:
+            sink.close()
+        os.replace(tmp_path, path)
+
+    return {
+        "model": model_name,
+        "target": column,
+        "path": path,
+        "format": fmt,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "sha1": data_store.file_hash(path),
+        "start": str(first),
+        "end": str(last),
+        "model_version": meta.get("version"),
+        "model_key": meta.get("key"),
+        "library": meta.get("library"),
+        "params": params,
+        "seconds": {"model": trained - started, "forecast_write": time.time() - trained,
+                    "total": time.time() - started},
+    }
+
+
+# ------------------Export run------------------
+def export(models=None, targets=None, csv_path="data.csv", horizon=forecasting.HORIZON_HOURS, fmt="parquet",
+           output_dir=EXPORT_DIR, chunk_hours=CHUNK_HOURS, max_workers=None, run=None, progress=None):
+    """
+    Export every (model, target) forecast as its own partition, in parallel
+    worker processes, and write the run manifest. Returns the manifest; a
+    failed partition is listed under "failed" instead of stopping the run.
+    `progress`, if given, is called with a message as partitions finish.
+    """
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    models = models or forecasting.MODELS
+    targets = targets or data_store.TARGET_COLUMNS
+    run = run or run_id()
+    started = time.time()
+
+    # build the store once here so every worker just memory-maps it
+    data_store.ensure_store(csv_path)
+    epoch = data_store.load_arrays(csv_path)[data_store.EPOCH_COLUMN]
+    # data_version keys the models and caches; sha1 is the file's own hash, for checking a copy of it
+    data = {"path": os.path.abspath(csv_path), "data_version": data_store.data_version(csv_path),
+            "sha1": data_store.file_hash(csv_path), "rows": int(len(epoch)),
+            "last_timestamp": str(pd.Timestamp(int(epoch[-1]), unit="s")) if len(epoch) else None}
+    jobs = [(model, column) for model in models for column in targets]
+
+    partitions, failed = [], []
+    max_workers = max_workers or max(1, min(os.cpu_count() or 1, len(jobs)))
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=forecasting.limit_fit_threads,
+                             initargs=(forecasting.worker_threads(max_workers),)) as pool:
+        futures = {pool.submit(export_partition, csv_path, model, column, horizon, chunk_hours, fmt,
+                               partition_path(output_dir, run, model, column, fmt)): (model, column)
+                   for model, column in jobs}
+        for future in as_completed(futures):
+            model, column = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failed.append({"model": model, "target": column, "error": f"{type(e).__name__}: {e}"})
+                message = f"{model}/{column} failed: {failed[-1]['error']}"
+            else:
+                entry["path"] = os.path.relpath(entry["path"], os.path.join(output_dir, f"run={run}"))
+                partitions.append(entry)
+                message = f"{model}/{column}: {entry['rows']:,} rows in {entry['seconds']['total']:.1f}s"
+            if progress is not None:
+                progress(f"[{len(partitions) + len(failed)}/{len(jobs)}] {message}")
+
+    manifest = {
+        "run": run,
+        "created": time.time(),
+        "data": data,
+        "horizon_hours": horizon,
+        "chunk_hours": chunk_hours,
+        "format": fmt,
+        "columns": {"datetime": "hourly timestamp, naive local time as in data.csv", "forecast": "float64"},
+        "partitions": sorted(partitions, key=lambda p: (p["model"], p["target"])),
+        "failed": failed,
+        "seconds": time.time() - started,
+    }
+    path = os.path.join(output_dir, f"run={run}", MANIFEST_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(f"{path}.tmp", path)
+    manifest["manifest_path"] = path
+    return manifest
+
+
+def read_partition(path, start=None, end=None):
+    """Read an exported partition back as a datetime-indexed Series (pyarrow needed for Parquet)."""
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path, parse_dates=["datetime"])
+    series = frame.set_index("datetime")["forecast"]
+    return series.loc[start:end]
+
+
+# ------------------Command line------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch export of model forecasts as columnar partitions.")
+    parser.add_argument("--data", default="data.csv", help="hourly dataset (default: data.csv)")
+    parser.add_argument("--models", nargs="+", choices=forecasting.MODELS, default=forecasting.MODELS)
+    parser.add_argument("--targets", nargs="+", choices=data_store.TARGET_COLUMNS,
+                        default=data_store.TARGET_COLUMNS)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--horizon", type=int, default=forecasting.HORIZON_HOURS, help="forecast hours")
+    parser.add_argument("--chunk-hours", type=int, default=CHUNK_HOURS, help="hours generated and written at a time")
+    parser.add_argument("--output", default=EXPORT_DIR, help="root directory of the export runs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--run", default=None, help="run id (default: UTC timestamp)")
+    args = parser.parse_args(argv)
+
+    manifest = export(args.models, args.targets, args.data, args.horizon, args.format, args.output,
+                      args.chunk_hours, args.workers, args.run,
+                      progress=lambda message: print(time.strftime("%H:%M:%S"), message, flush=True))
+    print(f"{len(manifest['partitions'])} partitions, {len(manifest['failed'])} failed, "
+          f"{manifest['seconds']:.1f}s; manifest written to {manifest['manifest_path']}")
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import profiling
+
+# ------------------Feature configuration------------------
+# Lags and rolling windows are positional over the hourly rows, so they assume
+# the contiguous hourly index data.csv is built with.
+LAG_COLUMNS = ["hourly_demand", "hourly_average_price", "Temp (deg C)"]
+LAGS = (1, 24, 168)
+ROLLING_COLUMNS = ["hourly_demand", "hourly_average_price"]
+ROLLING_WINDOWS = (24, 168)
+PASSTHROUGH_COLUMNS = ["population"] + data_store.WEATHER_COLUMNS
+CALENDAR_COLUMNS = [
+    "hour", "dayofweek", "month", "dayofyear", "is_weekend",
+    "hour_sin", "hour_cos", "doy_sin", "doy_cos",
+]
+
+# rows of raw history a new row needs to compute its lags and rolling stats
+MAX_LOOKBACK = max(max(LAGS), max(ROLLING_WINDOWS))
+
+SOURCE_COLUMNS = sorted(set(LAG_COLUMNS + ROLLING_COLUMNS + PASSTHROUGH_COLUMNS))
+
+
+def feature_columns():
+    columns = list(CALENDAR_COLUMNS)
+    columns += [f"{col}_lag{lag}" for col in LAG_COLUMNS for lag in LAGS]
+    for col in ROLLING_COLUMNS:
+        for window in ROLLING_WINDOWS:
+            columns += [f"{col}_mean{window}", f"{col}_std{window}"]
+    columns += PASSTHROUGH_COLUMNS
+    return columns
+
+
+# ------------------Vectorized kernels------------------
+def calendar_arrays(epoch):
+    """Calendar features straight from int64 epoch seconds, without building Timestamps."""
+    epoch = np.asarray(epoch, dtype=np.int64)
+    seconds = epoch.astype("datetime64[s]")
+    days = seconds.astype("datetime64[D]")
+    hour = (epoch // 3600) % 24
+    # 1970-01-01 was a Thursday; shift so Monday == 0 like pandas
+    dayofweek = (days.astype(np.int64) + 3) % 7
+    month = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    dayofyear = (days - days.astype("datetime64[Y]")).astype(np.int64) + 1
+    return {
+        "hour": hour,
+        "dayofweek": dayofweek,
+        "month": month,
+        "dayofyear": dayofyear,
+        "is_weekend": dayofweek >= 5,
+        "hour_sin": np.sin(2 * np.pi * hour / 24),
+        "hour_cos": np.cos(2 * np.pi * hour / 24),
+        "doy_sin": np.sin(2 * np.pi * dayofyear / 365.25),
+        "doy_cos": np.cos(2 * np.pi * dayofyear / 365.25),
+    }
+
+
+def _lagged(values, lag):
+    out = np.full(len(values), np.nan)
+    out[lag:] = values[:-lag]
+    return out
+
+
+def _window_sums(values, window, start, offset):
+    """
+    Sum of values[i - window:i] for rows i in [start, len(values)), in O(n).
+    Rows are cut into `window`-long segments aligned on the absolute row
+    number (offset is the absolute row of values[0]), so every window is a
+    suffix of one segment plus a prefix of the next (van Herk/Gil-Werman).
+    Both partial sums cover only the window's own values, so a row gets the
+    same bits whether its history came from a full build or a short tail.
+    """
+    lead = offset % window
+    segments = -(-(lead + len(values)) // window)
+    padded = np.zeros(segments * window)
+    padded[lead:lead + len(values)] = values
+    padded = padded.reshape(segments, window)
+    prefix = np.cumsum(padded, axis=1).ravel()[lead:lead + len(values)]
+    suffix = np.cumsum(padded[:, ::-1], axis=1)[:, ::-1].ravel()[lead:lead + len(values)]
+
+    rows = np.arange(start, len(values))
+    first = np.maximum(rows - window, 0)
+    last = rows - 1
+    sums = np.zeros(len(rows))
+    has = rows > 0
+    # a window spanning one segment is exactly that segment (or the head of the data)
+    same = has & ((first + lead) // window == (last + lead) // window)
+    split = has & ~same
+    sums[same] = prefix[last[same]]
+    sums[split] = suffix[first[split]] + prefix[last[split]]
+    return sums
+
+
+def _rolling_stats(values, window, start, offset=0):
+    """
+    Mean and sample std of the previous `window` values (excluding the
+    current one, NaNs skipped) for rows[start:]. offset is the absolute row
+    number of values[0]; results depend only on each row's own window, so
+    appended and chunked rows match a full build exactly.
+    """
+    valid = np.isfinite(values)
+    filled = np.where(valid, values, 0.0)
+    count = _window_sums(valid.astype(np.float64), window, start, offset)
+    total = _window_sums(filled, window, start, offset)
+    squares = _window_sums(filled * filled, window, start, offset)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        variance = np.maximum(squares - total * mean, 0.0) / (count - 1)
+    return np.where(count > 0, mean, np.nan), np.where(count > 1, np.sqrt(variance), np.nan)
+
+
+def _compute(raw, epoch, start, out, offset=0):
+    """
+    Fill out (rows x features, float32) with the features of rows[start:] of
+    raw. Rows before start only serve as lookback for lags and windows; the
+    full build passes start=0 and append passes the retained tail. offset is
+    the absolute row number of raw's first row.
+    """
+    columns = feature_columns()
+    position = {name: i for i, name in enumerate(columns)}
+
+    for name, values in calendar_arrays(epoch[start:]).items():
+        out[:, position[name]] = values
+
+    for col in LAG_COLUMNS:
+        values = raw[col]
+        for lag in LAGS:
+            out[:, position[f"{col}_lag{lag}"]] = _lagged(values, lag)[start:]
+
+    for col in ROLLING_COLUMNS:
+        for window in ROLLING_WINDOWS:
+            mean, std = _rolling_stats(np.asarray(raw[col], dtype=np.float64), window, start, offset)
+            out[:, position[f"{col}_mean{window}"]] = mean
+            out[:, position[f"{col}_std{window}"]] = std
+
+    for col in PASSTHROUGH_COLUMNS:
+        out[:, position[col]] = raw[col][start:]
+
+
+# ------------------Feature matrix------------------
+class FeatureMatrix:
+    """
+    Contiguous float32 feature matrix with its column names and epoch index.
+    Keeps the last MAX_LOOKBACK raw rows so append() only computes new rows.
+    """
+
+    def __init__(self, matrix, epoch, history):
+        self.columns = feature_columns()
+        self._matrix = matrix
+        self._epoch = epoch
+        self._rows = len(epoch)
+        self._history = history
+
+    @property
+    def matrix(self):
+        return self._matrix[:self._rows]
+
+    @property
+    def epoch(self):
+        return self._epoch[:self._rows]
+
+    def __len__(self):
+        return self._rows
+
+    def frame(self):
+        index = pd.DatetimeIndex(self.epoch.astype("datetime64[s]"), name="datetime")
+        return pd.DataFrame(self.matrix, index=index, columns=self.columns)
+
+    def _reserve(self, rows):
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2)
+        matrix = np.empty((capacity, len(self.columns)), dtype=np.float32)
+        matrix[:self._rows] = self.matrix
+        epoch = np.empty(capacity, dtype=np.int64)
+        epoch[:self._rows] = self.epoch
+        self._matrix, self._epoch = matrix, epoch
+
+    def append(self, new_rows):
+        """
+        Append new hourly observations (a dict of column -> array including
+        "epoch") and compute features for those rows only.
+        """
+        new_epoch = np.atleast_1d(np.asarray(new_rows[data_store.EPOCH_COLUMN], dtype=np.int64))
+        count = len(new_epoch)
+        if count == 0:
+            return self
+
+        tail_len = len(self._history[data_store.EPOCH_COLUMN])
+        raw = {data_store.EPOCH_COLUMN: np.concatenate([self._history[data_store.EPOCH_COLUMN], new_epoch])}
+        for col in SOURCE_COLUMNS:
+            new_values = new_rows[col] if col in new_rows else np.full(count, np.nan)
+            new_values = np.atleast_1d(np.asarray(new_values, dtype=np.float64))
+            raw[col] = np.concatenate([self._history[col], new_values])
+
+        self._reserve(self._rows + count)
+        _compute(raw, raw[data_store.EPOCH_COLUMN], tail_len,
+                 self._matrix[self._rows:self._rows + count], self._rows - tail_len)
+        self._epoch[self._rows:self._rows + count] = new_epoch
+        self._rows += count
+        self._history = {col: values[-MAX_LOOKBACK:] for col, values in raw.items()}
+        return self
+
+
+@profiling.timed("features.build")
+def build_features(arrays):
+    """
+    Build the full feature matrix in one vectorized pass over a dict of
+    column arrays (as returned by data_store.load_arrays).
+    """
+    epoch = np.asarray(arrays[data_store.EPOCH_COLUMN], dtype=np.int64)
+    raw = {}
+    for col in SOURCE_COLUMNS:
+        raw[col] = np.asarray(arrays[col], dtype=np.float64) if col in arrays else np.full(len(epoch), np.nan)
+
+    matrix = np.empty((len(epoch), len(feature_columns())), dtype=np.float32)
+    _compute(raw, epoch, 0, matrix)
+
+    history = {col: values[-MAX_LOOKBACK:].copy() for col, values in raw.items()}
+    history[data_store.EPOCH_COLUMN] = epoch[-MAX_LOOKBACK:].copy()
+    return FeatureMatrix(matrix, epoch.copy(), history)
+
+
+def build_features_from_csv(csv_path="data.csv"):
+    return build_features(data_store.load_arrays(csv_path))
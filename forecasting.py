@@ -0,0 +1,310 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import model_registry
+import profiling
+import result_cache
+
+# ------------------Forecast configuration------------------
+MODELS = ["ARIMA", "LightGBM", "XGboost", "RandomForest"]
+
+TARGETS = {
+    "Electricity Demand": ["hourly_demand"],
+    "Electricity Price": ["hourly_average_price"],
+    "Electricity Demand & Electricity Price": ["hourly_demand", "hourly_average_price"],
+}
+
+# 5 years of hourly steps, the horizon both front ends advertise
+HORIZON_HOURS = 5 * 365 * 24
+
+WEATHER_COLUMNS = data_store.WEATHER_COLUMNS
+CALENDAR_COLUMNS = ["hour", "dayofweek", "month", "dayofyear", "year"]
+FEATURE_COLUMNS = CALENDAR_COLUMNS + ["population"] + WEATHER_COLUMNS
+
+# Hyperparameters per model; they are part of the forecast cache key, so any
+# change here invalidates previously stored forecasts.
+MODEL_PARAMS = {
+    # ARIMA is fitted on the most recent window only; a full 177k-row fit is minutes of work
+    "ARIMA": {"order": (2, 1, 2), "window_hours": 60 * 24},
+    "LightGBM": {"n_estimators": 300, "learning_rate": 0.05, "num_leaves": 63, "verbose": -1},
+    "XGboost": {"n_estimators": 300, "learning_rate": 0.05, "max_depth": 8, "tree_method": "hist"},
+    "RandomForest": {"n_estimators": 100, "max_depth": 14, "min_samples_leaf": 10,
+                     "max_samples": 0.25, "n_jobs": -1},
+}
+
+def model_params(model_name, column):
+    """
+    Hyperparameters the app trains model_name with for column: the best
+    complete trial from tuning.py's store if there is one, else MODEL_PARAMS.
+    """
+    import tuning
+    best = tuning.best_trial(model_name, column) if model_name in tuning.TUNABLE_MODELS else None
+    return best["params"] if best is not None else MODEL_PARAMS[model_name]
+
+
+# ------------------Data------------------
+def load_history(data_path="data.csv"):
+    """Read data.csv through the columnar store as an hourly datetime-indexed frame."""
+    return data_store.load_frame(data_path)
+
+
+def future_index(last_timestamp, horizon=HORIZON_HOURS):
+    return pd.date_range(last_timestamp + pd.Timedelta(hours=1), periods=horizon, freq="h")
+
+
+# ------------------Feature construction------------------
+def calendar_features(index):
+    return pd.DataFrame({
+        "hour": index.hour,
+        "dayofweek": index.dayofweek,
+        "month": index.month,
+        "dayofyear": index.dayofyear,
+        "year": index.year,
+    }, index=index)
+
+
+def history_features(df):
+    features = calendar_features(df.index)
+    for col in ["population"] + WEATHER_COLUMNS:
+        features[col] = df[col].to_numpy() if col in df.columns else np.nan
+    return features[FEATURE_COLUMNS]
+
+
+class ExogenousSummary:
+    """
+    Running totals behind future_features: population per year and weather
+    per (day-of-year, hour) slot. Sums are float64 (weather is stored as
+    float32, so they are exact), which makes a summary built block by block
+    identical to one built from the whole frame.
+    """
+
+    SLOTS = 366 * 24
+
+    def __init__(self):
+        self.weather_sums = np.zeros((self.SLOTS, len(WEATHER_COLUMNS)))
+        self.weather_counts = np.zeros((self.SLOTS, len(WEATHER_COLUMNS)), dtype=np.int64)
+        self.population = {}
+
+    def update(self, df):
+        if df.empty:
+            return self
+        index = df.index
+        slot = (index.dayofyear.to_numpy() - 1) * 24 + index.hour.to_numpy()
+        for i, col in enumerate(WEATHER_COLUMNS):
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            self.weather_sums[:, i] += np.bincount(slot[valid], weights=values[valid], minlength=self.SLOTS)
+            self.weather_counts[:, i] += np.bincount(slot[valid], minlength=self.SLOTS)
+
+        if "population" in df.columns:
+            population = df["population"]
+            valid = population.notna().to_numpy()
+            years = index.year.to_numpy()[valid]
+            values = population.to_numpy()[valid]
+            for year in np.unique(years):
+                in_year = values[years == year]
+                total, count = self.population.get(int(year), (0, 0))
+                self.population[int(year)] = (total + in_year.sum(), count + len(in_year))
+        return self
+
+    def merge(self, other):
+        self.weather_sums += other.weather_sums
+        self.weather_counts += other.weather_counts
+        for year, (total, count) in other.population.items():
+            own_total, own_count = self.population.get(year, (0, 0))
+            self.population[year] = (own_total + total, own_count + count)
+        return self
+
+    def yearly_population(self):
+        years = sorted(self.population)
+        return pd.Series([self.population[y][0] / self.population[y][1] for y in years], index=years,
+                         dtype=float)
+
+    def climatology(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.weather_counts > 0, self.weather_sums / self.weather_counts, np.nan)
+
+
+def future_features(df, index, summary=None):
+    """
+    Exogenous inputs for the forecast horizon: weather is replaced by its
+    hourly climatology (mean per day-of-year and hour) and population is
+    extrapolated from the linear trend of the yearly values. A precomputed
+    ExogenousSummary of df can be passed instead of df.
+    """
+    if summary is None:
+        summary = ExogenousSummary().update(df)
+    features = calendar_features(index)
+
+    yearly = summary.yearly_population()
+    if len(yearly) > 1:
+        slope, intercept = np.polyfit(yearly.index.to_numpy(), yearly.to_numpy(), 1)
+        features["population"] = intercept + slope * index.year.to_numpy()
+    elif len(yearly):
+        features["population"] = float(yearly.iloc[0])
+    else:
+        features["population"] = np.nan
+
+    slot = (index.dayofyear.to_numpy() - 1) * 24 + index.hour.to_numpy()
+    climate = summary.climatology()[slot]
+    for i, col in enumerate(WEATHER_COLUMNS):
+        features[col] = climate[:, i]
+    return features[FEATURE_COLUMNS]
+
+
+# ------------------Worker threads------------------
+# The models thread internally (n_jobs, OpenMP, BLAS). Inside a process pool
+# that already runs one worker per core, each worker gets its share of the
+# cores instead, so N workers don't each start N threads. Thread counts are
+# not hyperparameters: they stay out of params and the cache keys.
+_fit_threads = None
+
+
+def worker_threads(max_workers):
+    """Threads each of max_workers pool workers may use."""
+    return max(1, (os.cpu_count() or 1) // max(1, max_workers))
+
+
+def limit_fit_threads(threads):
+    """Process pool initializer: cap this worker's model fits and native thread pools at `threads`."""
+    global _fit_threads
+    _fit_threads = threads
+    # OpenMP runtimes loaded later (LightGBM, XGBoost, scikit-learn) read this when they start
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
+
+
+# ------------------Model factories------------------
+def _make_regressor(model_name, params=None):
+    params = MODEL_PARAMS[model_name] if params is None else params
+    if _fit_threads is not None:
+        params = {**params, "n_jobs": _fit_threads}
+    if model_name == "LightGBM":
+        from lightgbm import LGBMRegressor
+        return LGBMRegressor(**params)
+    if model_name == "XGboost":
+        from xgboost import XGBRegressor
+        return XGBRegressor(**params)
+    if model_name == "RandomForest":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**params)
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def _train_regressor(model_name, df, column, params=None):
+    mask = df[column].notna().to_numpy()
+    X = history_features(df)[mask]
+    y = df[column].to_numpy()[mask]
+    regressor = _make_regressor(model_name, params)
+    regressor.fit(X, y)
+    return regressor
+
+
+def _train_arima(df, column):
+    from statsmodels.tsa.arima.model import ARIMA
+    params = MODEL_PARAMS["ARIMA"]
+    series = df[column].iloc[-params["window_hours"]:].interpolate(limit_direction="both")
+    return ARIMA(series.to_numpy(), order=params["order"]).fit()
+
+
+def train_model(model_name, df, column, params=None):
+    """Fit model_name on df[column]; params overrides MODEL_PARAMS (e.g. a quantile objective)."""
+    with profiling.stage(f"train.{model_name}", column=column):
+        if model_name == "ARIMA":
+            return _train_arima(df, column)
+        return _train_regressor(model_name, df, column, params)
+
+
+def get_model(model_name, df, column, data_path="data.csv", params=None):
+    """
+    Return a trained model for data_path's current contents: from this
+    process's cache, else from the model registry, else trained now and
+    registered so later processes and sessions can load it.
+    """
+    version = data_store.data_version(data_path)
+    params = model_params(model_name, column) if params is None else params
+    key = model_registry.artifact_key(model_name, column, version, params)
+    fitted = model_registry.cached(key)
+    if fitted is not None:
+        return fitted
+
+    meta = model_registry.find(model_name, column, version, params)
+    if meta is not None:
+        try:
+            return model_registry.load(meta)
+        except Exception as e:
+            # e.g. written by an incompatible library version; retrain and replace it
+            warnings.warn(f"Could not load {model_name} artifact {meta['path']}, retraining: {e}", RuntimeWarning)
+
+    fitted = train_model(model_name, df, column, params)
+    model_registry.register(model_name, column, fitted, version, params, FEATURE_COLUMNS)
+    model_registry.remember(key, fitted)
+    return fitted
+
+
+# ------------------Forecasting------------------
+def predict(model_name, fitted, df, index):
+    with profiling.stage(f"inference.{model_name}", hours=len(index)):
+        if model_name == "ARIMA":
+            return np.asarray(fitted.forecast(steps=len(index)), dtype=float)
+        return np.asarray(fitted.predict(future_features(df, index)), dtype=float)
+
+
+def forecast_key(model_name, target, horizon=HORIZON_HOURS, data_path="data.csv"):
+    """Result cache key: model, target, horizon, hyperparameters and data content hash."""
+    params = {column: model_params(model_name, column) for column in TARGETS[target]}
+    return result_cache.cache_key(model_name, target, horizon, params, data_store.data_version(data_path))
+
+
+def run_forecast(model_name, target, data_path="data.csv", horizon=HORIZON_HOURS, df=None,
+                 use_cache=True):
+    """
+    Train (or reuse) the selected model on data.csv and forecast the target
+    hourly over the horizon. Results are served from the on-disk forecast
+    cache when the data and model configuration are unchanged. A df passed
+    in must hold the contents of data_path.
+
+    Returns a dict with the forecast timestamps under "index" and one float
+    array per target column under "values".
+    """
+    if model_name not in MODELS:
+        raise ValueError(f"Unknown model: {model_name}")
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target: {target}")
+
+    key = forecast_key(model_name, target, horizon, data_path)
+    if use_cache:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if df is None:
+        df = load_history(data_path)
+    index = future_index(df.index[-1], horizon)
+
+    values = {}
+    for column in TARGETS[target]:
+        fitted = get_model(model_name, df, column, data_path)
+        values[column] = predict(model_name, fitted, df, index)
+
+    result = {
+        "model": model_name,
+        "target": target,
+        "index": index.to_numpy(),
+        "values": values,
+    }
+    if use_cache:
+        result_cache.put(key, result)
+    return result
+
+
+def forecast_frame(result):
+    """Wrap a run_forecast result as a DataFrame indexed by timestamp."""
+    return pd.DataFrame(result["values"], index=pd.DatetimeIndex(result["index"], name="datetime"))
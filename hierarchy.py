@@ -0,0 +1,283 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+import data_store
+import forecasting
+
+# ------------------Hierarchy configuration------------------
+# Zonal demand lives in its own CSV (zones.csv): the data.csv datetime column
+# plus one demand column per leaf zone. A hierarchy maps each aggregate node
+# to its children, e.g. {"Ontario": ["North", "South"], "North": [...], ...};
+# aggregate histories are the sums of their leaves. Every node gets a base
+# forecast from the same model and weather/calendar features as the
+# provincial forecast, and the base forecasts are reconciled so the zones add
+# up to the total:
+#   bottom_up  aggregates are the sums of the leaf forecasts
+#   top_down   the total is split by each leaf's share of historical demand
+#   mint       minimum-trace (MinT) least squares over every level
+IESO_ZONES = ["Bruce", "East", "Essa", "Niagara", "Northeast", "Northwest", "Ottawa", "Southwest",
+              "Toronto", "West"]
+IESO_HIERARCHY = {"Ontario": IESO_ZONES}
+METHODS = ["bottom_up", "top_down", "mint"]
+# MinT error covariance W: identity, leaf counts, residual variances, or a
+# shrunk full residual covariance (dense; the others stay sparse)
+MINT_WEIGHTS = ["ols", "structural", "variance", "shrink"]
+DEFAULT_HORIZON = 7 * 24
+# in-sample residuals per node used for the MinT weights (within ARIMA's 60-day window)
+RESIDUAL_HOURS = 30 * 24
+
+
+# ------------------Structure------------------
+def summing_matrix(hierarchy):
+    """
+    (nodes, leaves, S) for a {parent: [children]} hierarchy. nodes lists the
+    aggregates top-down followed by the leaves; S is the sparse
+    (nodes x leaves) 0/1 matrix with S @ leaf_values = every node's value.
+    """
+    children = {parent: list(kids) for parent, kids in hierarchy.items()}
+    child_names = {kid for kids in children.values() for kid in kids}
+    roots = [parent for parent in children if parent not in child_names]
+    if len(roots) != 1:
+        raise ValueError(f"A hierarchy needs exactly one root, found {roots}")
+
+    aggregates, leaves, leaf_sets = [], [], {}
+    order = [roots[0]]
+    while order:
+        node = order.pop(0)
+        if node in children:
+            aggregates.append(node)
+            order.extend(children[node])
+        else:
+            leaves.append(node)
+    if len(set(aggregates + leaves)) != len(aggregates) + len(leaves):
+        raise ValueError("A node appears more than once in the hierarchy")
+
+    position = {leaf: i for i, leaf in enumerate(leaves)}
+    for node in reversed(aggregates):
+        leaf_sets[node] = [j for kid in children[node]
+                           for j in (leaf_sets[kid] if kid in leaf_sets else [position[kid]])]
+    rows = np.concatenate([np.full(len(leaf_sets[node]), i) for i, node in enumerate(aggregates)]
+                          + [len(aggregates) + np.arange(len(leaves))])
+    cols = np.concatenate([leaf_sets[node] for node in aggregates] + [np.arange(len(leaves))])
+    S = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(aggregates) + len(leaves), len(leaves)))
+    return aggregates + leaves, leaves, S
+
+
+# ------------------Reconciliation------------------
+def bottom_up(base, S):
+    """Leaf base forecasts summed up the hierarchy."""
+    n_leaves = S.shape[1]
+    return np.asarray(S @ base[-n_leaves:])
+
+
+def top_down(base, S, proportions):
+    """The root base forecast split by leaf proportions (which sum to 1), then summed up."""
+    return np.asarray(S @ (np.asarray(proportions)[:, None] * base[0][None, :]))
+
+
+def historical_proportions(leaf_history):
+    """Each leaf's share of the total over the hours where every leaf was observed."""
+    leaf_history = np.asarray(leaf_history, dtype=np.float64)
+    complete = np.isfinite(leaf_history).all(axis=0)
+    if not complete.any():
+        raise ValueError("No hour has readings for every zone")
+    means = leaf_history[:, complete].mean(axis=1)
+    return means / means.sum()
+
+
+def shrink_covariance(residuals):
+    """Schafer-Strimmer shrinkage of the residual covariance towards its diagonal."""
+    residuals = np.asarray(residuals, dtype=np.float64)
+    residuals = residuals[:, np.isfinite(residuals).all(axis=0)]
+    n = residuals.shape[1]
+    if n < 3:
+        raise ValueError("Not enough complete residual hours for a shrunk covariance")
+    centered = residuals - residuals.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1)
+    std[std == 0] = 1.0
+    scaled = centered / std[:, None]
+    correlation = scaled @ scaled.T / n
+    # variance of each sample correlation: sum_t (s_it s_jt - r_ij)^2 expanded into matrix products
+    squared = scaled ** 2
+    variance = n / (n - 1) ** 3 * (squared @ squared.T - n * correlation ** 2)
+    off = ~np.eye(len(std), dtype=bool)
+    denominator = (correlation[off] ** 2).sum()
+    shrinkage = 1.0 if denominator == 0 else float(np.clip(variance[off].sum() / denominator, 0, 1))
+    shrunk = (1 - shrinkage) * correlation
+    np.fill_diagonal(shrunk, 1.0)
+    return shrunk * std[:, None] * std[None, :]
+
+
+def mint(base, S, weights="variance", residuals=None):
+    """
+    MinT: leaves = (S' W^-1 S)^-1 S' W^-1 base, then S @ leaves. With a
+    diagonal W the normal equations are sparse and factorized once (sparse
+    LU) for all forecast hours at once; "shrink" uses a dense W.
+    """
+    if weights not in MINT_WEIGHTS:
+        raise ValueError(f"Unknown MinT weights: {weights}")
+    if weights in ("variance", "shrink") and residuals is None:
+        raise ValueError(f"MinT weights '{weights}' need base-forecast residuals")
+
+    if weights == "shrink":
+        W = shrink_covariance(residuals)
+        X = np.linalg.solve(W, S.toarray())
+        leaves = np.linalg.solve(S.T @ X, X.T @ base)
+        return np.asarray(S @ leaves)
+
+    if weights == "ols":
+        diagonal = np.ones(S.shape[0])
+    elif weights == "structural":
+        diagonal = np.asarray(S.sum(axis=1)).ravel()
+    else:
+        diagonal = np.nanvar(residuals, axis=1)
+        # a node without usable residuals gets the median variance
+        fallback = np.nanmedian(diagonal) if np.isfinite(diagonal).any() else 1.0
+        diagonal = np.where(np.isfinite(diagonal) & (diagonal > 0), diagonal, fallback)
+    StWinv = (S.T @ sparse.diags(1.0 / diagonal)).tocsr()
+    lu = splu((StWinv @ S).tocsc())
+    if base.shape[1] > S.shape[0]:
+        # long horizons: solve for the (leaves x nodes) mapping once, then one matrix product
+        leaves = lu.solve(StWinv.toarray()) @ base
+    else:
+        leaves = lu.solve(np.asarray(StWinv @ base))
+    return np.asarray(S @ leaves)
+
+
+def reconcile(base, S, method, proportions=None, weights="variance", residuals=None):
+    """Coherent (nodes x hours) forecasts from base forecasts in summing_matrix node order."""
+    base = np.asarray(base, dtype=np.float64)
+    if method == "bottom_up":
+        return bottom_up(base, S)
+    if method == "top_down":
+        if proportions is None:
+            raise ValueError("Top-down reconciliation needs leaf proportions")
+        return top_down(base, S, proportions)
+    if method == "mint":
+        return mint(base, S, weights, residuals)
+    raise ValueError(f"Unknown reconciliation method: {method}")
+
+
+# ------------------Base forecasts (run in worker processes)------------------
+def _zone_frame(data_path, zones_path):
+    """data.csv features joined with the zone columns over the hours both cover."""
+    history = data_store.load_frame(data_path).drop(columns=data_store.TARGET_COLUMNS, errors="ignore")
+    zones = data_store.load_frame(zones_path)
+    return history.join(zones, how="inner")
+
+
+def forecast_node(model_name, node, leaf_columns, data_path, zones_path, horizon):
+    """
+    Base forecast of one node (the sum of leaf_columns) plus its last
+    RESIDUAL_HOURS in-sample residuals. Reads both stores memory-mapped.
+    """
+    frame = _zone_frame(data_path, zones_path)
+    frame[node] = frame[leaf_columns].to_numpy(dtype=np.float64).sum(axis=1)
+    fitted = forecasting.train_model(model_name, frame, node)
+    index = forecasting.future_index(frame.index[-1], horizon)
+    predicted = forecasting.predict(model_name, fitted, frame, index)
+
+    if model_name == "ARIMA":
+        residuals = np.asarray(fitted.resid, dtype=np.float64)[-RESIDUAL_HOURS:]
+    else:
+        tail = frame.iloc[-RESIDUAL_HOURS:]
+        residuals = tail[node].to_numpy() - np.asarray(fitted.predict(forecasting.history_features(tail)))
+    padded = np.full(RESIDUAL_HOURS, np.nan)
+    padded[RESIDUAL_HOURS - len(residuals):] = residuals
+    return node, predicted, padded
+
+
+def forecast_hierarchy(zones_path, hierarchy=None, model_name="LightGBM", data_path="data.csv",
+                       horizon=DEFAULT_HORIZON, methods=METHODS, weights="variance", max_workers=None,
+                       progress=None):
+    """
+    Base forecasts for every node of the hierarchy (in a process pool) and
+    their reconciliations. Returns a dict with "nodes", "leaves", "index",
+    "base" (nodes x hours) and "reconciled" ({method: nodes x hours}).
+    `progress`, if given, is called with (completed, total) as nodes finish.
+    """
+    zone_columns = [c for c in data_store.load_arrays(zones_path) if c != data_store.EPOCH_COLUMN]
+    hierarchy = hierarchy or {"Total": zone_columns}
+    nodes, leaves, S = summing_matrix(hierarchy)
+    missing = [leaf for leaf in leaves if leaf not in zone_columns]
+    if missing:
+        raise ValueError(f"Zones missing from {zones_path}: {missing}")
+
+    # build both stores once here so every worker just memory-maps them
+    data_store.ensure_store(data_path)
+    data_store.ensure_store(zones_path)
+    frame = _zone_frame(data_path, zones_path)
+    if frame.empty:
+        raise ValueError(f"{zones_path} shares no hours with {data_path}")
+    index = forecasting.future_index(frame.index[-1], horizon)
+    leaf_history = frame[leaves].to_numpy(dtype=np.float64).T
+
+    base = np.empty((len(nodes), horizon))
+    residuals = np.empty((len(nodes), RESIDUAL_HOURS))
+    position = {node: i for i, node in enumerate(nodes)}
+    max_workers = max_workers or max(1, min(os.cpu_count() or 1, len(nodes)))
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=forecasting.limit_fit_threads,
+                             initargs=(forecasting.worker_threads(max_workers),)) as pool:
+        futures = [pool.submit(forecast_node, model_name, node, [leaves[j] for j in S[i].indices],
+                               data_path, zones_path, horizon)
+                   for i, node in enumerate(nodes)]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            node, predicted, node_residuals = future.result()
+            base[position[node]] = predicted
+            residuals[position[node]] = node_residuals
+            if progress is not None:
+                progress(completed, len(futures))
+
+    proportions = historical_proportions(leaf_history) if "top_down" in methods else None
+    reconciled = {method: reconcile(base, S, method, proportions, weights, residuals) for method in methods}
+    return {"model": model_name, "hierarchy": hierarchy, "nodes": nodes, "leaves": leaves, "index": index.to_numpy(),
+            "base": base, "reconciled": reconciled, "weights": weights}
+
+
+def hierarchy_frame(result, method=None):
+    """Hourly frame with one column per node: the base forecasts, or one reconciliation."""
+    values = result["base"] if method is None else result["reconciled"][method]
+    return pd.DataFrame(values.T, index=pd.DatetimeIndex(result["index"], name="datetime"), columns=result["nodes"])
+
+
+def coherence_error(result, method=None):
+    """Largest |node - sum of its leaves| over all hours (0 for a coherent forecast)."""
+    values = result["base"] if method is None else result["reconciled"][method]
+    _, _, S = summing_matrix(result["hierarchy"])
+    return float(np.abs(values - S @ values[-len(result["leaves"]):]).max())
+
+
+# ------------------Command line------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconciled zonal demand forecasts.")
+    parser.add_argument("--zones", default="zones.csv", help="datetime plus one demand column per leaf zone")
+    parser.add_argument("--data", default="data.csv", help="weather/population features (default: data.csv)")
+    parser.add_argument("--model", choices=forecasting.MODELS, default="LightGBM")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="forecast hours")
+    parser.add_argument("--method", choices=METHODS, default="mint")
+    parser.add_argument("--weights", choices=MINT_WEIGHTS, default="variance")
+    parser.add_argument("--ieso", action="store_true", help="use the IESO zones under one Ontario total")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=os.path.join(".cache", "zones_forecast.csv"))
+    args = parser.parse_args(argv)
+
+    result = forecast_hierarchy(args.zones, IESO_HIERARCHY if args.ieso else None, args.model, args.data,
+                                args.horizon, [args.method], args.weights, args.workers,
+                                progress=lambda done, total: print(f"{done}/{total} base forecasts finished"))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    frame = hierarchy_frame(result, args.method)
+    frame.to_csv(args.output, date_format=data_store.DATETIME_FORMAT)
+    print(f"Wrote {len(frame.columns)} series x {len(frame)} hours to {args.output} "
+          f"(max incoherence {coherence_error(result, args.method):.3g})")
+
+
+if __name__ == "__main__":
+    main()
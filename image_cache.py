@@ -0,0 +1,123 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, features
+
+import profiling
+
+# ------------------Thumbnail cache configuration------------------
+# Downscaled figure bytes are kept in a process-wide LRU (shared by every
+# Streamlit session) backed by files under CACHE_DIR, so a rerun costs a dict
+# lookup instead of a full PNG decode per figure.
+CACHE_DIR = os.path.join(".cache", "thumbnails")
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "PNG"
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_listings = {}
+_lock = threading.Lock()
+
+
+def _cache_key(path, width, fmt):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, width, fmt)
+
+
+def _disk_path(key):
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.{key[3].lower()}")
+
+
+def _remember(key, data):
+    global _memory_bytes
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return
+        _memory[key] = data
+        _memory_bytes += len(data)
+        while _memory_bytes > MAX_MEMORY_BYTES and len(_memory) > 1:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+
+
+def _lookup(key):
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+        return data
+
+
+# ------------------Public API------------------
+@profiling.timed("render.thumbnail")
+def render_thumbnail(path, width, fmt=THUMBNAIL_FORMAT):
+    """Decode the image at path and return it downscaled to at most width pixels wide."""
+    with Image.open(path) as img:
+        img.draft("RGB", (width, width))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.thumbnail((width, width * 10), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == "WEBP":
+            img.save(buffer, format=fmt, quality=85, method=4)
+        else:
+            img.save(buffer, format=fmt, optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail_bytes(path, width, fmt=THUMBNAIL_FORMAT):
+    """
+    Return encoded thumbnail bytes for path, keyed by (path, mtime, width, format).
+    Looks in memory first, then on disk, and only decodes the source on a miss.
+    """
+    key = _cache_key(path, width, fmt)
+    data = _lookup(key)
+    if data is not None:
+        return data
+
+    disk_path = _disk_path(key)
+    try:
+        with open(disk_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = render_thumbnail(path, width, fmt)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, disk_path)
+
+    _remember(key, data)
+    return data
+
+
+def full_image_bytes(path):
+    """Raw bytes of the original file, for when a user asks for full resolution."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def list_images(folder, extension=".png"):
+    """Sorted image file names in folder, re-listed only when the folder changes."""
+    mtime = os.stat(folder).st_mtime_ns
+    with _lock:
+        cached = _listings.get(folder)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(extension))
+    with _lock:
+        _listings[folder] = (mtime, names)
+    return names
+
+
+def clear():
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _listings.clear()
+        _memory_bytes = 0
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import profiling
+
+# ------------------Imputation configuration------------------
+# Vectorized replacement for impute_missing_data in the preprocessing
+# notebook. Gaps are filled with np.interp over the epoch index, wind
+# direction is interpolated as a unit vector (sin/cos) so 350 -> 10 degrees
+# passes through north, and rows stream through in chunks with only the
+# unresolved trailing gap carried between chunks.
+LINEAR_COLUMNS = [
+    "Temp (deg C)", "Dew Point Temp (deg C)", "Wind Spd (km/h)",
+    "Rel Hum (%)", "Stn Press (kPa)", "Visibility (km)",
+]
+CIRCULAR_COLUMN = "Wind Dir (10s deg)"
+# readings of exactly zero mean "not recorded" for these columns
+ZERO_AS_MISSING = ["Rel Hum (%)", "Stn Press (kPa)", "Visibility (km)", CIRCULAR_COLUMN]
+CLIP_RANGES = {"Temp (deg C)": (-40, 40), "Wind Spd (km/h)": (1, 100)}
+WIND_CHILL_COLUMN = "Wind Chill"
+
+CHUNK_ROWS = 100_000
+# a trailing gap longer than this is forward-filled instead of waiting for the next reading
+MAX_PENDING_ROWS = 500_000
+DECIMALS = 2
+
+
+def _epoch_of(frame):
+    if data_store.EPOCH_COLUMN in frame.columns:
+        return frame[data_store.EPOCH_COLUMN].to_numpy(dtype=np.int64)
+    return frame.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def wind_chill(temp, wind_speed):
+    """Environment Canada wind chill index."""
+    speed = np.power(wind_speed, 0.16)
+    return 13.12 + 0.6215 * temp - 11.37 * speed + 0.3965 * temp * speed
+
+
+class _Anchor:
+    """Last valid (epoch, value) seen per column, used as the left interpolation anchor."""
+
+    def __init__(self):
+        self.epoch = {}
+        self.value = {}
+
+
+def _interp_column(epoch, values, anchor, key, emit):
+    """
+    Fill the gaps in values[:emit]. Readings after emit still serve as right
+    anchors, but the left anchor only advances to the last reading emitted.
+    """
+    valid = np.isfinite(values)
+    xp, fp = epoch[valid], values[valid]
+    if key in anchor.epoch:
+        xp = np.concatenate([[anchor.epoch[key]], xp])
+        fp = np.concatenate([[anchor.value[key]], fp])
+    filled = values[:emit].copy()
+    if len(xp) == 0:
+        return filled
+    emitted = np.flatnonzero(valid[:emit])
+    if len(emitted):
+        last = emitted[-1]
+        anchor.epoch[key], anchor.value[key] = epoch[last], values[last]
+    gaps = ~valid[:emit]
+    filled[gaps] = np.interp(epoch[:emit][gaps], xp, fp)
+    return filled
+
+
+def _impute_block(block, anchor, emit):
+    """Return the first emit rows of block with every gap filled, updating the left anchors."""
+    epoch = _epoch_of(block)
+    out = block.iloc[:emit].copy()
+
+    for column in LINEAR_COLUMNS:
+        if column in block.columns:
+            values = block[column].to_numpy(dtype=np.float64)
+            out[column] = _interp_column(epoch, values, anchor, column, emit)
+
+    if CIRCULAR_COLUMN in block.columns:
+        radians = np.deg2rad(block[CIRCULAR_COLUMN].to_numpy(dtype=np.float64) * 10.0)
+        sin = _interp_column(epoch, np.sin(radians), anchor, "wind_sin", emit)
+        cos = _interp_column(epoch, np.cos(radians), anchor, "wind_cos", emit)
+        degrees = np.rad2deg(np.arctan2(sin, cos)) % 360.0
+        out[CIRCULAR_COLUMN] = degrees / 10.0
+
+    for column, (low, high) in CLIP_RANGES.items():
+        if column in out.columns:
+            out[column] = out[column].clip(lower=low, upper=high)
+
+    if {WIND_CHILL_COLUMN, "Temp (deg C)", "Wind Spd (km/h)"} <= set(out.columns):
+        chill = out[WIND_CHILL_COLUMN].to_numpy(dtype=np.float64).copy()
+        temp = out["Temp (deg C)"].to_numpy(dtype=np.float64)
+        speed = out["Wind Spd (km/h)"].to_numpy(dtype=np.float64)
+        fill = np.isnan(chill) & (speed > 0)
+        chill[fill] = wind_chill(temp[fill], speed[fill])
+        out[WIND_CHILL_COLUMN] = chill
+
+    columns = [c for c in LINEAR_COLUMNS + [CIRCULAR_COLUMN, WIND_CHILL_COLUMN] if c in out.columns]
+    out[columns] = out[columns].round(DECIMALS)
+    return out
+
+
+def _resolved_rows(block):
+    """
+    Number of leading rows whose gaps are bracketed by valid readings in
+    this block; the rest wait for the next chunk's right-hand anchors.
+    """
+    columns = [c for c in LINEAR_COLUMNS + [CIRCULAR_COLUMN] if c in block.columns]
+    if not columns:
+        return len(block)
+    resolved = len(block)
+    for column in columns:
+        valid = np.flatnonzero(block[column].notna().to_numpy())
+        last_valid = valid[-1] if len(valid) else -1
+        resolved = min(resolved, last_valid + 1)
+    return resolved
+
+
+# ------------------Streaming imputer------------------
+class Imputer:
+    """
+    Chunked gap filler. Feed time-sorted chunks with process() and call
+    flush() at the end; each station (when station_column is set) keeps its
+    own anchors and pending tail, so memory stays bounded by the chunk size
+    plus the longest open gap.
+    """
+
+    def __init__(self, station_column=None):
+        self.station_column = station_column
+        self._anchors = {}
+        self._pending = {}
+
+    def _prepare(self, chunk):
+        chunk = chunk.copy()
+        for column in ZERO_AS_MISSING:
+            if column in chunk.columns:
+                chunk[column] = chunk[column].replace(0, np.nan)
+        return chunk
+
+    def _process_station(self, key, chunk, final=False):
+        pending = self._pending.pop(key, None)
+        block = chunk if pending is None else pd.concat([pending, chunk])
+        anchor = self._anchors.setdefault(key, _Anchor())
+
+        resolved = len(block) if final or len(block) > MAX_PENDING_ROWS else _resolved_rows(block)
+        if resolved < len(block):
+            self._pending[key] = block.iloc[resolved:]
+        if resolved == 0:
+            return block.iloc[:0]
+        return _impute_block(block, anchor, resolved)
+
+    def process(self, chunk):
+        """Impute one chunk; returns the rows whose gaps could be resolved so far."""
+        chunk = self._prepare(chunk)
+        if self.station_column is None:
+            return self._process_station(None, chunk)
+        parts = [self._process_station(key, group)
+                 for key, group in chunk.groupby(self.station_column, sort=False)]
+        return pd.concat(parts) if parts else chunk.iloc[:0]
+
+    def flush(self):
+        """Emit every pending row, filling open-ended gaps from the last reading."""
+        parts = [self._process_station(key, self._pending[key].iloc[:0], final=True)
+                 for key in list(self._pending)]
+        return pd.concat(parts) if parts else None
+
+
+def iter_impute(chunks, station_column=None):
+    """Generator over imputed chunks for an iterable of time-sorted input chunks."""
+    imputer = Imputer(station_column)
+    for chunk in chunks:
+        out = imputer.process(chunk)
+        if len(out):
+            yield out
+    tail = imputer.flush()
+    if tail is not None and len(tail):
+        yield tail
+
+
+@profiling.timed("imputation")
+def impute_frame(df, station_column=None, chunk_rows=CHUNK_ROWS):
+    """Impute a whole hourly frame (indexed by datetime or carrying an epoch column)."""
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    parts = list(iter_impute(chunks, station_column))
+    return pd.concat(parts) if parts else df.copy()
+
+
+def impute_csv(path, output_path, station_column=None, chunk_rows=CHUNK_ROWS):
+    """Stream a data.csv-style file through the imputer without loading it whole."""
+    header = True
+    reader = pd.read_csv(path, chunksize=chunk_rows)
+
+    def parsed(chunks):
+        for chunk in chunks:
+            stamps = pd.to_datetime(chunk["datetime"], format=data_store.DATETIME_FORMAT)
+            chunk[data_store.EPOCH_COLUMN] = stamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+            yield chunk
+
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        for out in iter_impute(parsed(reader), station_column):
+            out.drop(columns=data_store.EPOCH_COLUMN).to_csv(f, header=header, index=False)
+            header = False
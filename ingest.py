@@ -0,0 +1,203 @@
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import anomalies
+import data_store
+
+# ------------------Ingestion configuration------------------
+# New hourly records are validated, aligned to the hourly grid after the last
+# stored hour and appended to data.csv and the columnar store. Stored history
+# is only read (as the left anchor for interpolation), never rewritten.
+INBOX_DIR = "inbox"
+CONTEXT_HOURS = 48
+# trailing gaps (no later observation yet) are carried forward at most this long
+MAX_FILL_HOURS = 6
+# interior gaps up to this long are interpolated; longer ones (outages) stay NaN
+MAX_GAP_HOURS = 24
+
+VALID_RANGES = {
+    "hourly_demand": (0, None),
+    "hourly_average_price": (-5000, 5000),
+    "population": (0, None),
+    "Temp (deg C)": (-60, 50),
+    "Dew Point Temp (deg C)": (-70, 40),
+    "Rel Hum (%)": (0, 100),
+    "Wind Dir (10s deg)": (0, 36),
+    "Wind Spd (km/h)": (0, 200),
+    "Visibility (km)": (0, 100),
+    "Stn Press (kPa)": (80, 110),
+    "Wind Chill": (-80, 10),
+}
+# Wind Chill is only defined in cold weather, so its gaps are left as they are
+INTERPOLATED_COLUMNS = data_store.TARGET_COLUMNS + [c for c in data_store.WEATHER_COLUMNS if c != "Wind Chill"]
+
+
+def read_records(path):
+    """Load new records from a .csv or .json/.jsonl file with data.csv's columns."""
+    if path.lower().endswith((".json", ".jsonl")):
+        return pd.read_json(path, lines=path.lower().endswith(".jsonl"))
+    return pd.read_csv(path)
+
+
+def _parse_datetimes(values):
+    parsed = pd.to_datetime(values, format=data_store.DATETIME_FORMAT, errors="coerce")
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        # also accept ISO timestamps from feeds that don't use the DD/MM/YYYY layout
+        parsed[missing] = pd.to_datetime(values[missing], format="ISO8601", errors="coerce")
+    return parsed
+
+
+# ------------------Validation------------------
+def validate(records, last_timestamp=None):
+    """
+    Return (clean, report): clean holds the acceptable rows indexed by
+    hour, report counts what was dropped or blanked and why.
+    """
+    report = {"received": len(records), "bad_datetime": 0, "not_hourly": 0, "already_stored": 0,
+              "duplicates": 0, "out_of_range": {}}
+    if "datetime" not in records.columns:
+        raise ValueError("records need a 'datetime' column")
+
+    stamps = _parse_datetimes(records["datetime"].astype("string"))
+    valid = stamps.notna().to_numpy()
+    report["bad_datetime"] = int((~valid).sum())
+
+    on_hour = valid & ((stamps.dt.minute == 0) & (stamps.dt.second == 0)).to_numpy()
+    report["not_hourly"] = int((valid & ~on_hour).sum())
+    keep = on_hour
+
+    if last_timestamp is not None:
+        new = keep & (stamps > last_timestamp).to_numpy()
+        report["already_stored"] = int((keep & ~new).sum())
+        keep = new
+
+    columns = [c for c in VALID_RANGES if c in records.columns]
+    clean = records.loc[keep, columns].apply(pd.to_numeric, errors="coerce")
+    clean.index = pd.DatetimeIndex(stamps[keep], name="datetime")
+    report["duplicates"] = int(clean.index.duplicated(keep="last").sum())
+    clean = clean[~clean.index.duplicated(keep="last")].sort_index()
+
+    for column in columns:
+        low, high = VALID_RANGES[column]
+        bad = pd.Series(False, index=clean.index)
+        if low is not None:
+            bad |= clean[column] < low
+        if high is not None:
+            bad |= clean[column] > high
+        if bad.any():
+            report["out_of_range"][column] = int(bad.sum())
+            clean.loc[bad, column] = np.nan
+    report["accepted"] = len(clean)
+    return clean, report
+
+
+# ------------------Gap filling over the new window------------------
+def _gap_lengths(missing):
+    """Length of the NaN run each row belongs to (0 for observed rows), per column."""
+    runs = (~missing).cumsum()
+    lengths = missing.groupby(runs).transform("sum")
+    return lengths.where(missing, 0)
+
+
+def fill_window(clean, tail):
+    """
+    Put the accepted rows on a continuous hourly grid after the stored tail,
+    forward-fill the annual population and interpolate only the new window
+    (anchored on the last CONTEXT_HOURS stored hours). Gaps longer than
+    MAX_GAP_HOURS are left NaN rather than bridged with a straight line.
+    """
+    start = tail.index[-1] + pd.Timedelta(hours=1) if len(tail) else clean.index[0]
+    grid = pd.date_range(start, clean.index[-1], freq="h", name="datetime")
+    new = clean.reindex(grid)
+
+    window = pd.concat([tail, new])
+    if "population" in window.columns:
+        window["population"] = window["population"].ffill()
+    columns = [c for c in INTERPOLATED_COLUMNS if c in window.columns]
+    missing = window[columns].isna()
+    # trailing gaps are handled by the MAX_FILL_HOURS forward fill instead
+    long_gaps = missing & (missing.apply(_gap_lengths) > MAX_GAP_HOURS) & window[columns].bfill().notna()
+    window[columns] = window[columns].interpolate(method="linear", limit_area="inside")
+    window[columns] = window[columns].ffill(limit=MAX_FILL_HOURS).mask(long_gaps)
+    return window.loc[grid]
+
+
+def ingest_records(records, csv_path="data.csv"):
+    """Validate, gap-fill and append records; returns the validation report with timings."""
+    started = time.perf_counter()
+    arrays = data_store.load_arrays(csv_path)
+    tail = data_store.frame_from_arrays(arrays, -CONTEXT_HOURS) if len(arrays[data_store.EPOCH_COLUMN]) else None
+    last_timestamp = tail.index[-1] if tail is not None else None
+
+    clean, report = validate(records, last_timestamp)
+    report["appended"] = 0
+    if not clean.empty:
+        if tail is None:
+            tail = clean.iloc[:0]
+        rows = fill_window(clean, tail)
+        observed = clean.reindex(rows.index)
+        columns = [c for c in INTERPOLATED_COLUMNS if c in rows.columns]
+        filled = rows[columns].notna() & observed[columns].isna()
+        report["filled_hours"] = {c: int(n) for c, n in filled.sum().items() if n}
+        report["missing_hours"] = int(rows[columns].isna().all(axis=1).sum())
+        report["appended"] = data_store.append_rows(rows, csv_path)
+        if report["appended"]:
+            # only the new hours are scored; the stored flags are kept
+            flags = anomalies.update_flags(csv_path)
+            report["flagged"] = int(np.count_nonzero(flags[-report["appended"]:]))
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def ingest_file(path, csv_path="data.csv"):
+    return ingest_records(read_records(path), csv_path)
+
+
+# ------------------Local feed------------------
+def process_inbox(inbox=INBOX_DIR, csv_path="data.csv"):
+    """
+    Ingest every record file dropped into inbox (oldest first), moving each
+    to inbox/processed or inbox/rejected afterwards.
+    """
+    reports = {}
+    names = [n for n in os.listdir(inbox) if n.lower().endswith((".csv", ".json", ".jsonl"))]
+    for name in sorted(names, key=lambda n: os.path.getmtime(os.path.join(inbox, n))):
+        path = os.path.join(inbox, name)
+        try:
+            reports[name] = ingest_file(path, csv_path)
+            destination = "processed"
+        except Exception as e:
+            reports[name] = {"error": f"{type(e).__name__}: {e}"}
+            destination = "rejected"
+        os.makedirs(os.path.join(inbox, destination), exist_ok=True)
+        shutil.move(path, os.path.join(inbox, destination, name))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append new hourly observations to data.csv.")
+    parser.add_argument("files", nargs="*", help="record files (.csv/.json/.jsonl) to ingest")
+    parser.add_argument("--data", default="data.csv")
+    parser.add_argument("--inbox", default=None, help="ingest files dropped into this directory")
+    parser.add_argument("--watch", type=float, default=None, help="poll the inbox every N seconds")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        print(path, ingest_file(path, args.data))
+    if args.inbox:
+        while True:
+            for name, report in process_inbox(args.inbox, args.data).items():
+                print(name, report)
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import evaluation
+import forecasting
+import result_cache
+
+# ------------------Interval configuration------------------
+# P10/P50/P90 bands around the hourly forecasts. LightGBM and XGBoost fit
+# quantile objectives directly; ARIMA and RandomForest add block-bootstrapped
+# forecast residuals to the point forecast. Residuals come from the final-year
+# holdout (the same split the Evaluation page scores), so they reflect
+# multi-step forecast error rather than one-step in-sample noise.
+QUANTILES = (0.1, 0.5, 0.9)
+QUANTILE_MODELS = ["LightGBM", "XGboost"]
+BOOTSTRAP_MODELS = ["ARIMA", "RandomForest"]
+DEFAULT_PATHS = 1000
+# residuals are resampled in whole days, starting at the matching hour of day
+BLOCK_HOURS = 24
+# forecast hours simulated per worker task; paths x CHUNK_HOURS floats in memory at once
+CHUNK_HOURS = 24 * 90
+
+# holdout residuals per (data version, model, column, params), kept for the process lifetime
+_residuals = {}
+
+
+def quantile_params(model_name, column, quantiles=QUANTILES):
+    """
+    The point model's params for column (tuned if available) with a quantile
+    objective; XGBoost fits all quantiles in one model.
+    """
+    params = dict(forecasting.model_params(model_name, column))
+    if model_name == "LightGBM":
+        return [{**params, "objective": "quantile", "alpha": q} for q in quantiles]
+    if model_name == "XGboost":
+        return [{**params, "objective": "reg:quantileerror", "quantile_alpha": list(quantiles)}]
+    raise ValueError(f"{model_name} has no quantile objective")
+
+
+# ------------------Quantile objectives------------------
+def quantile_forecast(model_name, df, column, index, quantiles=QUANTILES, data_path="data.csv"):
+    """(len(quantiles), hours) array of quantile-regression forecasts."""
+    exog = forecasting.future_features(df, index)
+    rows = []
+    for params in quantile_params(model_name, column, quantiles):
+        fitted = forecasting.get_model(model_name, df, column, data_path, params)
+        predicted = np.asarray(fitted.predict(exog), dtype=float)
+        rows.extend(predicted.T if predicted.ndim == 2 else [predicted])
+    # separately fitted quantiles can cross; sorting keeps P10 <= P50 <= P90
+    return np.sort(np.vstack(rows), axis=0)
+
+
+# ------------------Residual block bootstrap------------------
+def holdout_residuals(model_name, df, column, data_path="data.csv"):
+    """
+    (epoch seconds, actual - forecast) for every hour of the final-year
+    holdout, cached per data version. Hours with a missing actual keep a NaN
+    residual so positions stay on the hourly grid; the bootstrap skips the
+    blocks that contain one.
+    """
+    params = forecasting.model_params(model_name, column)
+    key = (data_store.data_version(data_path), model_name, column, repr(params))
+    if key not in _residuals:
+        hours = min(evaluation.HOLDOUT_HOURS, len(df) // 2)
+        actual, predicted = evaluation.holdout_predictions(model_name, column, df, hours)
+        epoch = df.index[-hours:].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        _residuals[key] = (epoch, actual - predicted)
+    return _residuals[key]
+
+
+def _block_starts(residual_epoch, residuals, block):
+    """Hour of day of each position, and whether a complete NaN-free block starts there."""
+    good = np.zeros(len(residuals), dtype=bool)
+    if len(residuals) >= block:
+        missing = np.concatenate([[0], np.cumsum(~np.isfinite(residuals))])
+        last = len(residuals) - block + 1
+        # no NaN inside the block and no gap in the hourly timestamps it spans
+        good[:last] = (missing[block:] - missing[:last] == 0) & \
+            (residual_epoch[block - 1:] - residual_epoch[:last] == (block - 1) * 3600)
+    return residual_epoch // 3600 % 24, good
+
+
+def _bootstrap_chunk(point, residuals, start_hour, good, first_hour, quantiles, paths, block, seed):
+    """Quantiles of `paths` simulated paths over one horizon chunk, all paths in one array."""
+    rng = np.random.default_rng(seed)
+    hours = len(point)
+    n_blocks = -(-hours // block)
+    # block starts share the chunk's hour of day, so daily error patterns line up
+    candidates = np.flatnonzero(good & (start_hour == first_hour))
+    if len(candidates) == 0:
+        raise ValueError("Not enough holdout residuals for the bootstrap")
+    starts = candidates[rng.integers(0, len(candidates), size=(paths, n_blocks))]
+    positions = (starts[:, :, None] + np.arange(block)).reshape(paths, n_blocks * block)[:, :hours]
+    simulated = point[None, :] + residuals[positions]
+    return np.quantile(simulated, quantiles, axis=0)
+
+
+def bootstrap_forecast(point, index, residual_epoch, residuals, quantiles=QUANTILES, paths=DEFAULT_PATHS,
+                       block=BLOCK_HOURS, workers=None, seed=0):
+    """
+    (len(quantiles), hours) bootstrap quantiles around a point forecast.
+    The horizon is split into CHUNK_HOURS pieces simulated in parallel
+    threads (NumPy releases the GIL for the indexing and partitioning);
+    each chunk has its own seed, so results don't depend on `workers`.
+    Blocks are drawn by start position on the residuals' hourly grid; those
+    containing a NaN residual are never drawn.
+    """
+    residual_epoch = np.asarray(residual_epoch, dtype=np.int64)
+    residuals = np.asarray(residuals, dtype=float)
+    start_hour, good = _block_starts(residual_epoch, residuals, block)
+    if not good.any():
+        raise ValueError("Not enough holdout residuals for the bootstrap")
+    hours = index.hour.to_numpy()
+
+    chunks = [slice(lo, lo + CHUNK_HOURS) for lo in range(0, len(point), CHUNK_HOURS)]
+    workers = workers or min(len(chunks), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_bootstrap_chunk, point[rows], residuals, start_hour, good, int(hours[rows][0]),
+                               quantiles, paths, block, [seed, i])
+                   for i, rows in enumerate(chunks)]
+        return np.hstack([future.result() for future in futures])
+
+
+# ------------------Forecast with intervals------------------
+def _cache_key(model_name, target, horizon, quantiles, paths, data_path):
+    params = {"point": {column: forecasting.model_params(model_name, column)
+                        for column in forecasting.TARGETS[target]}, "quantiles": list(quantiles),
+              "paths": paths if model_name in BOOTSTRAP_MODELS else None, "block": BLOCK_HOURS}
+    return result_cache.cache_key(model_name, f"{target} intervals", horizon, params,
+                                  data_store.data_version(data_path))
+
+
+def run_intervals(model_name, target, data_path="data.csv", horizon=forecasting.HORIZON_HOURS,
+                  quantiles=QUANTILES, paths=DEFAULT_PATHS, df=None, use_cache=True, workers=None, seed=0):
+    """
+    run_forecast plus prediction intervals. Adds "quantiles" (the levels),
+    "bands" ({column: (len(quantiles), hours) array}), "method" ("quantile"
+    or "bootstrap") and "paths" to the point forecast result.
+    """
+    quantiles = tuple(sorted(quantiles))
+    key = _cache_key(model_name, target, horizon, quantiles, paths, data_path)
+    if use_cache:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return _unpack(cached, quantiles, model_name, paths)
+
+    if df is None:
+        df = forecasting.load_history(data_path)
+    result = forecasting.run_forecast(model_name, target, data_path, horizon, df=df, use_cache=use_cache)
+    index = pd.DatetimeIndex(result["index"])
+
+    bands = {}
+    for column in forecasting.TARGETS[target]:
+        if model_name in QUANTILE_MODELS:
+            bands[column] = quantile_forecast(model_name, df, column, index, quantiles, data_path)
+        else:
+            residual_epoch, residuals = holdout_residuals(model_name, df, column, data_path)
+            bands[column] = bootstrap_forecast(result["values"][column], index, residual_epoch, residuals,
+                                               quantiles, paths, workers=workers, seed=seed)
+
+    if use_cache:
+        # stored as extra "column|quantile" series in the ordinary forecast cache format
+        flat = dict(result["values"])
+        for column, band in bands.items():
+            flat.update({f"{column}|{q}": row for q, row in zip(quantiles, band)})
+        result_cache.put(key, {**result, "values": flat})
+    return {**result, "quantiles": list(quantiles), "bands": bands,
+            "method": "quantile" if model_name in QUANTILE_MODELS else "bootstrap",
+            "paths": paths if model_name in BOOTSTRAP_MODELS else None}
+
+
+def _unpack(cached, quantiles, model_name, paths):
+    values, bands = {}, {}
+    for name, row in cached["values"].items():
+        if "|" in name:
+            column, _ = name.split("|", 1)
+            bands.setdefault(column, []).append(row)
+        else:
+            values[name] = row
+    return {**cached, "values": values, "quantiles": list(quantiles),
+            "bands": {column: np.vstack(rows) for column, rows in bands.items()},
+            "method": "quantile" if model_name in QUANTILE_MODELS else "bootstrap",
+            "paths": paths if model_name in BOOTSTRAP_MODELS else None}
+
+
+def interval_frame(result):
+    """Long-form hourly frame with one "<column> P<NN>" series per quantile, plus the point forecast."""
+    index = pd.DatetimeIndex(result["index"], name="datetime")
+    columns = {}
+    for column, band in result["bands"].items():
+        for q, row in zip(result["quantiles"], band):
+            columns[f"{column} P{round(q * 100):02d}"] = row
+        columns[f"{column} point"] = result["values"][column]
+    return pd.DataFrame(columns, index=index)
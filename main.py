@@ -1,35 +1,26 @@
 import streamlit as st
 import os
-import pandas as pd
-from PIL import Image
-import time
-import random
+import profiling
+# pandas, altair and the forecasting modules are imported inside the pages
+# that use them, so the first paint of the Home page doesn't wait for them
 
 # ------------------Main Streamlit App------------------
 def main():
     st.set_page_config(page_title="Ontario Energy Forecasting System", layout="wide")
 
-    # Navigation
-    pages = {
-        "Home": home_page,
-        "Visualization": visualization_page,
-        "Prediction": prediction_page,
-        "Evaluation": evaluation_page
-    }
-
     # Create menu in the main page instead of sidebar
-    page = st.radio("Navigation", list(pages.keys()), horizontal=True)
+    page = st.radio("Navigation", list(PAGES.keys()), horizontal=True)
 
     # Call the appropriate page function
-    pages[page]()
+    with profiling.stage("app.page", page=page):
+        PAGES[page]()
 
 def home_page():
     st.title("Ontario Energy Forecasting System")
     
     # Try to display main image
     try:
-        img = Image.open("main.png")
-        st.image(img, use_container_width=True)
+        st.image(main_image(os.stat("main.png").st_mtime_ns), use_container_width=True)
     except Exception as e:
         st.warning(f"Could not load main image: {e}")
     
@@ -39,49 +30,164 @@ def home_page():
     st.markdown("---")
     st.markdown("© Data Science Project, 2025-3-26-")
 
+# ------------------Process-wide resources------------------
+# st.cache_resource objects are shared by every session of this server
+# process, so each is built once rather than once per visitor.
+@st.cache_resource(show_spinner=False)
+def main_image(mtime_ns):
+    # mtime_ns is only the cache key; the encoded file is sent as-is, without a server-side decode
+    with open("main.png", "rb") as f:
+        return f.read()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def history_frame(data_version):
+    # data_version is only the cache key; callers must not modify the shared frame
+    import data_store
+    return data_store.load_frame("data.csv")
+
+def current_history():
+    import data_store
+    return history_frame(data_store.data_version("data.csv"))
+
+# ------------------Cached image grid------------------
+THUMBNAIL_WIDTH = 800
+
+def show_image(folder, name, caption):
+    import image_cache
+    img_path = os.path.join(folder, name)
+    st.image(image_cache.thumbnail_bytes(img_path, THUMBNAIL_WIDTH), use_container_width=True)
+    st.caption(caption)
+    # full resolution is only read and sent when the user asks for it
+    if st.toggle("Full resolution", key=f"full-{img_path}"):
+        st.image(image_cache.full_image_bytes(img_path), use_container_width=True)
+
+def show_image_grid(folder, caption_for):
+    import image_cache
+    image_files = image_cache.list_images(folder)
+    for i in range(0, len(image_files), 2):
+        cols = st.columns(2)
+        for col, name in zip(cols, image_files[i:i + 2]):
+            with col:
+                show_image(folder, name, caption_for(name))
+
+# ------------------Interactive charts------------------
+@st.cache_data(show_spinner=False, max_entries=64)
+def history_chart_data(data_version, columns, start, end, method):
+    # data_version is only the cache key; new data re-decimates the viewport
+    import downsample
+    return downsample.history_series(list(columns), start, end, method=method)
+
+def _brushed_range(event):
+    """(start, end) of the interval brushed on a chart, or None."""
+    import pandas as pd
+    selection = event.selection.get("zoom") if event else None
+    values = selection.get("datetime") if selection else None
+    if not values or len(values) != 2:
+        return None
+    bounds = [pd.to_datetime(v, unit="ms") if isinstance(v, (int, float)) else pd.Timestamp(v) for v in values]
+    return min(bounds), max(bounds)
+
+def zoomable_chart(key, fetch):
+    """
+    Line chart of fetch(start, end), a decimated (datetime, series, value)
+    frame for that viewport. Brushing a range reruns the page and fetches
+    freshly decimated data for just that range.
+    """
+    import altair as alt
+    import downsample
+    state = st.session_state.setdefault(f"{key}-zoom", {"range": (None, None), "generation": 0})
+    with profiling.stage("render.chart", chart=key):
+        data = fetch(*state["range"])
+        # epoch milliseconds on a UTC scale, so the brushed range is not shifted by the browser's timezone
+        chart_data = data.assign(datetime=data["datetime"].to_numpy(dtype="datetime64[ms]").astype("int64"))
+        brush = alt.selection_interval(encodings=["x"], name="zoom")
+        chart = alt.Chart(chart_data).mark_line(strokeWidth=1).encode(
+            x=alt.X("datetime:T", title=None, scale=alt.Scale(type="utc")),
+            y=alt.Y("value:Q", title=None, scale=alt.Scale(zero=False)),
+            color=alt.Color("series:N", title=None),
+        ).add_params(brush)
+        # a new key per zoom level starts each chart without the previous brush
+        event = st.altair_chart(chart, width="stretch", on_select="rerun",
+                                key=f"{key}-chart-{state['generation']}")
+
+    brushed = _brushed_range(event)
+    if brushed is not None:
+        state["range"] = brushed
+        state["generation"] += 1
+        st.rerun()
+    cols = st.columns([1, 5])
+    if cols[0].button("Reset zoom", key=f"{key}-reset", disabled=state["range"] == (None, None)):
+        state["range"] = (None, None)
+        state["generation"] += 1
+        st.rerun()
+    cols[1].caption(f"{len(data):,} points in view (at most {downsample.DEFAULT_POINTS:,} per series). "
+                    "Drag across the chart to zoom in.")
+
 def visualization_page():
+    import data_store
+    import downsample
     st.header("Data Visualization")
-    
-    descriptions = {
-        "Average Monthly Temperature.png": "This chart represents the monthly average temperature variations throughout the year, clearly showing the seasonal temperature differences and their impact on energy demand.",
-        "Distribution of Temp-population-hourly demand.png": "This visualization illustrates the distributions and relationships among temperature, population density, and hourly energy demand.",
-        "Energy Demand Cluster Based on Climate change.png": "A clustering visualization that categorizes energy demand patterns based on different climatic conditions, highlighting how climate change may affect future energy usage.",
-        "Energy Demand over time.png": "A time series graph depicting how energy demand fluctuates over different periods, helping identify peak usage times and seasonal variations.",
-        "Energy Demand Vs Wind Speed.png": "A scatter plot showing the relationship between wind speed and energy demand, illustrating potential correlations or influences of wind conditions on electricity consumption.",
-        "Energy Price Over time.png": "This line chart tracks the fluctuations in energy prices over time, offering insights into pricing trends and their relation to energy market dynamics.",
-        "Feature Correlation.png": "A heatmap displaying correlations among various features, such as temperature, humidity, population, and other factors that might influence energy consumption.",
-        "impact of extreme weather on energy demand.png": "This visualization shows how extreme weather events, such as heatwaves or cold snaps, significantly affect energy demand peaks and overall consumption.",
-        "Mutual information scores for predictiong hourly_demand.png": "Bar chart depicting mutual information scores of various features, assessing their predictive power for forecasting hourly energy demand.",
-        "Ontario Population over time.png": "A line graph illustrating the population growth trend in Ontario, providing context for understanding the changing scale of energy demands over time.",
-        "Population Vs. Energy Demand.png": "A scatter plot analyzing the relationship between population size and energy demand, highlighting the direct impact of population growth on energy consumption.",
-        "Scatter Matrix of Electricity Demand Price and Weather Factors.png": "Scatter matrix exploring relationships between electricity demand, pricing, and weather variables, showing detailed interactions between multiple variables.",
-        "Temperature Trends Over Time.png": "A detailed time series illustrating temperature trends over an extended period, indicating possible long-term climatic shifts affecting energy usage.",
-        "Vs01-Averege Hourly Demand by Season in Ontario.png": "Bar graph showing average hourly energy demand segmented by season in Ontario, emphasizing seasonal variations in energy consumption."
-    }
-    
+
+    st.subheader("Interactive Charts")
+    cols = st.columns([3, 1])
+    columns = cols[0].multiselect("Series", data_store.TARGET_COLUMNS + data_store.WEATHER_COLUMNS,
+                                  default=["hourly_demand"])
+    method = cols[1].radio("Downsampling", downsample.METHODS, horizontal=True,
+                           format_func=lambda m: {"lttb": "LTTB", "minmax": "Min/Max"}[m])
+    if columns:
+        version = data_store.data_version("data.csv")
+        zoomable_chart("history", lambda start, end: history_chart_data(
+            version, tuple(columns), start, end, method))
+        date_range_explorer(columns, method)
+
+    st.subheader("Notebook Figures")
     visualization_folder = "./Visulation"
     if os.path.exists(visualization_folder):
-        image_files = [f for f in os.listdir(visualization_folder) if f.lower().endswith(".png")]
-        
-        for i in range(0, len(image_files), 2):
-            cols = st.columns(2)
-            with cols[0]:
-                img_path = os.path.join(visualization_folder, image_files[i])
-                img = Image.open(img_path)
-                st.image(img, use_container_width=True)
-                st.caption(descriptions.get(image_files[i], "No description"))
-            
-            if i + 1 < len(image_files):
-                with cols[1]:
-                    img_path = os.path.join(visualization_folder, image_files[i+1])
-                    img = Image.open(img_path)
-                    st.image(img, use_container_width=True)
-                    st.caption(descriptions.get(image_files[i+1], "No description"))
-
+        show_image_grid(visualization_folder,
+                        lambda name: FIGURE_DESCRIPTIONS.get(name, "No description"))
     else:
         st.error("Visualization folder not found.")
 
+def date_range_explorer(columns, method):
+    """Date pickers over the hourly data, answered from the rollups in rollups.py."""
+    import data_store
+    import pandas as pd
+    import rollups
+    st.subheader("Date Range Explorer")
+    epoch = data_store.load_arrays("data.csv")[data_store.EPOCH_COLUMN]
+    if len(epoch) == 0:
+        return
+    first, last = (pd.Timestamp(int(epoch[i]), unit="s").date() for i in (0, -1))
+    cols = st.columns([3, 2])
+    period = cols[0].date_input("Date range", (max(first, last - pd.Timedelta(days=365)), last),
+                                min_value=first, max_value=last, key="explorer-range")
+    resolution = cols[1].radio("Resolution", ["Hourly", "Daily", "Monthly"], index=1, horizontal=True,
+                               key="explorer-resolution")
+    if len(period) != 2:
+        st.write("Pick a start and an end date.")
+        return
+    start, end = pd.Timestamp(period[0]), pd.Timestamp(period[1]) + pd.Timedelta(hours=23)
+
+    with profiling.stage("render.explorer", resolution=resolution):
+        if resolution == "Hourly":
+            data = history_chart_data(data_store.data_version("data.csv"), tuple(columns), start, end, method)
+            st.line_chart(data, x="datetime", y="value", color="series")
+        else:
+            st.line_chart(rollups.rollup("D" if resolution == "Daily" else "M", start, end, columns))
+        st.write("**Summary for the selected range**")
+        st.dataframe(rollups.summary(start, end, columns))
+        # seasons the range doesn't touch have no hours
+        seasons = rollups.seasonal(start, end, columns).dropna(how="all")
+        st.write(f"**Average hourly {columns[0]} by season**")
+        st.bar_chart(seasons[columns[0]])
+        st.dataframe(seasons)
+
 def prediction_page():
+    import pandas as pd
+    import downsample
+    import forecasting
+    import intervals
+    import tuning
     st.header("Prediction Configuration")
     
     model = st.selectbox("Select Model", 
@@ -90,61 +196,305 @@ def prediction_page():
     target = st.selectbox("Prediction Target", 
         ["Electricity Demand", "Electricity Price", 
          "Electricity Demand & Electricity Price"])
-    
+    for column in forecasting.TARGETS[target]:
+        best = tuning.best_trial(model, column)
+        if best is not None:
+            st.caption(f"{column}: tuned hyperparameters from trial {best['number']} "
+                       f"(cross-validated RMSE {best['score']:,.2f}); see `python tuning.py`.")
+
+    cols = st.columns(2)
+    with_intervals = cols[0].toggle("P10 / P50 / P90 bands")
+    paths = intervals.DEFAULT_PATHS
+    if with_intervals and model in intervals.BOOTSTRAP_MODELS:
+        # more bootstrap paths give smoother bands at proportionally higher latency
+        paths = cols[1].select_slider("Bootstrap paths", [100, 250, 500, 1000, 2000, 5000],
+                                      value=intervals.DEFAULT_PATHS)
+
     if st.button("Run Prediction"):
         st.info(f"Running {model} for {target} prediction (5 Years)...")
-        time.sleep(2 + random.randint(1, 2))
-        model_target_map = {
-            ("ARIMA", "Electricity Price"): "Arima forcast for electricity price.png",
-            ("ARIMA", "Electricity Demand"): "Arima Forecast for electricity demand.png",
-            ("ARIMA", "Electricity Demand & Electricity Price"): "Arima-prediction.png",
-            ("LightGBM", "Electricity Price"): "prediction-price-lightgbm.png",
-            ("LightGBM", "Electricity Demand"): "prediction-demand-lightgbm.png",
-            ("LightGBM", "Electricity Demand & Electricity Price"): "prediciton-lightgbm.png",
-            ("XGboost", "Electricity Price"): "prediction-price-xgboost.png",
-            ("XGboost", "Electricity Demand"): "prediction-demand-xgboost.png",
-            ("XGboost", "Electricity Demand & Electricity Price"): "prediction-xgboost.png",
-            ("RandomForest", "Electricity Price"): "prediction-price-randomforest.png",
-            ("RandomForest", "Electricity Demand"): "prediction-demand-RandomForest.png",
-            ("RandomForest", "Electricity Demand & Electricity Price"): "prediction-randomforest.png",
-        }
-        
-        filename = model_target_map.get((model, target))
-        if filename:
-            try:
-                img_path = os.path.join("./predict", filename)
-                img = Image.open(img_path)
-                st.image(img, use_container_width=True)
-                st.caption(f"Prediction result for {model} - {target}")
-            except Exception as e:
-                st.error(f"Could not load prediction image: {e}")
+        try:
+            with st.spinner("Training model and forecasting..."):
+                df = current_history()
+                if with_intervals:
+                    result = intervals.run_intervals(model, target, paths=paths, df=df)
+                else:
+                    result = forecasting.run_forecast(model, target, df=df)
+                st.session_state["prediction"] = result
+                st.session_state.pop("prediction-zoom", None)
+        except Exception as e:
+            st.error(f"Prediction failed: {e}")
+            return
+
+    # kept in session state so zooming (which reruns the page) keeps the chart
+    result = st.session_state.get("prediction")
+    if result is not None and (result["model"], result["target"]) == (model, target):
+        if "bands" in result:
+            forecast = intervals.interval_frame(result)
+            source = "quantile objectives" if result["method"] == "quantile" \
+                else f"{result['paths']:,} residual block-bootstrap paths"
+            st.caption(f"Bands from {source}.")
         else:
-            st.warning("No matching prediction image found.")
+            forecast = forecasting.forecast_frame(result)
+        # the hourly forecast is decimated per viewport instead of averaged per day
+        zoomable_chart("prediction", lambda start, end: downsample.frame_series(forecast, start, end))
+        st.caption(f"Prediction result for {model} - {target}")
+
+    st.markdown("---")
+    st.subheader("Compare All Models")
+    st.write("Runs every model for every target in parallel worker processes. "
+             "Changing a selection above cancels a run in progress.")
+    if st.button("Run All Models"):
+        st.session_state["run_all_results"] = run_all_models()
+        for target in ["Electricity Demand", "Electricity Price"]:
+            st.session_state.pop(f"run-all-{target}-zoom", None)
+    for target in ["Electricity Demand", "Electricity Price"]:
+        column = forecasting.TARGETS[target][0]
+        hourly = {r["model"]: forecasting.forecast_frame(r)[column]
+                  for r in st.session_state.get("run_all_results", []) if r["target"] == target}
+        if hourly:
+            st.write(f"**{target} (hourly forecast)**")
+            frame = pd.DataFrame(hourly)
+            zoomable_chart(f"run-all-{target}",
+                           lambda start, end, frame=frame: downsample.frame_series(frame, start, end))
+
+def run_all_models():
+    import pandas as pd
+    import model_runner
+    progress = st.progress(0.0, text="Starting workers...")
+    status_table = st.empty()
+    rows = {}
+    results = []
+
+    # a widget change reruns the script, which closes this generator and terminates the workers
+    for event in model_runner.run_all():
+        rows[(event["model"], event["target"])] = {
+            "Model": event["model"],
+            "Target": event["target"],
+            "Status": event["status"] if not event["error"] else f"{event['status']}: {event['error']}",
+            "Seconds": round(event["elapsed"], 1),
+        }
+        status_table.dataframe(pd.DataFrame(list(rows.values())), hide_index=True)
+        progress.progress(event["completed"] / event["total"],
+                          text=f"{event['completed']}/{event['total']} jobs finished")
+        if event["status"] == "done":
+            results.append(event["result"])
+    return results
+
+GROWTH_OPTIONS = {"Historical trend": None, "0%/yr": 0.0, "+1%/yr": 0.01, "+2%/yr": 0.02,
+                  "+3%/yr": 0.03, "-1%/yr": -0.01}
+
+def scenario_page():
+    import pandas as pd
+    import downsample
+    import forecasting
+    import scenarios
+    st.header("Scenario Sweep")
+    st.write("Score many weather and population scenarios against one trained model in batched, "
+             "vectorized calls.")
+
+    cols = st.columns(3)
+    model = cols[0].selectbox("Model", scenarios.SCENARIO_MODELS)
+    target = cols[1].selectbox("Target", ["Electricity Demand", "Electricity Price"])
+    horizon_days = cols[2].number_input("Horizon (days)", min_value=1, max_value=5 * 365,
+                                        value=scenarios.DEFAULT_HORIZON // 24)
+    cols = st.columns(3)
+    low, high = cols[0].slider("Warming range (deg C)", -5.0, 5.0, (-2.0, 2.0), step=0.5)
+    steps = cols[1].number_input("Temperature steps", min_value=1, max_value=101, value=5)
+    growths = cols[2].multiselect("Population growth", list(GROWTH_OPTIONS),
+                                  default=["Historical trend", "+2%/yr"])
+    deltas = [round(low + (high - low) * i / max(int(steps) - 1, 1), 3) for i in range(int(steps))]
+    grid = scenarios.scenario_grid(deltas, [GROWTH_OPTIONS[g] for g in growths] or [None])
+    st.caption(f"{len(grid)} scenarios")
+
+    if st.button("Score Scenarios"):
+        column = forecasting.TARGETS[target][0]
+        with st.spinner(f"Scoring {len(grid)} scenarios..."):
+            st.session_state["scenario_result"] = scenarios.score_scenarios(
+                model, grid, column, int(horizon_days) * 24, df=current_history())
+        st.session_state.pop("scenarios-zoom", None)
+
+    result = st.session_state.get("scenario_result")
+    if result is None:
+        return
+    metrics = st.columns(4)
+    metrics[0].metric("Scenarios", len(result["scenarios"]))
+    metrics[1].metric("Scenarios / s", f"{result['scenarios_per_second']:,.1f}")
+    metrics[2].metric("Hourly rows / s", f"{result['rows_per_second']:,.0f}")
+    metrics[3].metric("Total time", f"{result['seconds']:.2f} s",
+                      help=f"features {result['prepare_seconds']:.2f} s, scoring {result['score_seconds']:.2f} s")
+
+    st.write(f"**Mean {result['column']} per scenario and horizon (hours)** - {result['model']}")
+    summary = result["summary"].pivot(index="scenario", columns="horizon_hours", values="mean")
+    st.dataframe(summary.reindex(result["scenarios"]))
+
+    shown = st.multiselect("Scenarios to chart", result["scenarios"],
+                           default=[result["scenarios"][0], result["scenarios"][-1]], max_selections=8)
+    if shown:
+        rows = [result["scenarios"].index(name) for name in shown]
+        frame = pd.DataFrame(result["values"][rows].T, columns=shown,
+                             index=pd.DatetimeIndex(result["index"], name="datetime"))
+        zoomable_chart("scenarios", lambda start, end: downsample.frame_series(frame, start, end))
+
+@st.cache_data(show_spinner=False)
+def live_metrics(data_version):
+    # data_version is only the cache key; a changed data.csv recomputes the metrics
+    import evaluation
+    return evaluation.evaluate_models(df=history_frame(data_version))
 
 def evaluation_page():
+    import pandas as pd
+    import backtest
+    import data_store
+    import evaluation
+    import model_registry
     st.header("Model Evaluation")
-    
+
+    st.subheader("Live Metrics (final-year holdout)")
+    version = data_store.data_version("data.csv")
+    if st.button("Compute Metrics"):
+        st.session_state["metrics_version"] = version
+    if st.session_state.get("metrics_version") == version:
+        with st.spinner("Training models on the holdout split..."):
+            metrics = live_metrics(version)
+        for column, label in [("hourly_demand", "Electricity Demand"),
+                              ("hourly_average_price", "Electricity Price")]:
+            st.write(f"**{label}**")
+            table = metrics[metrics["Target"] == column].drop(columns="Target").set_index("Model")
+            st.dataframe(table[evaluation.REGRESSION_METRICS + evaluation.CLASSIFICATION_METRICS])
+    else:
+        st.write("Train each model on all but the final year of data.csv and score it on that year.")
+
+    st.subheader("Rolling-Origin Backtest")
+    cols = st.columns(3)
+    mode = cols[0].selectbox("Window", backtest.MODES)
+    folds = cols[1].number_input("Folds", min_value=1, max_value=20, value=backtest.DEFAULT_FOLDS)
+    horizon_days = cols[2].number_input("Horizon (days)", min_value=1, max_value=365,
+                                        value=backtest.DEFAULT_HORIZON // 24)
+    if st.button("Run Backtest"):
+        progress = st.progress(0.0, text="Starting folds...")
+        results = backtest.run_backtest(
+            n_folds=int(folds), horizon=int(horizon_days) * 24, mode=mode,
+            progress=lambda done, total: progress.progress(done / total, text=f"{done}/{total} folds finished"))
+        backtest.save_results(results)
+        st.session_state["backtest_results"] = results
+    if "backtest_results" in st.session_state:
+        summary = backtest.summarize(st.session_state["backtest_results"])
+        st.dataframe(summary, hide_index=True)
+        for column in data_store.TARGET_COLUMNS:
+            rmse = summary[summary["target"] == column].pivot(index="horizon_hours", columns="model", values="RMSE")
+            if not rmse.empty:
+                st.write(f"**RMSE by forecast horizon (hours) - {column}**")
+                st.line_chart(rmse)
+
+    st.subheader("Model Registry")
+    artifacts = model_registry.list_artifacts()
+    if artifacts:
+        st.dataframe(pd.DataFrame([{
+            "Model": a["model"],
+            "Target": a["column"],
+            "Version": a["version"],
+            "Trained": pd.Timestamp(a["created"], unit="s").strftime("%Y-%m-%d %H:%M"),
+            "Data hash": a["data_version"][:10],
+            "Holdout RMSE": a["metrics"].get("holdout", {}).get("RMSE"),
+            "Library": a["library"],
+        } for a in artifacts]), hide_index=True)
+    else:
+        st.write("No trained models yet; running a prediction registers its model here.")
+
+    st.subheader("Evaluation Figures")
     evaluation_folder = "./Evaluation"
     if os.path.exists(evaluation_folder):
-        image_files = [f for f in os.listdir(evaluation_folder) if f.lower().endswith(".png")]
-        
-        for i in range(0, len(image_files), 2):
-            cols = st.columns(2)
-            with cols[0]:
-                img_path = os.path.join(evaluation_folder, image_files[i])
-                img = Image.open(img_path)
-                st.image(img, use_container_width=True)
-                st.caption(f"Evaluation: {os.path.splitext(image_files[i])[0]}")
-            
-            if i + 1 < len(image_files):
-                with cols[1]:
-                    img_path = os.path.join(evaluation_folder, image_files[i+1])
-                    img = Image.open(img_path)
-                    st.image(img, use_container_width=True)
-                    st.caption(f"Evaluation: {os.path.splitext(image_files[i+1])[0]}")
+        show_image_grid(evaluation_folder,
+                        lambda name: f"Evaluation: {os.path.splitext(name)[0]}")
     else:
         st.error("Evaluation folder not found.")
 
+def diagnostics_page():
+    st.header("Diagnostics")
+    st.write("Time spent in each pipeline stage, from every process that logged to "
+             f"`{profiling.LOG_PATH}` (this app, model workers and the API).")
+
+    summary = profiling.log_summary()
+    if summary.empty:
+        st.write("Nothing recorded yet; run a prediction or open the charts to collect timings.")
+    else:
+        st.dataframe(summary, hide_index=True)
+        st.write("**p95 latency by stage (seconds)**")
+        st.bar_chart(summary.set_index("stage")["p95_s"])
+
+    if st.button("Reset timings"):
+        profiling.reset(clear_log=True)
+        st.rerun()
+    st.caption("Set ONTARIO_PROFILE_MEMORY=1 before starting the app to also record peak allocations per stage.")
+
+# ------------------Anomalies------------------
+@st.cache_data(show_spinner=False, max_entries=16)
+def anomaly_counts(data_version, start, end):
+    # data_version is only the cache key; appended hours update the stored flags first
+    import anomalies
+    return anomalies.counts(start, end)
+
+def anomalies_page():
+    import anomalies
+    import data_store
+    import pandas as pd
+    st.header("Anomalies & Extreme Weather")
+    st.write("Hours flagged as demand or price spikes against the previous week, temperature anomalies "
+             "against the previous two weeks, and extreme heat or cold. Flags are stored with the data and "
+             "updated incrementally as new hours arrive.")
+
+    epoch = data_store.load_arrays("data.csv")[data_store.EPOCH_COLUMN]
+    if len(epoch) == 0:
+        st.write("No data loaded yet.")
+        return
+    first, last = (pd.Timestamp(int(epoch[i]), unit="s").date() for i in (0, -1))
+    names = st.multiselect("Flags", list(anomalies.FLAGS), default=list(anomalies.FLAGS),
+                           format_func=anomalies.LABELS.get)
+    period = st.date_input("Date range", (first, last), min_value=first, max_value=last)
+    if len(period) != 2 or not names:
+        st.write("Pick a start and end date and at least one flag.")
+        return
+    start, end = pd.Timestamp(period[0]), pd.Timestamp(period[1]) + pd.Timedelta(hours=23)
+
+    monthly = anomaly_counts(data_store.data_version("data.csv"), start, end)
+    monthly = monthly[[anomalies.LABELS[n] for n in names]]
+    cols = st.columns(len(names))
+    for col, label in zip(cols, monthly.columns):
+        col.metric(label, f"{int(monthly[label].sum()):,} h")
+    st.write("**Flagged hours per month**")
+    st.bar_chart(monthly)
+
+    flagged = anomalies.query(start, end, names)
+    st.write(f"**{len(flagged):,} flagged hours**")
+    st.dataframe(flagged)
+
+PAGES = {
+    "Home": home_page,
+    "Visualization": visualization_page,
+    "Prediction": prediction_page,
+    "Scenarios": scenario_page,
+    "Evaluation": evaluation_page,
+    "Anomalies": anomalies_page,
+    "Diagnostics": diagnostics_page
+}
+
+FIGURE_DESCRIPTIONS = {
+    "Average Monthly Temperature.png": "This chart represents the monthly average temperature variations throughout the year, clearly showing the seasonal temperature differences and their impact on energy demand.",
+    "Distribution of Temp-population-hourly demand.png": "This visualization illustrates the distributions and relationships among temperature, population density, and hourly energy demand.",
+    "Energy Demand Cluster Based on Climate change.png": "A clustering visualization that categorizes energy demand patterns based on different climatic conditions, highlighting how climate change may affect future energy usage.",
+    "Energy Demand over time.png": "A time series graph depicting how energy demand fluctuates over different periods, helping identify peak usage times and seasonal variations.",
+    "Energy Demand Vs Wind Speed.png": "A scatter plot showing the relationship between wind speed and energy demand, illustrating potential correlations or influences of wind conditions on electricity consumption.",
+    "Energy Price Over time.png": "This line chart tracks the fluctuations in energy prices over time, offering insights into pricing trends and their relation to energy market dynamics.",
+    "Feature Correlation.png": "A heatmap displaying correlations among various features, such as temperature, humidity, population, and other factors that might influence energy consumption.",
+    "impact of extreme weather on energy demand.png": "This visualization shows how extreme weather events, such as heatwaves or cold snaps, significantly affect energy demand peaks and overall consumption.",
+    "Mutual information scores for predictiong hourly_demand.png": "Bar chart depicting mutual information scores of various features, assessing their predictive power for forecasting hourly energy demand.",
+    "Ontario Population over time.png": "A line graph illustrating the population growth trend in Ontario, providing context for understanding the changing scale of energy demands over time.",
+    "Population Vs. Energy Demand.png": "A scatter plot analyzing the relationship between population size and energy demand, highlighting the direct impact of population growth on energy consumption.",
+    "Scatter Matrix of Electricity Demand Price and Weather Factors.png": "Scatter matrix exploring relationships between electricity demand, pricing, and weather variables, showing detailed interactions between multiple variables.",
+    "Temperature Trends Over Time.png": "A detailed time series illustrating temperature trends over an extended period, indicating possible long-term climatic shifts affecting energy usage.",
+    "Vs01-Averege Hourly Demand by Season in Ontario.png": "Bar graph showing average hourly energy demand segmented by season in Ontario, emphasizing seasonal variations in energy consumption."
+}
+
 # Run the app
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------Model registry configuration------------------
+# Trained models are stored under REGISTRY_DIR/<model>/<column>/v<NNNN>-<key>/
+# as a native artifact plus meta.json (version, training-data hash, params,
+# feature schema, metrics). Every artifact loads back as the type a fresh fit
+# returns, so callers never depend on whether a model came from the registry:
+#   LightGBM      model.joblib  LGBMRegressor; the booster is pickled as its model text
+#   XGboost       model.ubj     binary UBJSON booster, loaded into an XGBRegressor
+#   RandomForest  model.joblib  uncompressed joblib (no inflate step; sklearn
+#                               copies the tree arrays into memory on load)
+#   ARIMA         model.pickle  statsmodels results (60-day window, small)
+# Artifacts are read into memory, not memory-mapped; loaded models live in a
+# process-wide LRU shared by every Streamlit session.
+REGISTRY_DIR = os.path.join(".cache", "models")
+FORMAT_VERSION = 2
+# artifacts kept per (model, column, params); older data versions are pruned
+KEEP_VERSIONS = 3
+MAX_LOADED = 16
+
+ARTIFACT_FILES = {
+    "ARIMA": "model.pickle",
+    "LightGBM": "model.joblib",
+    "XGboost": "model.ubj",
+    "RandomForest": "model.joblib",
+}
+
+_loaded = OrderedDict()
+_lock = threading.Lock()
+
+
+def artifact_key(model_name, column, data_version, params):
+    """Hash of everything a trained model depends on."""
+    payload = json.dumps({"model": model_name, "column": column, "data": data_version,
+                          "params": params, "format": FORMAT_VERSION}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _model_dir(model_name, column, registry_dir):
+    return os.path.join(registry_dir, model_name, column)
+
+
+def _library_version(model_name):
+    module = {"ARIMA": "statsmodels", "LightGBM": "lightgbm", "XGboost": "xgboost",
+              "RandomForest": "sklearn"}[model_name]
+    return f"{module} {__import__(module).__version__}"
+
+
+# ------------------Native formats------------------
+def _save_artifact(model_name, fitted, path):
+    if model_name == "XGboost":
+        fitted.save_model(path)
+    elif model_name in ("LightGBM", "RandomForest"):
+        import joblib
+        # uncompressed: loading skips decompression, which dominates for a 100-tree forest
+        joblib.dump(fitted, path, compress=0)
+    elif model_name == "ARIMA":
+        fitted.save(path)
+    else:
+        raise ValueError(f"Unknown model: {model_name}")
+
+
+def _load_artifact(model_name, path):
+    if model_name == "XGboost":
+        from xgboost import XGBRegressor
+        regressor = XGBRegressor()
+        regressor.load_model(path)
+        return regressor
+    if model_name in ("LightGBM", "RandomForest"):
+        import joblib
+        return joblib.load(path)
+    if model_name == "ARIMA":
+        from statsmodels.tsa.arima.model import ARIMAResults
+        return ARIMAResults.load(path)
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+# ------------------Registry------------------
+def list_artifacts(model_name=None, column=None, registry_dir=REGISTRY_DIR):
+    """meta.json of every stored artifact (optionally for one model/column), oldest first."""
+    metas = []
+    models = [model_name] if model_name else sorted(os.listdir(registry_dir)) if os.path.isdir(registry_dir) else []
+    for model in models:
+        model_root = os.path.join(registry_dir, model)
+        columns = [column] if column else sorted(os.listdir(model_root)) if os.path.isdir(model_root) else []
+        for col in columns:
+            root = _model_dir(model, col, registry_dir)
+            if not os.path.isdir(root):
+                continue
+            for name in os.listdir(root):
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    with open(os.path.join(root, name, "meta.json"), encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                meta["path"] = os.path.join(root, name)
+                metas.append(meta)
+    return sorted(metas, key=lambda m: (m["model"], m["column"], m["version"], m["created"]))
+
+
+def find(model_name, column, data_version, params, registry_dir=REGISTRY_DIR):
+    """Newest artifact trained on data_version with params, or None."""
+    key = artifact_key(model_name, column, data_version, params)
+    matches = [m for m in list_artifacts(model_name, column, registry_dir) if m["key"] == key]
+    return matches[-1] if matches else None
+
+
+def register(model_name, column, fitted, data_version, params, feature_columns, metrics=None,
+             registry_dir=REGISTRY_DIR):
+    """Persist a trained model with its metadata and return the meta dict."""
+    key = artifact_key(model_name, column, data_version, params)
+    root = _model_dir(model_name, column, registry_dir)
+    os.makedirs(root, exist_ok=True)
+    existing = list_artifacts(model_name, column, registry_dir)
+    version = max((m["version"] for m in existing), default=0) + 1
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "model": model_name,
+        "column": column,
+        "version": version,
+        "key": key,
+        "data_version": data_version,
+        "params": params,
+        "features": list(feature_columns) if model_name != "ARIMA" else [],
+        "metrics": metrics or {},
+        "library": _library_version(model_name),
+        "artifact": ARTIFACT_FILES[model_name],
+        "created": time.time(),
+    }
+    final_dir = os.path.join(root, f"v{version:04d}-{key[:12]}")
+    tmp_dir = f"{final_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    _save_artifact(model_name, fitted, os.path.join(tmp_dir, meta["artifact"]))
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        # a concurrent worker registered the same version first; keep theirs
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    meta["path"] = final_dir
+
+    prune(model_name, column, registry_dir=registry_dir)
+    return meta
+
+
+def update_metrics(model_name, column, data_version, params, metrics, registry_dir=REGISTRY_DIR):
+    """Merge metrics into the matching artifact's meta.json; returns False if none is stored."""
+    meta = find(model_name, column, data_version, params, registry_dir)
+    if meta is None:
+        return False
+    path = meta.pop("path")
+    meta["metrics"] = {**meta.get("metrics", {}), **metrics}
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+    return True
+
+
+def prune(model_name, column, keep=KEEP_VERSIONS, registry_dir=REGISTRY_DIR):
+    """
+    Delete all but the newest `keep` artifacts of each configuration of a
+    model/column (a point model and its quantile variants are pruned separately).
+    """
+    groups = {}
+    for meta in list_artifacts(model_name, column, registry_dir):
+        groups.setdefault(json.dumps(meta["params"], sort_keys=True, default=str), []).append(meta)
+    for metas in groups.values():
+        for meta in metas[:-keep]:
+            with _lock:
+                _loaded.pop(meta["key"], None)
+            shutil.rmtree(meta["path"], ignore_errors=True)
+
+
+# ------------------Process-wide loaded models------------------
+def cached(key):
+    """Fitted model for an artifact key if this process already holds it, else None."""
+    with _lock:
+        fitted = _loaded.get(key)
+        if fitted is not None:
+            _loaded.move_to_end(key)
+        return fitted
+
+
+def load(meta):
+    """Return the fitted model for an artifact, reading it from disk only once per process."""
+    fitted = cached(meta["key"])
+    if fitted is None:
+        fitted = _load_artifact(meta["model"], os.path.join(meta["path"], meta["artifact"]))
+        remember(meta["key"], fitted)
+    return fitted
+
+
+def remember(key, fitted):
+    """Put a fitted model in the process cache under its artifact key."""
+    with _lock:
+        _loaded[key] = fitted
+        _loaded.move_to_end(key)
+        while len(_loaded) > MAX_LOADED:
+            _loaded.popitem(last=False)
+
+
+def clear(registry_dir=REGISTRY_DIR):
+    with _lock:
+        _loaded.clear()
+    shutil.rmtree(registry_dir, ignore_errors=True)
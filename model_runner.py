@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import time
+
+import data_store
+import forecasting
+
+# ------------------Parallel run configuration------------------
+# Every (model, target) job runs in its own worker process so a job that hits
+# its timeout, or a run the user cancels, can be terminated outright.
+DEFAULT_TIMEOUT = 10 * 60
+POLL_INTERVAL = 0.1
+
+# spawn keeps workers independent of the threads Streamlit and Tkinter run in the parent
+_context = multiprocessing.get_context("spawn")
+
+
+def all_jobs(models=None, targets=None):
+    models = models or forecasting.MODELS
+    targets = targets or list(forecasting.TARGETS)
+    return [(model, target) for model in models for target in targets]
+
+
+def default_workers(job_count):
+    return max(1, min(os.cpu_count() or 1, job_count))
+
+
+def _worker(conn, model_name, target, data_path, horizon, threads):
+    try:
+        forecasting.limit_fit_threads(threads)
+        result = forecasting.run_forecast(model_name, target, data_path=data_path, horizon=horizon)
+        conn.send(("done", result, None))
+    except Exception as e:
+        conn.send(("failed", None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _event(model_name, target, status, completed, total, elapsed, result=None, error=None):
+    return {
+        "model": model_name,
+        "target": target,
+        "status": status,
+        "result": result,
+        "error": error,
+        "elapsed": elapsed,
+        "completed": completed,
+        "total": total,
+    }
+
+
+def run_all(jobs=None, data_path="data.csv", horizon=forecasting.HORIZON_HOURS,
+            max_workers=None, timeout=DEFAULT_TIMEOUT, cancel_event=None):
+    """
+    Forecast every (model, target) job concurrently and yield one progress
+    event per finished job, in completion order.
+
+    Each event is a dict with "status" ("started", "done", "failed",
+    "timeout" or "cancelled"), the job's "model"/"target", the forecast
+    "result" when done, "elapsed" seconds and "completed"/"total" counts.
+    Setting cancel_event, or closing the generator (which is what a
+    Streamlit rerun does), terminates all running workers.
+    """
+    jobs = list(jobs or all_jobs())
+    # build the columnar store once up front instead of racing to build it in every worker
+    data_store.ensure_store(data_path)
+    total = len(jobs)
+    max_workers = max_workers or default_workers(total)
+    pending = list(jobs)
+    running = {}
+    completed = 0
+
+    try:
+        while pending or running:
+            if cancel_event is not None and cancel_event.is_set():
+                for (model_name, target), (process, _, started) in running.items():
+                    process.terminate()
+                    completed += 1
+                    yield _event(model_name, target, "cancelled", completed, total, time.time() - started)
+                running.clear()
+                for model_name, target in pending:
+                    completed += 1
+                    yield _event(model_name, target, "cancelled", completed, total, 0.0)
+                return
+
+            while pending and len(running) < max_workers:
+                model_name, target = pending.pop(0)
+                parent_conn, child_conn = _context.Pipe(duplex=False)
+                process = _context.Process(target=_worker, daemon=True,
+                                           args=(child_conn, model_name, target, data_path, horizon,
+                                                 forecasting.worker_threads(max_workers)))
+                process.start()
+                child_conn.close()
+                running[(model_name, target)] = (process, parent_conn, time.time())
+                yield _event(model_name, target, "started", completed, total, 0.0)
+
+            for job, (process, conn, started) in list(running.items()):
+                elapsed = time.time() - started
+                if conn.poll():
+                    try:
+                        status, result, error = conn.recv()
+                    except EOFError:
+                        status, result, error = "failed", None, "worker exited without a result"
+                elif not process.is_alive():
+                    status, result, error = "failed", None, f"worker exited with code {process.exitcode}"
+                elif timeout is not None and elapsed > timeout:
+                    process.terminate()
+                    status, result, error = "timeout", None, f"exceeded {timeout:.0f}s"
+                else:
+                    continue
+
+                process.join(timeout=1)
+                conn.close()
+                del running[job]
+                completed += 1
+                yield _event(job[0], job[1], status, completed, total, elapsed, result, error)
+
+            if running:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for process, conn, _ in running.values():
+            process.terminate()
+            conn.close()
@@ -0,0 +1,229 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ------------------Instrumentation configuration------------------
+# Every pipeline stage (data load, imputation, feature build, training,
+# inference, rendering) is wrapped in stage(name). Each call updates
+# in-process counters and appends one JSON line to LOG_PATH, which all
+# processes (Streamlit, the API, run-all and backtest workers) share, so the
+# Diagnostics page and the /profile endpoint see the whole pipeline.
+# Set ONTARIO_PROFILE_LOG to another path, or to an empty string to disable
+# the log. Set ONTARIO_PROFILE_MEMORY=1 to also trace Python/NumPy peak
+# allocations per stage with tracemalloc (slower).
+LOG_PATH = os.environ.get("ONTARIO_PROFILE_LOG", os.path.join(".cache", "profile.jsonl"))
+MAX_LOG_BYTES = 8 * 1024 * 1024
+# durations kept per stage for the in-process percentiles
+WINDOW = 1000
+
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+if os.environ.get("ONTARIO_PROFILE_MEMORY") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.durations = deque(maxlen=WINDOW)
+        self.peak_traced = 0
+        self.peak_rss = 0
+
+
+# ------------------Recording------------------
+def record(name, seconds, error=False, peak_traced=None, rss_delta=None, **labels):
+    """Add one completed call of stage `name` to the counters and the JSON log."""
+    peak_rss = _max_rss_bytes()
+    with _lock:
+        stats = _stats.setdefault(name, _StageStats())
+        stats.count += 1
+        stats.errors += int(error)
+        stats.total += seconds
+        stats.durations.append(seconds)
+        if peak_traced is not None:
+            stats.peak_traced = max(stats.peak_traced, peak_traced)
+        if peak_rss is not None:
+            stats.peak_rss = max(stats.peak_rss, peak_rss)
+
+    if LOG_PATH:
+        entry = {"stage": name, "seconds": seconds, "error": error, "time": time.time(), "pid": os.getpid(),
+                 "peak_traced": peak_traced, "rss_delta": rss_delta, "peak_rss": peak_rss}
+        if labels:
+            entry["labels"] = {key: str(value) for key, value in labels.items()}
+        _append_log(json.dumps(entry))
+
+
+def _append_log(line):
+    try:
+        directory = os.path.dirname(LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(LOG_PATH) and os.path.getsize(LOG_PATH) > MAX_LOG_BYTES:
+            os.replace(LOG_PATH, f"{LOG_PATH}.1")
+        # one short write per line, so concurrent processes don't interleave within a line
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def stage(name, **labels):
+    """
+    Time the enclosed block as stage `name`. With tracemalloc active, the
+    stage's peak traced allocation is recorded too; nested stages pass their
+    peaks up to the enclosing stage.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    tracing = tracemalloc.is_tracing()
+    frame = {"base": 0, "peak": 0}
+    if tracing:
+        frame["base"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        stack.remove(frame)
+        peak_traced = None
+        if tracing:
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            peak_traced = max(0, peak - frame["base"])
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        rss_after = _rss_bytes()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        record(name, seconds, error, peak_traced, rss_delta, **labels)
+
+
+def timed(name):
+    """Decorator form of stage(name)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ------------------Reporting------------------
+def _summary_row(name, durations, count, errors, total, peak_traced, peak_rss):
+    # NumPy/pandas are only needed for reporting; importing this module stays cheap
+    import numpy as np
+    durations = np.asarray(durations, dtype=float)
+    return {
+        "stage": name,
+        "count": count,
+        "errors": errors,
+        "total_s": total,
+        "mean_s": total / count if count else np.nan,
+        "p50_s": float(np.percentile(durations, 50)) if len(durations) else np.nan,
+        "p95_s": float(np.percentile(durations, 95)) if len(durations) else np.nan,
+        "max_s": float(durations.max()) if len(durations) else np.nan,
+        "peak_traced_mb": peak_traced / 1e6 if peak_traced else np.nan,
+        "peak_rss_mb": peak_rss / 1e6 if peak_rss else np.nan,
+    }
+
+
+def snapshot():
+    """Per-stage counters and percentiles for this process, as a list of dicts."""
+    with _lock:
+        items = [(name, list(s.durations), s.count, s.errors, s.total, s.peak_traced, s.peak_rss)
+                 for name, s in _stats.items()]
+    return [_summary_row(*item) for item in sorted(items)]
+
+
+def read_log(path=None, since=None):
+    """Raw entries of the shared JSON log (and its rotated predecessor) as a DataFrame."""
+    import pandas as pd
+    path = path or LOG_PATH
+    rows = []
+    for candidate in (f"{path}.1", path):
+        try:
+            with open(candidate, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    log = pd.DataFrame(rows)
+    if since is not None and not log.empty:
+        log = log[log["time"] >= since]
+    return log
+
+
+def log_summary(path=None, since=None):
+    """p50/p95 per stage across every process that wrote to the shared log."""
+    import pandas as pd
+    log = read_log(path, since)
+    columns = ["stage", "count", "errors", "total_s", "mean_s", "p50_s", "p95_s", "max_s",
+               "peak_traced_mb", "peak_rss_mb"]
+    if log.empty:
+        return pd.DataFrame(columns=columns)
+    rows = []
+    for name, group in log.groupby("stage"):
+        peak_traced = pd.to_numeric(group["peak_traced"], errors="coerce").max()
+        peak_rss = pd.to_numeric(group["peak_rss"], errors="coerce").max()
+        rows.append(_summary_row(name, group["seconds"].to_numpy(), len(group), int(group["error"].sum()),
+                                 float(group["seconds"].sum()), peak_traced if peak_traced == peak_traced else 0,
+                                 peak_rss if peak_rss == peak_rss else 0))
+    return pd.DataFrame(rows, columns=columns)
+
+
+def write_json(path):
+    """Dump this process's snapshot as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"pid": os.getpid(), "time": time.time(), "stages": snapshot()}, f, indent=2, default=float)
+
+
+def reset(clear_log=False):
+    with _lock:
+        _stats.clear()
+    if clear_log and LOG_PATH:
+        for candidate in (LOG_PATH, f"{LOG_PATH}.1"):
+            try:
+                os.remove(candidate)
+            except OSError:
+                pass
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+# ------------------Forecast result cache configuration------------------
+# Forecasts are stored as uncompressed .npz files (int64 epoch index + one
+# array per target column) under CACHE_DIR, which every Streamlit session and
+# the desktop app share. File mtimes double as the LRU clock.
+CACHE_DIR = os.path.join(".cache", "forecasts")
+MAX_BYTES = 256 * 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def cache_key(model_name, target, horizon, params, data_version):
+    """Stable hash of everything a forecast depends on."""
+    payload = json.dumps({
+        "model": model_name,
+        "target": target,
+        "horizon": int(horizon),
+        "params": params,
+        "data": data_version,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+
+def get(key, cache_dir=CACHE_DIR):
+    """Return the cached forecast for key, or None on a miss."""
+    path = _path(key, cache_dir)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            epoch = data["epoch"]
+            values = {column: data[f"value_{i}"] for i, column in enumerate(meta["columns"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+    # mark as recently used for the LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return {
+        "model": meta["model"],
+        "target": meta["target"],
+        "index": epoch.astype("datetime64[s]").astype("datetime64[ns]"),
+        "values": values,
+    }
+
+
+def put(key, result, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """Store a run_forecast result under key and evict old entries over budget."""
+    os.makedirs(cache_dir, exist_ok=True)
+    columns = list(result["values"])
+    meta = {"model": result["model"], "target": result["target"], "columns": columns}
+    arrays = {f"value_{i}": np.asarray(result["values"][column]) for i, column in enumerate(columns)}
+    arrays["epoch"] = np.asarray(result["index"]).astype("datetime64[s]").astype(np.int64)
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    path = _path(key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """Delete least recently used entries until the store fits in max_bytes."""
+    with _lock:
+        entries = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+
+
+def clear(cache_dir=CACHE_DIR):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz"):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
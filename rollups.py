@@ -0,0 +1,189 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import downsample
+import profiling
+
+# ------------------Rollup configuration------------------
+# Daily and monthly sums, counts, minima and maxima of every numeric column
+# are materialized next to the columnar store (rollup_D.npz, rollup_M.npz).
+# Ranges are located by binary search on the sorted epoch column; whole
+# periods inside a range come from the rollups and only the partial periods
+# at its edges are aggregated from the hourly rows, so range and seasonal
+# summaries are exact and cost the same for a week as for twenty years.
+# Appended hours only recompute the last stored period.
+FREQS = {"D": "datetime64[D]", "M": "datetime64[M]"}
+COLUMNS = data_store.TARGET_COLUMNS + data_store.WEATHER_COLUMNS
+STATS = ["mean", "min", "max", "sum", "count"]
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+# meteorological seasons: month 1..12 -> index into SEASONS
+SEASON_OF_MONTH = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+# ------------------Aggregation------------------
+def _empty(columns):
+    width = len(columns)
+    return {"period": np.zeros(0, dtype=np.int64), "start": np.zeros(0, dtype=np.int64),
+            "sum": np.zeros((0, width)), "count": np.zeros((0, width), dtype=np.int64),
+            "min": np.zeros((0, width)), "max": np.zeros((0, width))}
+
+
+def _aggregate(arrays, columns, lo, hi, freq):
+    """Per-period stats of rows [lo, hi); periods are numbered in FREQS units since 1970."""
+    if hi <= lo:
+        return _empty(columns)
+    keys = np.asarray(arrays[data_store.EPOCH_COLUMN][lo:hi]).astype("datetime64[s]").astype(FREQS[freq])
+    keys = keys.astype(np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    values = np.column_stack([np.asarray(arrays[col][lo:hi], dtype=np.float64) for col in columns])
+    valid = ~np.isnan(values)
+    return {"period": keys[starts], "start": lo + starts,
+            "sum": np.add.reduceat(np.where(valid, values, 0.0), starts),
+            "count": np.add.reduceat(valid.astype(np.int64), starts),
+            # fmin/fmax skip NaNs; an all-NaN period stays NaN
+            "min": np.fmin.reduceat(values, starts),
+            "max": np.fmax.reduceat(values, starts)}
+
+
+def _concat(parts):
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _path(freq, csv_path, cache_dir):
+    return os.path.join(data_store.ensure_store(csv_path, cache_dir), f"rollup_{freq}.npz")
+
+
+@profiling.timed("rollups.materialize")
+def materialize(freq, csv_path="data.csv", cache_dir=data_store.CACHE_DIR):
+    """
+    The stored rollup for freq ("D" or "M") as a dict of arrays, brought up
+    to date first. A rebuilt store starts from scratch; appended hours
+    recompute the last stored period onwards.
+    """
+    arrays = data_store.load_arrays(csv_path, cache_dir)
+    rows = len(arrays[data_store.EPOCH_COLUMN])
+    columns = [col for col in COLUMNS if col in arrays]
+    path = _path(freq, csv_path, cache_dir)
+    version = data_store.data_version(csv_path, cache_dir)
+    with _lock:
+        cached = _loaded.get(path)
+    if cached is not None and cached["version"] == version:
+        return cached
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            stored = {key: data[key] for key in data.files}
+        if list(stored["columns"]) != columns or int(stored["rows"]) > rows:
+            stored = None
+    except (OSError, ValueError, KeyError):
+        stored = None
+
+    if stored is not None and int(stored["rows"]) == rows:
+        result = stored
+    else:
+        if stored is None or len(stored["start"]) == 0:
+            result = _aggregate(arrays, columns, 0, rows, freq)
+        else:
+            # the last stored period may have been partial; redo it with the new hours
+            keep = len(stored["start"]) - 1
+            head = {key: stored[key][:keep] for key in _empty(columns)}
+            result = _concat([head, _aggregate(arrays, columns, int(stored["start"][-1]), rows, freq)])
+        result["rows"] = np.int64(rows)
+        result["columns"] = np.array(columns)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **result)
+        os.replace(tmp_path, path)
+    result["rows"] = int(result["rows"])
+    result["version"] = version
+    with _lock:
+        _loaded[path] = result
+    return result
+
+
+# ------------------Range queries------------------
+def row_range(start=None, end=None, csv_path="data.csv"):
+    """Row slice covering [start, end], found by binary search on the epoch column."""
+    return downsample.viewport(data_store.load_arrays(csv_path)[data_store.EPOCH_COLUMN], start, end)
+
+
+def select(start=None, end=None, columns=None, csv_path="data.csv"):
+    """Hourly rows in [start, end] as a DataFrame; only those rows are read from the store."""
+    arrays = data_store.load_arrays(csv_path)
+    rows = downsample.viewport(arrays[data_store.EPOCH_COLUMN], start, end)
+    index = pd.DatetimeIndex(np.asarray(arrays[data_store.EPOCH_COLUMN][rows]).astype("datetime64[s]"),
+                             name="datetime")
+    columns = columns or [name for name in arrays if name != data_store.EPOCH_COLUMN]
+    return pd.DataFrame({col: np.array(arrays[col][rows]) for col in columns}, index=index)
+
+
+def _range_aggregate(freq, start, end, csv_path):
+    """Exact per-period stats over [start, end]: stored whole periods plus recomputed edges."""
+    periods = materialize(freq, csv_path)
+    arrays = data_store.load_arrays(csv_path)
+    columns = list(periods["columns"])
+    rows = downsample.viewport(arrays[data_store.EPOCH_COLUMN], start, end)
+    starts = periods["start"]
+    ends = np.append(starts[1:], periods["rows"])
+    first = int(np.searchsorted(starts, rows.start, side="left"))
+    last = int(np.searchsorted(ends, rows.stop, side="right"))
+    if first >= last:
+        return _aggregate(arrays, columns, rows.start, rows.stop, freq), columns
+    inner = {key: periods[key][first:last] for key in _empty(columns)}
+    return _concat([_aggregate(arrays, columns, rows.start, int(starts[first]), freq), inner,
+                    _aggregate(arrays, columns, int(ends[last - 1]), rows.stop, freq)]), columns
+
+
+def _stat_frame(parts, stat, columns, index):
+    if stat == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = parts["sum"] / parts["count"]
+    else:
+        values = parts[stat]
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+@profiling.timed("rollups.query")
+def rollup(freq="D", start=None, end=None, columns=None, stat="mean", csv_path="data.csv"):
+    """Daily ("D") or monthly ("M") `stat` of each column over [start, end], one row per period."""
+    parts, names = _range_aggregate(freq, start, end, csv_path)
+    index = pd.DatetimeIndex(parts["period"].astype(FREQS[freq]).astype("datetime64[s]"), name="datetime")
+    frame = _stat_frame(parts, stat, names, index)
+    return frame[columns] if columns else frame
+
+
+def _combine(parts, groups, size):
+    width = parts["sum"].shape[1]
+    combined = {"sum": np.zeros((size, width)), "count": np.zeros((size, width), dtype=np.int64),
+                "min": np.full((size, width), np.nan), "max": np.full((size, width), np.nan)}
+    np.add.at(combined["sum"], groups, parts["sum"])
+    np.add.at(combined["count"], groups, parts["count"])
+    np.fmin.at(combined["min"], groups, parts["min"])
+    np.fmax.at(combined["max"], groups, parts["max"])
+    return combined
+
+
+@profiling.timed("rollups.query")
+def seasonal(start=None, end=None, columns=None, stat="mean", csv_path="data.csv"):
+    """`stat` of each column per meteorological season over [start, end]."""
+    parts, names = _range_aggregate("D", start, end, csv_path)
+    months = parts["period"].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    frame = _stat_frame(_combine(parts, SEASON_OF_MONTH[months], len(SEASONS)), stat, names,
+                        pd.Index(SEASONS, name="season"))
+    return frame[columns] if columns else frame
+
+
+@profiling.timed("rollups.query")
+def summary(start=None, end=None, columns=None, csv_path="data.csv"):
+    """Mean, min, max, sum and valid-hour count of each column over [start, end]."""
+    parts, names = _range_aggregate("D", start, end, csv_path)
+    total = _combine(parts, np.zeros(len(parts["period"]), dtype=np.int64), 1)
+    frame = pd.concat([_stat_frame(total, stat, names, [stat]) for stat in STATS]).T
+    frame["count"] = frame["count"].astype(np.int64)
+    return frame.loc[columns] if columns else frame
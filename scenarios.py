@@ -0,0 +1,149 @@
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import forecasting
+
+# ------------------Scenario configuration------------------
+# A scenario perturbs the exogenous inputs of a forecast: weather columns get
+# an additive offset and/or a scale, and population can follow a fixed annual
+# growth rate instead of the historical linear trend. Calendar features and
+# the base climatology are computed once and shared by every scenario; the
+# scenario stack is scored with one vectorized predict call per batch.
+SCENARIO_MODELS = ["LightGBM", "XGboost", "RandomForest"]
+DEFAULT_HORIZON = 365 * 24
+# lead-time windows summarized for every scenario
+HORIZONS = [24, 7 * 24, 30 * 24, 90 * 24, 365 * 24, 5 * 365 * 24]
+# rows per predict call; 1M rows x 14 float64 features is about 110 MB
+MAX_BATCH_ROWS = 1_000_000
+# a warming offset moves the air temperature and the temperature-derived columns together
+TEMPERATURE_COLUMNS = ["Temp (deg C)", "Dew Point Temp (deg C)", "Wind Chill"]
+
+
+def scenario(name, temp_delta=0.0, population_growth=None, offsets=None, scales=None):
+    """
+    Scenario spec. temp_delta (deg C) is added to TEMPERATURE_COLUMNS;
+    population_growth is an annual rate (0.02 = +2%/year) applied from the
+    last observed year; offsets/scales map weather columns to adjustments.
+    """
+    offsets = dict(offsets or {})
+    for col in TEMPERATURE_COLUMNS:
+        offsets[col] = offsets.get(col, 0.0) + temp_delta
+    return {"name": name, "offsets": offsets, "scales": dict(scales or {}),
+            "population_growth": population_growth}
+
+
+def scenario_grid(temp_deltas=(0.0,), population_growths=(None,)):
+    """Every combination of warming offsets and population growth rates."""
+    scenarios = []
+    for delta, growth in itertools.product(temp_deltas, population_growths):
+        growth_label = "trend" if growth is None else f"{growth:+.1%}/yr"
+        scenarios.append(scenario(f"{delta:+.1f}C, population {growth_label}", delta, growth))
+    return scenarios
+
+
+# ------------------Feature stack------------------
+def build_stack(base, scenarios, summary):
+    """
+    (scenarios, hours, features) stack from the shared base features.
+    Weather adjustments are applied as one broadcast multiply-add; only the
+    population column is rebuilt for scenarios with their own growth rate.
+    float64 keeps an unadjusted scenario identical to forecasting.predict.
+    """
+    columns = list(base.columns)
+    position = {col: i for i, col in enumerate(columns)}
+    base_matrix = base.to_numpy(dtype=np.float64)
+
+    scales = np.ones((len(scenarios), len(columns)))
+    offsets = np.zeros((len(scenarios), len(columns)))
+    for s, spec in enumerate(scenarios):
+        for col, value in spec["scales"].items():
+            scales[s, position[col]] = value
+        for col, value in spec["offsets"].items():
+            offsets[s, position[col]] = value
+    stack = base_matrix[None, :, :] * scales[:, None, :] + offsets[:, None, :]
+
+    yearly = summary.yearly_population()
+    if len(yearly):
+        last_year, last_population = yearly.index[-1], yearly.iloc[-1]
+        years_ahead = (base.index.year.to_numpy() - last_year).astype(np.float64)
+        for s, spec in enumerate(scenarios):
+            if spec["population_growth"] is not None:
+                stack[s, :, position["population"]] = last_population * (1 + spec["population_growth"]) ** years_ahead
+    return stack
+
+
+def score_stack(fitted, stack, columns):
+    """Predictions (scenarios x hours) for a feature stack, in one predict call."""
+    n_scenarios, hours, n_features = stack.shape
+    flat = pd.DataFrame(stack.reshape(-1, n_features), columns=columns)
+    return np.asarray(fitted.predict(flat), dtype=float).reshape(n_scenarios, hours)
+
+
+def summarize(names, values, horizons=HORIZONS):
+    """Mean, peak and total per scenario over the first N hours of each horizon window."""
+    rows = []
+    for hours in horizons:
+        if hours > values.shape[1]:
+            continue
+        window = values[:, :hours]
+        for name, mean, peak, total in zip(names, window.mean(axis=1), window.max(axis=1), window.sum(axis=1)):
+            rows.append({"scenario": name, "horizon_hours": hours, "mean": mean, "peak": peak, "total": total})
+    return pd.DataFrame(rows)
+
+
+# ------------------Batch scoring API------------------
+def score_scenarios(model_name, scenarios, column="hourly_demand", horizon=DEFAULT_HORIZON,
+                    data_path="data.csv", df=None, horizons=HORIZONS):
+    """
+    Score every scenario with one model over `horizon` hours. Returns a dict
+    with the forecast "index", "values" (scenarios x hours), a per-horizon
+    "summary" DataFrame and the timing/throughput figures.
+    """
+    if model_name not in SCENARIO_MODELS:
+        raise ValueError(f"Scenario scoring needs a model with exogenous inputs: {SCENARIO_MODELS}")
+    if column not in data_store.TARGET_COLUMNS:
+        raise ValueError(f"Unknown target column: {column}")
+    if not scenarios:
+        raise ValueError("No scenarios to score")
+
+    if df is None:
+        df = data_store.load_frame(data_path)
+    fitted = forecasting.get_model(model_name, df, column, data_path)
+
+    started = time.perf_counter()
+    index = forecasting.future_index(df.index[-1], horizon)
+    summary = forecasting.ExogenousSummary().update(df)
+    base = forecasting.future_features(None, index, summary)
+    prepare_seconds = time.perf_counter() - started
+
+    # as many scenarios per predict call as fit in MAX_BATCH_ROWS
+    values = np.empty((len(scenarios), horizon))
+    per_batch = max(1, MAX_BATCH_ROWS // horizon)
+    score_seconds = 0.0
+    for lo in range(0, len(scenarios), per_batch):
+        batch_started = time.perf_counter()
+        stack = build_stack(base, scenarios[lo:lo + per_batch], summary)
+        scored = time.perf_counter()
+        values[lo:lo + per_batch] = score_stack(fitted, stack, list(base.columns))
+        prepare_seconds += scored - batch_started
+        score_seconds += time.perf_counter() - scored
+
+    names = [spec["name"] for spec in scenarios]
+    seconds = time.perf_counter() - started
+    return {
+        "model": model_name,
+        "column": column,
+        "index": index.to_numpy(),
+        "scenarios": names,
+        "values": values,
+        "summary": summarize(names, values, horizons),
+        "prepare_seconds": prepare_seconds,
+        "score_seconds": score_seconds,
+        "seconds": seconds,
+        "scenarios_per_second": len(scenarios) / seconds if seconds else float("inf"),
+        "rows_per_second": values.size / seconds if seconds else float("inf"),
+    }
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# keep test runs out of the app's Diagnostics log
+os.environ.setdefault("ONTARIO_PROFILE_LOG", "")
+
+import data_store  # noqa: E402
+
+
+def hourly_records(start, hours, seed=0):
+    """data.csv-shaped records for `hours` consecutive hours from `start`."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=hours, freq="h")
+    temp = 5 + 10 * np.sin(2 * np.pi * index.hour / 24) + rng.normal(0, 1, hours)
+    records = pd.DataFrame({
+        "datetime": index.strftime(data_store.DATETIME_FORMAT),
+        "hourly_demand": 17000 + 100 * temp + rng.normal(0, 200, hours),
+        "hourly_average_price": 40 + rng.gamma(2, 5, hours),
+        "population": 14_240_000,
+        "Temp (deg C)": temp.round(1),
+        "Dew Point Temp (deg C)": (temp - 3).round(1),
+        "Rel Hum (%)": 60.0,
+        "Wind Dir (10s deg)": 18.0,
+        "Wind Spd (km/h)": 12.0,
+        "Visibility (km)": 16.1,
+        "Stn Press (kPa)": 100.2,
+        "Wind Chill": np.nan,
+    })
+    return records
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A scratch directory with a small data.csv, used as the working directory."""
+    monkeypatch.chdir(tmp_path)
+    hourly_records("2020-01-01", 24 * 14).to_csv("data.csv", index=False)
+    return tmp_path
@@ -0,0 +1,39 @@
+import numpy as np
+
+import anomalies
+import data_store
+import ingest
+from conftest import hourly_records
+
+
+def test_rolling_median_matches_batch():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.standard_t(2, 3000) * 10 + 40, 1)
+    values[rng.random(3000) < 0.05] = np.nan
+    median, mad, count = anomalies._rolling_median_mad(values, anomalies.PRICE_WINDOW)
+
+    window = anomalies.RollingMedian(anomalies.PRICE_WINDOW)
+    for i, x in enumerate(values):
+        n, m, d = window.stats()
+        assert n == count[i]
+        if n:
+            assert (m, d) == (median[i], mad[i])
+        window.push(x)
+
+
+def test_incremental_flags_match_batch(workdir):
+    records = hourly_records("2020-01-15", 24 * 10, seed=5)
+    records.loc[[30, 100, 200], "hourly_average_price"] = 900.0
+    records.loc[[50, 150], "hourly_demand"] = 40000.0
+    records.loc[[70], "Temp (deg C)"] = 35.0
+
+    anomalies.update_flags("data.csv")
+    ingest.ingest_records(records.iloc[:120])
+    ingest.ingest_records(records.iloc[120:])
+    incremental = np.array(anomalies.update_flags("data.csv"))
+
+    batch = anomalies.detect(data_store.load_arrays("data.csv"))
+    np.testing.assert_array_equal(incremental, batch)
+    stored = len(batch) - len(records)
+    for row, flag in [(30, "price_spike"), (50, "demand_spike"), (70, "heat")]:
+        assert batch[stored + row] & anomalies.FLAGS[flag]
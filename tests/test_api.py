@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+
+
+def test_identical_requests_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def scenario():
+        coalescer = api.Coalescer()
+        first = asyncio.ensure_future(coalescer.run("key", compute))
+        second = asyncio.ensure_future(coalescer.run("key", compute))
+        await asyncio.sleep(0.01)
+        # a client that goes away does not cancel the shared work
+        first.cancel()
+        result = await second
+        assert len(coalescer) == 0
+        return coalescer, result
+
+    coalescer, result = asyncio.run(scenario())
+    assert result == {"value": 1}
+    assert calls == [1]
+    assert (coalescer.started, coalescer.coalesced) == (1, 1)
+
+
+def test_concurrent_forecasts_are_coalesced(workdir, monkeypatch):
+    service = api.ForecastService()
+    jobs = []
+
+    async def in_pool(func, *args):
+        jobs.append(args)
+        await asyncio.sleep(0.05)
+        return {"model": args[0], "target": args[1], "index": ["2020-01-15T00:00"], "values": {"hourly_demand": [1.0]}}
+
+    monkeypatch.setattr(service, "_in_pool", in_pool)
+
+    async def scenario():
+        query = "/forecast?model=LightGBM&target=Electricity%20Demand&horizon=24"
+        return await asyncio.gather(*[service.dispatch("GET", query) for _ in range(3)])
+
+    results = asyncio.run(scenario())
+    assert len(jobs) == 1
+    assert all(result["horizon"] == 24 and result["values"] == {"hourly_demand": [1.0]} for result in results)
+
+
+@pytest.mark.parametrize("method, target, status", [
+    ("GET", "/nowhere", 404),
+    ("POST", "/health", 405),
+    ("GET", "/forecast?horizon=abc", 400),
+    ("GET", "/forecast?model=Prophet", 400),
+    ("GET", "/data?start=2020-01-01&columns=bogus", 400),
+    ("GET", "/data", 400),
+])
+def test_bad_requests_are_rejected(workdir, method, target, status):
+    with pytest.raises(api.HTTPError) as excinfo:
+        asyncio.run(api.ForecastService().dispatch(method, target))
+    assert excinfo.value.status == status
+
+
+def test_data_slice_over_http(workdir):
+    async def scenario():
+        server = await asyncio.start_server(api.make_handler(api.ForecastService()), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /data?start=2020-01-02T00:00&end=2020-01-02T05:00&columns=hourly_demand,"
+                         b"Wind%20Chill HTTP/1.1\r\nHost: test\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+        return response
+
+    head, body = asyncio.run(scenario()).split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    payload = json.loads(body)
+    assert payload["index"][0] == "2020-01-02T00:00" and len(payload["index"]) == 6
+    assert len(payload["columns"]["hourly_demand"]) == 6
+    # NaN readings are sent as null
+    assert payload["columns"]["Wind Chill"] == [None] * 6
@@ -0,0 +1,32 @@
+import pytest
+
+import backtest
+import data_store
+
+
+def test_expanding_folds_end_at_last_row():
+    folds = backtest.make_folds(1000, n_folds=3, horizon=100)
+    assert [(f["train_start"], f["origin"], f["test_end"]) for f in folds] == [
+        (0, 700, 800), (0, 800, 900), (0, 900, 1000)]
+    assert [f["fold"] for f in folds] == [0, 1, 2]
+
+
+def test_sliding_folds_keep_window_and_drop_short_history():
+    folds = backtest.make_folds(1000, n_folds=5, horizon=100, mode="sliding", window=300)
+    assert [(f["train_start"], f["origin"]) for f in folds] == [(200, 500), (300, 600), (400, 700),
+                                                                  (500, 800), (600, 900)]
+    # an origin with less than two horizons of training history is skipped
+    assert len(backtest.make_folds(450, n_folds=3, horizon=100)) == 2
+    with pytest.raises(ValueError):
+        backtest.make_folds(1000, mode="walk")
+
+
+def test_run_fold_scores_each_bucket(workdir):
+    data_store.ensure_store("data.csv")
+    n_rows = len(data_store.load_arrays("data.csv")[data_store.EPOCH_COLUMN])
+    [fold] = backtest.make_folds(n_rows, n_folds=1, horizon=48)
+    rows = backtest.run_fold("data.csv", "LightGBM", "hourly_demand", fold, [24, 48, 72])
+
+    assert [row["horizon_hours"] for row in rows] == [24, 48]
+    assert rows[0]["origin"] == data_store.load_frame("data.csv").index[n_rows - 48]
+    assert all(row["RMSE"] >= 0 for row in rows)
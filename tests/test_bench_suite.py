@@ -0,0 +1,34 @@
+import pandas as pd
+
+import data_store
+from benchmarks import bench_suite
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"results": [{"size": "10k", "stage": "load.store", "seconds": 0.100},
+                            {"size": "10k", "stage": "features.build", "seconds": 0.001},
+                            {"size": "10k", "stage": "train.LightGBM", "seconds": 1.0}]}
+    results = [{"size": "10k", "stage": "load.store", "seconds": 0.150},
+               {"size": "10k", "stage": "features.build", "seconds": 0.004},
+               {"size": "10k", "stage": "train.LightGBM", "seconds": 1.2},
+               {"size": "177k", "stage": "load.store", "seconds": 9.0}]
+    rows = {row["stage"]: row for row in bench_suite.compare(results, baseline, tolerance=0.3)}
+    assert set(rows) == {"load.store", "features.build", "train.LightGBM"}
+    assert rows["load.store"]["regression"]
+    # 4x slower, but by less than MIN_DELTA seconds: timer noise
+    assert not rows["features.build"]["regression"]
+    assert not rows["train.LightGBM"]["regression"]
+    assert bench_suite.compare(results, {}) == []
+
+
+def test_synthetic_csv_is_deterministic_and_loads(tmp_path, monkeypatch):
+    monkeypatch.setitem(bench_suite.SIZES, "tiny", 1000)
+    monkeypatch.setattr(bench_suite, "CSV_CHUNK_ROWS", 300)
+    first = bench_suite.synthetic_csv("tiny", bench_dir=str(tmp_path / "a"))
+    second = bench_suite.synthetic_csv("tiny", bench_dir=str(tmp_path / "b"), seed=0)
+    assert open(first, "rb").read() == open(second, "rb").read()
+
+    frame = data_store.load_frame(first, cache_dir=str(tmp_path / "cache"))
+    assert len(frame) == 1000 and frame.index[0] == pd.Timestamp(bench_suite.START)
+    assert frame.index.to_series().diff().dropna().eq(pd.Timedelta(hours=1)).all()
+    assert list(frame.columns) == list(pd.read_csv(first, nrows=1).columns[1:])
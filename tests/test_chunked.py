@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chunked
+import data_store
+import features
+import forecasting
+from conftest import hourly_records
+
+
+def test_chunked_forecast_and_scores_match_whole_frame(workdir):
+    df = data_store.load_frame("data.csv")
+    fitted = forecasting.get_model("LightGBM", df, "hourly_demand")
+    summary = chunked.exogenous_summary(chunked.iter_blocks("data.csv", block_rows=50))
+
+    blocks = list(chunked.iter_forecast("LightGBM", fitted, summary, df.index[-1], horizon=100, block_rows=30))
+    expected = forecasting.run_forecast("LightGBM", "Electricity Demand", horizon=100, use_cache=False)
+    np.testing.assert_array_equal(np.concatenate([index for index, _ in blocks]), expected["index"])
+    np.testing.assert_array_equal(np.concatenate([values for _, values in blocks]),
+                                  expected["values"]["hourly_demand"])
+
+    scored = np.concatenate([values for _, values in chunked.iter_scores(
+        "LightGBM", fitted, chunked.iter_blocks("data.csv", block_rows=50))])
+    np.testing.assert_array_equal(scored, fitted.predict(forecasting.history_features(df)))
+    assert chunked.score_to_csv("LightGBM", fitted, chunked.iter_blocks("data.csv", block_rows=50),
+                                "scores.csv") == len(df)
+    with pytest.raises(ValueError):
+        next(chunked.iter_scores("ARIMA", None, [df]))
+
+
+def test_station_features_match_per_station_builds(tmp_path):
+    stations = {"north": hourly_records("2020-01-01", 300, seed=1),
+                "south": hourly_records("2020-01-01", 300, seed=2)}
+    frames = [frame.assign(station=name) for name, frame in stations.items()]
+    # interleaved by time, as a multi-station file would be
+    combined = pd.concat(frames, ignore_index=True)
+    order = np.argsort(pd.to_datetime(combined["datetime"], format=data_store.DATETIME_FORMAT), kind="stable")
+    combined.iloc[order].to_csv(tmp_path / "stations.csv", index=False)
+
+    built = {}
+    for station, _, matrix in chunked.iter_features(chunked.iter_csv_blocks(tmp_path / "stations.csv", 77),
+                                                    station_column="station"):
+        built.setdefault(station, []).append(matrix)
+    for name, frame in stations.items():
+        frame = frame.set_index(pd.to_datetime(frame.pop("datetime"), format=data_store.DATETIME_FORMAT))
+        arrays = {col: frame[col].to_numpy() for col in frame.columns}
+        arrays[data_store.EPOCH_COLUMN] = frame.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        np.testing.assert_array_equal(np.vstack(built[name]), features.build_features(arrays).matrix)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+import data_store
+import ingest
+from conftest import hourly_records
+
+
+def test_touch_after_ingest_keeps_store_and_version(workdir, monkeypatch):
+    data_store.load_arrays("data.csv")
+    report = ingest.ingest_records(hourly_records("2020-01-15", 24, seed=1))
+    assert report["appended"] == 24
+    version = data_store.data_version("data.csv")
+    meta = data_store._read_meta(data_store.store_path("data.csv"))
+    assert meta["blocks"] == data_store.block_hashes("data.csv")
+
+    builds = []
+    monkeypatch.setattr(data_store, "build_store", lambda *args, **kwargs: builds.append(args))
+    stat = os.stat("data.csv")
+    os.utime("data.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    arrays = data_store.load_arrays("data.csv")
+    assert builds == []
+    assert len(arrays[data_store.EPOCH_COLUMN]) == 24 * 15
+    assert data_store.data_version("data.csv") == version
+
+
+def test_append_changes_version(workdir):
+    before = data_store.data_version("data.csv")
+    ingest.ingest_records(hourly_records("2020-01-15", 6, seed=2))
+    assert data_store.data_version("data.csv") != before
+
+
+def test_append_rehashes_only_the_tail(workdir, monkeypatch):
+    data_store.load_arrays("data.csv")
+    size = os.path.getsize("data.csv")
+    reads = []
+    block_hashes = data_store.block_hashes
+    monkeypatch.setattr(data_store, "block_hashes", lambda path, first_block=0: reads.append(first_block)
+                        or block_hashes(path, first_block))
+    monkeypatch.setattr(data_store, "file_hash", lambda path: 1 / 0)
+
+    ingest.ingest_records(hourly_records("2020-01-15", 24, seed=1))
+    assert reads == [size // data_store.FINGERPRINT_BLOCK_BYTES]
+    meta = data_store._read_meta(data_store.store_path("data.csv"))
+    assert meta["blocks"] == block_hashes("data.csv")
+
+
+def _csv_frame(path):
+    df = pd.read_csv(path)
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("datetime"), format=data_store.DATETIME_FORMAT),
+                                name="datetime").as_unit("s")
+    return df
+
+
+def test_store_matches_csv_for_sorted_and_unsorted_files(workdir):
+    expected = _csv_frame("data.csv")
+    data_store.build_store("data.csv", chunk_rows=50)
+    frame = data_store.load_frame("data.csv")
+    pdt.assert_frame_equal(frame, expected, check_dtype=False, rtol=1e-6)
+    assert frame["hourly_demand"].dtype == np.float64 and frame["population"].dtype == np.int64
+
+    # out of order with a duplicate hour: sorted, and the later row wins
+    shuffled = pd.read_csv("data.csv").sample(frac=1.0, random_state=0)
+    duplicate = shuffled.iloc[[0]].assign(hourly_demand=1.0)
+    pd.concat([shuffled, duplicate]).to_csv("data.csv", index=False)
+    stamp = pd.to_datetime(duplicate["datetime"], format=data_store.DATETIME_FORMAT).iloc[0]
+    expected.loc[stamp, "hourly_demand"] = 1.0
+    pdt.assert_frame_equal(data_store.load_frame("data.csv"), expected, check_dtype=False, rtol=1e-6)
+
+
+def test_rewritten_csv_rebuilds_the_store(workdir):
+    data_store.load_arrays("data.csv")
+    hourly_records("2021-01-01", 48, seed=3).to_csv("data.csv", index=False)
+    frame = data_store.load_frame("data.csv")
+    assert len(frame) == 48 and frame.index[0] == pd.Timestamp("2021-01-01")
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import downsample
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    y = np.random.default_rng(0).normal(0, 1, 10_001)
+    y[7777] = 50.0
+    y[123] = -50.0
+    indices = downsample.minmax_indices(y, 200)
+    assert len(indices) <= 200
+    assert np.all(np.diff(indices) > 0)
+    assert {123, 7777} <= set(indices)
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(5000)
+    y = np.sin(x / 200.0)
+    y[2500] = 10.0
+    indices = downsample.lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+    assert 2500 in indices
+    np.testing.assert_array_equal(downsample.lttb_indices(x[:50], y[:50], 100), np.arange(50))
+
+
+def test_decimate_drops_nan_and_rejects_unknown_method():
+    x = np.arange("2020-01-01T00", "2020-01-01T10", dtype="datetime64[h]").astype("datetime64[s]")
+    y = np.arange(10, dtype=float)
+    y[3] = np.nan
+    dx, dy = downsample.decimate(x, y, points=100)
+    assert len(dx) == 9 and not np.isnan(dy).any()
+    with pytest.raises(ValueError):
+        downsample.decimate(x, y, method="mean")
+
+
+def test_viewport_is_inclusive():
+    epoch = pd.date_range("2020-01-01", periods=48, freq="h").to_numpy(dtype="datetime64[s]").astype(np.int64)
+    assert downsample.viewport(epoch, "2020-01-01 05:00", "2020-01-01 10:00") == slice(5, 11)
+    assert downsample.viewport(epoch) == slice(0, 48)
+
+
+def test_history_series_reads_only_the_viewport(workdir):
+    frame = downsample.history_series(["hourly_demand"], "2020-01-03", "2020-01-05", points=10)
+    assert set(frame["series"]) == {"hourly_demand"}
+    assert len(frame) <= 10
+    assert frame["datetime"].min() >= pd.Timestamp("2020-01-03")
+    assert frame["datetime"].max() <= pd.Timestamp("2020-01-05")
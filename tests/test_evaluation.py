@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import evaluation
+
+
+def batches():
+    rng = np.random.default_rng(0)
+    actual = rng.normal(100, 10, 400)
+    predicted = actual + rng.normal(0, 5, 400)
+    return actual, predicted
+
+
+def test_streamed_batches_match_one_pass():
+    actual, predicted = batches()
+    threshold = evaluation.median_threshold(actual)
+    streamed = evaluation.OnlineMetrics(threshold)
+    for lo in range(0, 400, 64):
+        streamed.update(actual[lo:lo + 64], predicted[lo:lo + 64])
+    merged = evaluation.OnlineMetrics(threshold).update(actual[:150], predicted[:150]).merge(
+        evaluation.OnlineMetrics(threshold).update(actual[150:], predicted[150:]))
+    whole = evaluation.OnlineMetrics(threshold).update(actual, predicted)
+    for metrics in (streamed, merged):
+        np.testing.assert_array_equal(metrics.confusion, whole.confusion)
+        assert metrics.result() == pytest.approx(whole.result())
+
+
+def test_threshold_is_not_taken_from_the_first_batch():
+    actual, predicted = batches()
+    metrics = evaluation.OnlineMetrics().update(actual[:10], predicted[:10])
+    assert metrics.threshold is None
+    assert set(metrics.result()) == set(evaluation.REGRESSION_METRICS)
+    with pytest.raises(ValueError):
+        metrics.classification()
+
+
+def test_merge_rejects_different_thresholds():
+    actual, predicted = batches()
+    low = evaluation.OnlineMetrics(90.0).update(actual, predicted)
+    with pytest.raises(ValueError):
+        low.merge(evaluation.OnlineMetrics(110.0).update(actual, predicted))
+    with pytest.raises(ValueError):
+        low.merge(evaluation.OnlineMetrics().update(actual, predicted))
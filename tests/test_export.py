@@ -0,0 +1,28 @@
+import json
+
+import data_store
+import export
+import ingest
+from conftest import hourly_records
+
+
+def test_manifest_records_file_hash_and_data_version(workdir):
+    data_store.load_arrays("data.csv")
+    ingest.ingest_records(hourly_records("2020-01-15", 24, seed=1))
+
+    manifest = export.export(["LightGBM"], ["hourly_demand"], horizon=48, fmt="csv", chunk_hours=24,
+                             max_workers=1, run="test")
+    assert manifest["failed"] == []
+    with open(manifest["manifest_path"], encoding="utf-8") as f:
+        stored = json.load(f)
+
+    assert stored["data"]["sha1"] == data_store.file_hash("data.csv")
+    assert stored["data"]["data_version"] == data_store.data_version("data.csv")
+    assert stored["data"]["sha1"] != stored["data"]["data_version"]
+    assert stored["data"]["rows"] == 24 * 15
+
+    [partition] = stored["partitions"]
+    assert partition["rows"] == 48
+    path = workdir / export.EXPORT_DIR / "run=test" / partition["path"]
+    assert partition["sha1"] == data_store.file_hash(path)
+    assert len(export.read_partition(str(path))) == 48
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chunked
+import data_store
+import features
+from conftest import hourly_records
+
+
+@pytest.mark.parametrize("window", features.ROLLING_WINDOWS)
+def test_rolling_stats_match_pandas(window):
+    values = np.random.default_rng(0).normal(17000, 2000, 2000)
+    values[[5, 300, 301, 302, 1500]] = np.nan
+    mean, std = features._rolling_stats(values, window, 0)
+    rolling = pd.Series(values).shift(1).rolling(window, min_periods=1)
+    np.testing.assert_allclose(mean, rolling.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(std, rolling.std().to_numpy(), rtol=1e-9)
+
+
+def test_append_and_chunks_match_full_build(workdir):
+    arrays = {name: np.asarray(values) for name, values in data_store.load_arrays("data.csv").items()}
+    full = features.build_features(arrays)
+
+    grown = features.build_features({name: values[:-29] for name, values in arrays.items()})
+    grown.append({name: values[-29:-3] for name, values in arrays.items()})
+    grown.append({name: values[-3:] for name, values in arrays.items()})
+    np.testing.assert_array_equal(grown.matrix, full.matrix)
+
+    blocks = chunked.iter_blocks("data.csv", block_rows=53)
+    matrix = np.vstack([block for _, _, block in chunked.iter_features(blocks)])
+    np.testing.assert_array_equal(matrix, full.matrix)
+
+
+def test_tail_with_offset_matches_full_history():
+    # a row's stats depend only on its own window, not on the history before it
+    values = hourly_records("2020-01-01", 24 * 60)["hourly_demand"].to_numpy()
+    mean, _ = features._rolling_stats(values, 168, 1000, offset=0)
+    tail_mean, _ = features._rolling_stats(values[1000 - 168:], 168, 168, offset=1000 - 168)
+    np.testing.assert_array_equal(mean, tail_mean)
+
+
+def test_calendar_features_match_pandas():
+    index = pd.date_range("2019-12-25", "2021-03-05", freq="7h")
+    calendar = features.calendar_arrays(index.to_numpy(dtype="datetime64[s]").astype(np.int64))
+    np.testing.assert_array_equal(calendar["hour"], index.hour)
+    np.testing.assert_array_equal(calendar["dayofweek"], index.dayofweek)
+    np.testing.assert_array_equal(calendar["month"], index.month)
+    np.testing.assert_array_equal(calendar["dayofyear"], index.dayofyear)
+    np.testing.assert_array_equal(calendar["is_weekend"], index.dayofweek >= 5)
+
+
+def test_lag_and_passthrough_columns_match_the_source(workdir):
+    frame = data_store.load_frame("data.csv")
+    built = features.build_features(data_store.load_arrays("data.csv")).frame()
+    assert list(built.columns) == features.feature_columns()
+    for lag in features.LAGS:
+        expected = frame["hourly_demand"].shift(lag).astype(np.float32)
+        np.testing.assert_array_equal(built[f"hourly_demand_lag{lag}"], expected)
+    np.testing.assert_array_equal(built["Temp (deg C)"], frame["Temp (deg C)"].astype(np.float32))
+    assert built.index.equals(frame.index)
@@ -0,0 +1,61 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+import forecasting
+import model_registry
+
+
+def test_pool_workers_fit_with_their_share_of_threads():
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=forecasting.limit_fit_threads,
+                             initargs=(1,)) as pool:
+        estimators = [pool.submit(forecasting._make_regressor, name).result()
+                      for name in ("LightGBM", "XGboost", "RandomForest")]
+    assert [estimator.n_jobs for estimator in estimators] == [1, 1, 1]
+    # the parent process and the hyperparameters (and so the cache keys) are untouched
+    assert forecasting._fit_threads is None
+    assert forecasting.MODEL_PARAMS["RandomForest"]["n_jobs"] == -1
+
+
+def test_worker_threads_split_the_cores(monkeypatch):
+    monkeypatch.setattr(forecasting.os, "cpu_count", lambda: 8)
+    assert forecasting.worker_threads(4) == 2
+    assert forecasting.worker_threads(16) == 1
+
+
+def test_unreadable_artifact_warns_and_retrains(workdir, monkeypatch, capsys):
+    df = data_store.load_frame("data.csv")
+    params = {"n_estimators": 5, "verbose": -1}
+    forecasting.get_model("LightGBM", df, "hourly_demand", params=params)
+    model_registry._loaded.clear()
+    monkeypatch.setattr(model_registry, "_load_artifact", lambda *args: 1 / 0)
+
+    with pytest.warns(RuntimeWarning, match="Could not load LightGBM artifact"):
+        fitted = forecasting.get_model("LightGBM", df, "hourly_demand", params=params)
+    assert fitted.n_estimators == 5
+    assert capsys.readouterr().out == ""
+
+
+def test_run_forecast_covers_the_hours_after_the_data(workdir):
+    result = forecasting.run_forecast("LightGBM", "Electricity Demand & Electricity Price", horizon=36,
+                                      use_cache=False)
+    last = data_store.load_frame("data.csv").index[-1]
+    frame = forecasting.forecast_frame(result)
+    assert list(frame.columns) == ["hourly_demand", "hourly_average_price"]
+    assert len(frame) == 36 and frame.index[0] == last + pd.Timedelta(hours=1)
+    assert (frame.index.to_series().diff().dropna() == pd.Timedelta(hours=1)).all()
+    assert np.isfinite(frame.to_numpy()).all()
+    with pytest.raises(ValueError):
+        forecasting.run_forecast("Prophet", "Electricity Demand")
+
+
+def test_repeat_forecast_is_served_from_the_result_cache(workdir, monkeypatch):
+    first = forecasting.run_forecast("LightGBM", "Electricity Demand", horizon=24)
+    monkeypatch.setattr(forecasting, "get_model", lambda *args, **kwargs: 1 / 0)
+    second = forecasting.run_forecast("LightGBM", "Electricity Demand", horizon=24)
+    np.testing.assert_array_equal(second["values"]["hourly_demand"], first["values"]["hourly_demand"])
@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tkinter")
+pytest.importorskip("PIL")
+
+spec = importlib.util.spec_from_file_location(
+    "gui", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "2.py"))
+gui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui)
+
+
+def event(model, completed, status="done"):
+    return {"model": model, "target": "Electricity Demand", "status": status, "error": None,
+            "elapsed": 1.0, "completed": completed, "total": 8, "result": None}
+
+
+def test_events_from_a_cancelled_run_are_dropped():
+    shown = []
+    app = SimpleNamespace(run_all_status={}, run_all_results=[], _set_output_text=shown.append)
+    old_run, new_run = threading.Event(), threading.Event()
+    app.run_all_cancel = new_run
+
+    gui.EnergyPredictionGUI._show_run_all_progress(app, event("ARIMA", 5), old_run)
+    assert shown == [] and app.run_all_status == {}
+
+    gui.EnergyPredictionGUI._show_run_all_progress(app, event("LightGBM", 1, "started"), new_run)
+    assert shown[-1].splitlines()[0] == "Finished 1/8 jobs"
+    assert list(app.run_all_status) == [("LightGBM", "Electricity Demand")]
+
+
+class Frame:
+    def __init__(self):
+        self.packed = False
+
+    def pack(self, **kwargs):
+        self.packed = True
+
+    def pack_forget(self):
+        self.packed = False
+
+
+def test_pages_are_built_on_first_visit_only():
+    built = []
+    app = SimpleNamespace(page_frames={}, current_page=None)
+
+    def builder(name):
+        def build():
+            built.append(name)
+            setattr(app, f"{name}_frame", Frame())
+        return build
+
+    app.page_builders = {name: (builder(name), f"{name}_frame") for name in ("home", "predict")}
+    for page in ("home", "predict", "home", "predict"):
+        gui.EnergyPredictionGUI.show_page(app, page)
+    assert built == ["home", "predict"]
+    assert app.current_page == "predict"
+    assert app.predict_frame.packed and not app.home_frame.packed
+
+
+def test_background_results_are_handed_to_the_ui_thread(tmp_path):
+    path = tmp_path / "figure.png"
+    gui.Image.new("RGB", (1200, 800)).save(path)
+    app = SimpleNamespace(executor=ThreadPoolExecutor(max_workers=2), ui_queue=queue.Queue())
+    app.call_in_ui = lambda callback, *args: gui.EnergyPredictionGUI.call_in_ui(app, callback, *args)
+    app._finish_future = lambda *args: gui.EnergyPredictionGUI._finish_future(app, *args)
+
+    done, failed = [], []
+    gui.EnergyPredictionGUI.run_in_background(app, lambda: gui.decode_thumbnail(str(path), (300, 300)),
+                                              done.append, failed.append)
+    gui.EnergyPredictionGUI.run_in_background(app, lambda: 1 / 0, done.append, failed.append)
+    app.executor.shutdown(wait=True)
+    # nothing runs on the worker threads; the UI loop drains the queue
+    assert done == [] and failed == []
+    while not app.ui_queue.empty():
+        callback, args = app.ui_queue.get_nowait()
+        callback(*args)
+    assert [image.size for image in done] == [(300, 200)]
+    assert [type(error) for error in failed] == [ZeroDivisionError]
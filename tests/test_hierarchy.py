@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import hierarchy
+
+HIERARCHY = {"Ontario": ["North", "South"], "North": ["Northeast", "Northwest"],
+             "South": ["Toronto", "Ottawa", "West"]}
+
+
+def _base(hours, seed=0):
+    rng = np.random.default_rng(seed)
+    nodes, leaves, S = hierarchy.summing_matrix(HIERARCHY)
+    leaf_values = rng.uniform(500, 3000, (len(leaves), hours))
+    # incoherent base forecasts: the true sums plus independent noise per node
+    return S @ leaf_values + rng.normal(0, 50, (len(nodes), hours)), rng.normal(0, 50, (len(nodes), 200))
+
+
+def test_summing_matrix_orders_aggregates_before_leaves():
+    nodes, leaves, S = hierarchy.summing_matrix(HIERARCHY)
+    assert nodes == ["Ontario", "North", "South", "Northeast", "Northwest", "Toronto", "Ottawa", "West"]
+    assert leaves == nodes[3:]
+    np.testing.assert_array_equal(S.toarray()[:3], [[1, 1, 1, 1, 1], [1, 1, 0, 0, 0], [0, 0, 1, 1, 1]])
+    with pytest.raises(ValueError):
+        hierarchy.summing_matrix({"A": ["x"], "B": ["y"]})
+
+
+@pytest.mark.parametrize("method, weights", [("bottom_up", None), ("top_down", None)]
+                         + [("mint", weights) for weights in hierarchy.MINT_WEIGHTS])
+def test_reconciled_forecasts_are_coherent(method, weights):
+    base, residuals = _base(24)
+    nodes, leaves, S = hierarchy.summing_matrix(HIERARCHY)
+    proportions = np.full(len(leaves), 1 / len(leaves))
+    reconciled = hierarchy.reconcile(base, S, method, proportions, weights or "variance", residuals)
+    result = {"hierarchy": HIERARCHY, "leaves": leaves, "base": base, "reconciled": {method: reconciled}}
+    assert hierarchy.coherence_error(result, method) < 1e-6
+    assert hierarchy.coherence_error(result) > 1
+    if method == "top_down":
+        np.testing.assert_allclose(reconciled[0], base[0])
+
+
+def test_mint_long_horizon_matches_short_solve():
+    _, _, S = hierarchy.summing_matrix(HIERARCHY)
+    base, residuals = _base(48)
+    long = hierarchy.mint(base, S, "variance", residuals)
+    short = np.hstack([hierarchy.mint(base[:, i:i + 4], S, "variance", residuals) for i in range(0, 48, 4)])
+    np.testing.assert_allclose(long, short, rtol=1e-10)
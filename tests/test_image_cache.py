@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import image_cache
+
+
+@pytest.fixture
+def figure(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path / "thumbnails"))
+    image_cache.clear()
+    path = tmp_path / "figure.png"
+    Image.new("RGB", (1200, 800), "navy").save(path)
+    yield str(path)
+    image_cache.clear()
+
+
+def _counting_renders(monkeypatch):
+    renders = []
+    render = image_cache.render_thumbnail
+    monkeypatch.setattr(image_cache, "render_thumbnail", lambda *args: renders.append(args) or render(*args))
+    return renders
+
+
+def test_thumbnail_is_downscaled(figure):
+    with Image.open(io.BytesIO(image_cache.thumbnail_bytes(figure, 300))) as thumb:
+        assert thumb.size == (300, 200)
+        assert thumb.format == image_cache.THUMBNAIL_FORMAT
+
+
+def test_memory_then_disk_then_render(figure, monkeypatch):
+    renders = _counting_renders(monkeypatch)
+    data = image_cache.thumbnail_bytes(figure, 300)
+    assert image_cache.thumbnail_bytes(figure, 300) == data
+    image_cache.clear()
+    assert image_cache.thumbnail_bytes(figure, 300) == data
+    assert len(renders) == 1
+
+    # a new width or a rewritten file is a new entry
+    image_cache.thumbnail_bytes(figure, 150)
+    stat = os.stat(figure)
+    os.utime(figure, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    image_cache.thumbnail_bytes(figure, 300)
+    assert len(renders) == 3
+
+
+def test_memory_cache_evicts_least_recently_used(figure, monkeypatch):
+    monkeypatch.setattr(image_cache, "MAX_MEMORY_BYTES", 25)
+    image_cache._remember("a", b"x" * 10)
+    image_cache._remember("b", b"x" * 10)
+    assert image_cache._lookup("a") is not None
+    image_cache._remember("c", b"x" * 10)
+    assert image_cache._lookup("b") is None
+    assert image_cache._lookup("a") is not None and image_cache._lookup("c") is not None
+
+
+def test_listing_is_refreshed_when_the_folder_changes(figure, tmp_path):
+    folder = str(tmp_path)
+    assert image_cache.list_images(folder) == ["figure.png"]
+    Image.new("RGB", (10, 10)).save(tmp_path / "another.png")
+    stat = os.stat(folder)
+    os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert image_cache.list_images(folder) == ["another.png", "figure.png"]
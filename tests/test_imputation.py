@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+import data_store
+import imputation
+from conftest import hourly_records
+
+
+def _frame(hours, seed=0):
+    frame = hourly_records("2020-01-01", hours, seed=seed)
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("datetime"), format=data_store.DATETIME_FORMAT),
+                                   name="datetime")
+    return frame
+
+
+def _gappy(hours=500, seed=0):
+    frame = _frame(hours, seed)
+    rng = np.random.default_rng(seed + 1)
+    for column in ["Temp (deg C)", "Wind Spd (km/h)", "Rel Hum (%)"]:
+        frame.loc[frame.index[rng.choice(hours, hours // 10, replace=False)], column] = np.nan
+    frame.iloc[100:160, frame.columns.get_loc("Temp (deg C)")] = np.nan
+    return frame
+
+
+def test_chunked_matches_single_pass():
+    frame = _gappy()
+    whole = imputation.impute_frame(frame, chunk_rows=len(frame))
+    pdt.assert_frame_equal(imputation.impute_frame(frame, chunk_rows=37), whole)
+    assert not whole[imputation.LINEAR_COLUMNS].isna().any().any()
+
+
+def test_gaps_interpolate_linearly_and_zero_means_missing():
+    frame = _frame(48)
+    frame["Temp (deg C)"] = np.arange(48) - 20.0
+    frame.iloc[10:14, frame.columns.get_loc("Temp (deg C)")] = np.nan
+    frame.iloc[20, frame.columns.get_loc("Rel Hum (%)")] = 0.0
+    frame.iloc[19, frame.columns.get_loc("Rel Hum (%)")] = 50.0
+    frame.iloc[21, frame.columns.get_loc("Rel Hum (%)")] = 70.0
+    out = imputation.impute_frame(frame, chunk_rows=12)
+    np.testing.assert_allclose(out["Temp (deg C)"].to_numpy(), np.arange(48) - 20.0)
+    assert out["Rel Hum (%)"].iloc[20] == 60.0
+
+
+def test_wind_direction_interpolates_through_north():
+    frame = _frame(3)
+    frame[imputation.CIRCULAR_COLUMN] = [35.0, np.nan, 3.0]
+    out = imputation.impute_frame(frame)
+    assert out[imputation.CIRCULAR_COLUMN].iloc[1] == 1.0
+
+
+def test_trailing_gap_is_held_then_forward_filled():
+    frame = _frame(24)
+    frame.iloc[20:, frame.columns.get_loc("Temp (deg C)")] = np.nan
+    imputer = imputation.Imputer()
+    assert len(imputer.process(frame)) == 20
+    tail = imputer.flush()
+    assert len(tail) == 4
+    assert (tail["Temp (deg C)"] == frame["Temp (deg C)"].iloc[19]).all()
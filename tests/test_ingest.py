@@ -0,0 +1,25 @@
+import data_store
+import ingest
+from conftest import hourly_records
+
+
+def test_outage_is_not_interpolated(workdir):
+    stored = len(data_store.load_arrays("data.csv")[data_store.EPOCH_COLUMN])
+    # 13 months later: the hours in between are an outage, not a short gap
+    report = ingest.ingest_records(hourly_records("2021-02-15", 50, seed=3))
+    frame = data_store.load_frame("data.csv")
+    gap = frame.iloc[stored:-50]
+    assert report["appended"] == len(frame) - stored
+    assert report["missing_hours"] == len(gap)
+    assert gap["hourly_demand"].isna().all() and gap["Temp (deg C)"].isna().all()
+    assert not frame.iloc[-50:]["hourly_demand"].isna().any()
+
+
+def test_short_gap_is_interpolated_and_counted(workdir):
+    records = hourly_records("2020-01-15", 12, seed=4)
+    records = records.drop(index=[3, 4, 5])
+    report = ingest.ingest_records(records)
+    frame = data_store.load_frame("data.csv")
+    assert report["appended"] == 12
+    assert report["filled_hours"]["hourly_demand"] == 3
+    assert not frame["hourly_demand"].iloc[-12:].isna().any()
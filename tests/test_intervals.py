@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import intervals
+
+
+def spiky_residuals(days=30):
+    """Hourly residuals that are 0 except for 100 at 12:00, with NaN gaps at other hours."""
+    epoch = pd.date_range("2021-01-01", periods=24 * days, freq="h").to_numpy(dtype="datetime64[s]").astype(np.int64)
+    residuals = np.where(epoch // 3600 % 24 == 12, 100.0, 0.0)
+    residuals[[5, 24 * 3 + 20, 24 * 10 + 1, 24 * 11 + 2, 24 * 11 + 3]] = np.nan
+    return epoch, residuals
+
+
+@pytest.mark.parametrize("first_hour", [0, 7])
+def test_bootstrap_keeps_hour_of_day_across_nan_gaps(first_hour):
+    epoch, residuals = spiky_residuals()
+    index = pd.date_range(pd.Timestamp("2022-03-01") + pd.Timedelta(hours=first_hour), periods=72, freq="h")
+    bands = intervals.bootstrap_forecast(np.zeros(len(index)), index, epoch, residuals,
+                                         quantiles=(0.01, 0.99), paths=200)
+    expected = np.where(index.hour == 12, 100.0, 0.0)
+    # every drawn day puts its spike at noon, so even the 1% and 99% bands are exact
+    np.testing.assert_array_equal(bands[0], expected)
+    np.testing.assert_array_equal(bands[1], expected)
+
+
+def test_bootstrap_needs_a_complete_block():
+    epoch, _ = spiky_residuals()
+    epoch, residuals = epoch[:72], np.zeros(72)
+    residuals[::20] = np.nan
+    index = pd.date_range("2022-03-01", periods=24, freq="h")
+    with pytest.raises(ValueError):
+        intervals.bootstrap_forecast(np.zeros(24), index, epoch, residuals)
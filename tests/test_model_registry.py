@@ -0,0 +1,62 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import forecasting
+import model_registry
+
+
+@pytest.fixture
+def forest():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = X[:, 0] * 3 + rng.normal(size=200)
+    return RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(X, y), X
+
+
+def test_random_forest_round_trip_is_uncompressed(tmp_path, forest):
+    fitted, X = forest
+    meta = model_registry.register("RandomForest", "hourly_demand", fitted, "v1", {"n_estimators": 5},
+                                   ["a", "b", "c", "d"], registry_dir=str(tmp_path))
+    path = tmp_path / meta["path"] / meta["artifact"]
+    # an uncompressed joblib file starts with the raw pickle protocol byte, not a zlib/lz4 header
+    assert path.read_bytes()[:1] == b"\x80"
+    assert joblib.load(path).n_estimators == 5
+
+    model_registry._loaded.clear()
+    loaded = model_registry.load(meta)
+    np.testing.assert_array_equal(loaded.predict(X), fitted.predict(X))
+    # the tree arrays are ordinary in-memory arrays, not views of the file
+    tree = loaded.estimators_[0].tree_
+    assert not isinstance(tree.threshold, np.memmap)
+
+
+def test_load_reads_artifact_once_per_process(tmp_path, forest, monkeypatch):
+    fitted, _ = forest
+    meta = model_registry.register("RandomForest", "hourly_demand", fitted, "v1", {"n_estimators": 5},
+                                   ["a", "b", "c", "d"], registry_dir=str(tmp_path))
+    model_registry._loaded.clear()
+    reads = []
+    load_artifact = model_registry._load_artifact
+    monkeypatch.setattr(model_registry, "_load_artifact",
+                        lambda *args: reads.append(args) or load_artifact(*args))
+    first = model_registry.load(meta)
+    assert model_registry.load(meta) is first
+    assert len(reads) == 1
+
+
+@pytest.mark.parametrize("model_name", ["LightGBM", "XGboost", "RandomForest"])
+def test_registry_load_returns_the_fitted_type(tmp_path, model_name):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 4))
+    y = X[:, 1] * 2 + rng.normal(size=300)
+    params = {"LightGBM": {"n_estimators": 20, "verbose": -1}, "XGboost": {"n_estimators": 20},
+              "RandomForest": {"n_estimators": 5, "random_state": 0}}[model_name]
+    fitted = forecasting._make_regressor(model_name, params).fit(X, y)
+    meta = model_registry.register(model_name, "hourly_demand", fitted, "v1", params, ["a", "b", "c", "d"],
+                                   registry_dir=str(tmp_path))
+    model_registry._loaded.clear()
+    loaded = model_registry.load(meta)
+    assert type(loaded) is type(fitted)
+    np.testing.assert_allclose(loaded.predict(X), fitted.predict(X), rtol=1e-6)
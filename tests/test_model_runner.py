@@ -0,0 +1,34 @@
+import threading
+
+import numpy as np
+
+import forecasting
+import model_runner
+
+JOBS = [("LightGBM", "Electricity Demand"), ("LightGBM", "Electricity Price")]
+
+
+def test_run_all_reports_every_job(workdir):
+    events = list(model_runner.run_all(JOBS, horizon=24, max_workers=2))
+    finished = [event for event in events if event["status"] != "started"]
+    assert sorted((event["model"], event["target"]) for event in finished) == sorted(JOBS)
+    assert [event["completed"] for event in finished] == [1, 2]
+    assert all(event["status"] == "done" and event["total"] == 2 for event in finished)
+
+    for event in finished:
+        expected = forecasting.run_forecast(event["model"], event["target"], horizon=24, use_cache=False)
+        for column, values in expected["values"].items():
+            np.testing.assert_array_equal(event["result"]["values"][column], values)
+
+
+def test_cancel_and_timeout_stop_the_workers(workdir):
+    cancel = threading.Event()
+    events = []
+    for event in model_runner.run_all(JOBS, horizon=24, max_workers=1, cancel_event=cancel):
+        events.append(event)
+        cancel.set()
+    assert [event["status"] for event in events] == ["started", "cancelled", "cancelled"]
+    assert events[-1]["completed"] == events[-1]["total"] == 2
+
+    events = list(model_runner.run_all(JOBS[:1], horizon=24, timeout=0))
+    assert events[-1]["status"] == "timeout"
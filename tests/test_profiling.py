@@ -0,0 +1,64 @@
+import os
+import tracemalloc
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "profile.jsonl")
+    monkeypatch.setattr(profiling, "LOG_PATH", path)
+    profiling.reset()
+    yield path
+    profiling.reset()
+
+
+def test_stages_count_calls_and_errors(log_path):
+    @profiling.timed("test.work")
+    def work(fail=False):
+        if fail:
+            raise KeyError("boom")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(KeyError):
+        work(fail=True)
+    with profiling.stage("test.other", rows=10):
+        pass
+
+    rows = {row["stage"]: row for row in profiling.snapshot()}
+    assert rows["test.work"]["count"] == 2 and rows["test.work"]["errors"] == 1
+    assert rows["test.other"]["count"] == 1
+
+    log = profiling.read_log(log_path)
+    assert list(log["stage"]) == ["test.work", "test.work", "test.other"]
+    assert log["labels"].iloc[2] == {"rows": "10"}
+    summary = profiling.log_summary(log_path).set_index("stage")
+    assert summary.loc["test.work", "errors"] == 1
+
+
+def test_log_rotates_past_the_size_limit(log_path, monkeypatch):
+    monkeypatch.setattr(profiling, "MAX_LOG_BYTES", 200)
+    for i in range(10):
+        profiling.record("test.rotate", i / 100)
+    # only the current file and one rotated predecessor are kept
+    log = profiling.read_log(log_path)
+    assert 2 <= len(log) < 10
+    assert log["seconds"].iloc[-1] == 0.09
+    assert os.path.getsize(log_path) < 2 * 200
+
+
+def test_nested_peak_is_passed_to_the_enclosing_stage(log_path):
+    tracemalloc.start()
+    try:
+        with profiling.stage("test.outer"):
+            with profiling.stage("test.inner"):
+                block = bytearray(8_000_000)
+                del block
+    finally:
+        tracemalloc.stop()
+    log = profiling.read_log(log_path).set_index("stage")
+    assert log.loc["test.inner", "peak_traced"] >= 8_000_000
+    assert log.loc["test.outer", "peak_traced"] >= log.loc["test.inner", "peak_traced"]
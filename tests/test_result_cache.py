@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+import result_cache
+
+
+def _result(hours, scale=1.0):
+    index = np.datetime64("2020-01-01T00", "h") + np.arange(hours).astype("timedelta64[h]")
+    return {
+        "model": "LightGBM",
+        "target": "hourly_demand",
+        "index": index.astype("datetime64[ns]"),
+        "values": {"hourly_demand": scale * np.arange(hours, dtype=float)},
+    }
+
+
+def test_key_depends_on_every_input():
+    base = result_cache.cache_key("LightGBM", "hourly_demand", 24, {"n_estimators": 100}, "v1")
+    assert base == result_cache.cache_key("LightGBM", "hourly_demand", 24, {"n_estimators": 100}, "v1")
+    assert base != result_cache.cache_key("XGboost", "hourly_demand", 24, {"n_estimators": 100}, "v1")
+    assert base != result_cache.cache_key("LightGBM", "hourly_demand", 48, {"n_estimators": 100}, "v1")
+    assert base != result_cache.cache_key("LightGBM", "hourly_demand", 24, {"n_estimators": 200}, "v1")
+    assert base != result_cache.cache_key("LightGBM", "hourly_demand", 24, {"n_estimators": 100}, "v2")
+
+
+def test_put_get_round_trip(tmp_path):
+    result = _result(48)
+    result_cache.put("a", result, cache_dir=str(tmp_path))
+    cached = result_cache.get("a", cache_dir=str(tmp_path))
+    assert cached["model"] == "LightGBM" and cached["target"] == "hourly_demand"
+    np.testing.assert_array_equal(cached["index"], result["index"])
+    np.testing.assert_array_equal(cached["values"]["hourly_demand"], result["values"]["hourly_demand"])
+    assert result_cache.get("missing", cache_dir=str(tmp_path)) is None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path)
+    for i, key in enumerate("abc"):
+        result_cache.put(key, _result(1000, scale=i), cache_dir=cache_dir)
+        path = os.path.join(cache_dir, f"{key}.npz")
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+    entry_bytes = os.path.getsize(os.path.join(cache_dir, "a.npz"))
+
+    # reading "a" makes it the most recent, so "b" is the oldest entry
+    assert result_cache.get("a", cache_dir=cache_dir) is not None
+    result_cache.evict(cache_dir, max_bytes=2 * entry_bytes)
+
+    assert sorted(os.listdir(cache_dir)) == ["a.npz", "c.npz"]
+    assert result_cache.get("b", cache_dir=cache_dir) is None
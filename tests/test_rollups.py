@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import ingest
+import rollups
+from conftest import hourly_records
+
+
+def _assert_same(stored, expected):
+    for key in rollups._empty([]):
+        np.testing.assert_array_equal(stored[key], expected[key])
+
+
+def test_incremental_rollup_matches_fresh_build(workdir):
+    for freq in rollups.FREQS:
+        rollups.materialize(freq)
+    # 30 hours: finishes the stored last day and starts a new partial one
+    ingest.ingest_records(hourly_records("2020-01-15", 30, seed=2))
+
+    arrays = data_store.load_arrays("data.csv")
+    rows = len(arrays[data_store.EPOCH_COLUMN])
+    for freq in rollups.FREQS:
+        stored = rollups.materialize(freq)
+        assert stored["rows"] == rows
+        _assert_same(stored, rollups._aggregate(arrays, list(stored["columns"]), 0, rows, freq))
+
+
+def test_range_queries_match_hourly_aggregation(workdir):
+    start, end = pd.Timestamp("2020-01-02 05:00"), pd.Timestamp("2020-01-11 17:00")
+    hourly = data_store.load_frame("data.csv").loc[start:end, ["hourly_demand", "Temp (deg C)"]]
+
+    daily = rollups.rollup("D", start, end, columns=["hourly_demand", "Temp (deg C)"], stat="max")
+    expected = hourly.resample("D").max()
+    np.testing.assert_array_equal(daily.to_numpy(), expected.to_numpy())
+    assert list(daily.index) == list(expected.index)
+
+    summary = rollups.summary(start, end, columns=["hourly_demand", "Temp (deg C)"])
+    np.testing.assert_allclose(summary["mean"].to_numpy(), hourly.astype(np.float64).mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(summary["min"].to_numpy(), hourly.min().to_numpy())
+    assert list(summary["count"]) == [len(hourly)] * 2
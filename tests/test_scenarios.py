@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import data_store
+import forecasting
+import scenarios
+
+
+def test_unadjusted_scenario_matches_forecast(workdir, monkeypatch):
+    specs = [scenarios.scenario("base"), scenarios.scenario("warm", temp_delta=3.0),
+             scenarios.scenario("growth", population_growth=0.5)]
+    result = scenarios.score_scenarios("LightGBM", specs, horizon=48, horizons=[24, 48])
+    forecast = forecasting.run_forecast("LightGBM", "Electricity Demand", horizon=48, use_cache=False)
+    np.testing.assert_array_equal(result["values"][0], forecast["values"]["hourly_demand"])
+    np.testing.assert_array_equal(result["index"], forecast["index"])
+    assert list(result["summary"]["horizon_hours"]) == [24] * 3 + [48] * 3
+
+    # one scenario per predict call gives the same values
+    monkeypatch.setattr(scenarios, "MAX_BATCH_ROWS", 48)
+    batched = scenarios.score_scenarios("LightGBM", specs, horizon=48, horizons=[48])
+    np.testing.assert_array_equal(batched["values"], result["values"])
+
+
+def test_stack_applies_offsets_scales_and_growth(workdir):
+    df = data_store.load_frame("data.csv")
+    summary = forecasting.ExogenousSummary().update(df)
+    index = forecasting.future_index(df.index[-1], 24)
+    base = forecasting.future_features(None, index, summary)
+    specs = [scenarios.scenario("base"),
+             scenarios.scenario("windy", temp_delta=-2.0, scales={"Wind Spd (km/h)": 1.5}),
+             scenarios.scenario("growth", population_growth=0.1)]
+    stack = scenarios.build_stack(base, specs, summary)
+
+    np.testing.assert_array_equal(stack[0], base.to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(stack[1][:, base.columns.get_loc("Temp (deg C)")], base["Temp (deg C)"] - 2.0)
+    np.testing.assert_allclose(stack[1][:, base.columns.get_loc("Wind Spd (km/h)")], base["Wind Spd (km/h)"] * 1.5)
+    last_population = summary.yearly_population().iloc[-1]
+    assert pd.Timestamp(index[0]).year == summary.yearly_population().index[-1]
+    np.testing.assert_allclose(stack[2][:, base.columns.get_loc("population")], last_population)
+
+
+def test_grid_covers_every_combination():
+    grid = scenarios.scenario_grid((0.0, 1.5), (None, 0.02))
+    assert len(grid) == 4
+    assert grid[3]["name"] == "+1.5C, population +2.0%/yr"
+    assert grid[3]["offsets"]["Wind Chill"] == 1.5
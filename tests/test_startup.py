@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pandas", "numpy", "altair", "matplotlib", "sklearn", "lightgbm", "xgboost", "statsmodels",
+         "data_store", "forecasting"]
+
+IMPORTED = """
+import importlib.util, json, sys
+{setup}
+print(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+"""
+
+
+def _heavy_modules_after(setup):
+    completed = subprocess.run([sys.executable, "-c", IMPORTED.format(setup=setup, heavy=HEAVY)], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_streamlit_app_imports_no_heavy_modules():
+    pytest.importorskip("streamlit")
+    assert _heavy_modules_after("import streamlit, main") == []
+
+
+def test_desktop_app_imports_no_heavy_modules():
+    pytest.importorskip("tkinter")
+    setup = ("spec = importlib.util.spec_from_file_location('gui', '2.py')\n"
+             "spec.loader.exec_module(importlib.util.module_from_spec(spec))")
+    assert _heavy_modules_after(setup) == []
@@ -0,0 +1,55 @@
+import json
+import sqlite3
+from concurrent.futures import Future
+
+import numpy as np
+
+import tuning
+
+
+class FailingFirstTrialPool:
+    """Runs nothing: fits with bad_params raise, every other fit scores 1.0."""
+
+    def __init__(self, bad_params):
+        self.bad_params = bad_params
+
+    def submit(self, fn, csv_path, model_name, column, params, fold):
+        future = Future()
+        if params == self.bad_params:
+            future.set_exception(RuntimeError("out of memory"))
+        else:
+            future.set_result({"rmse": 1.0, "mae": 1.0, "r2": 0.0, "seconds": 0.1})
+        return future
+
+
+def test_failed_fold_is_recorded_on_the_trial(tmp_path, capsys):
+    conn = tuning.connect(str(tmp_path / "tuning.sqlite"))
+    study_id = tuning._study(conn, "LightGBM", "hourly_demand", "random", {"test": True})
+    tuning._sample(conn, study_id, "LightGBM", "random", 0, 3, np.random.default_rng(0))
+    trials = tuning._trials(conn, study_id, 0)
+    pool = FailingFirstTrialPool(json.loads(trials[0]["params"])["params"])
+    messages = []
+
+    tuning._run_round(conn, pool, study_id, 0, "LightGBM", "hourly_demand", "data.csv", [{}] * 3,
+                      tuning.rung_folds(3), messages.append)
+
+    rows = {t["number"]: t for t in tuning._trials(conn, study_id, 0)}
+    assert rows[0]["state"] == "failed"
+    assert rows[0]["error"] == "fold 0: RuntimeError: out of memory"
+    assert all(rows[n]["error"] is None and rows[n]["state"] != "failed" for n in (1, 2))
+    assert any("failed on fold 0" in message for message in messages)
+    # the library reports through the callback only
+    assert capsys.readouterr().out == ""
+    conn.close()
+
+
+def test_connect_adds_error_column_to_old_store(tmp_path):
+    path = str(tmp_path / "tuning.sqlite")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE trials (id INTEGER PRIMARY KEY, study_id INTEGER, number INTEGER, "
+                "bracket INTEGER, params TEXT, state TEXT, rung INTEGER, score REAL, updated REAL, "
+                "UNIQUE (study_id, number))")
+    old.close()
+    conn = tuning.connect(path)
+    assert "error" in {row["name"] for row in conn.execute("PRAGMA table_info(trials)")}
+    conn.close()
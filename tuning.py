@@ -0,0 +1,371 @@
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import backtest
+import data_store
+import evaluation
+import forecasting
+
+# ------------------Tuning configuration------------------
+# Hyperparameters are searched on rolling-origin folds (backtest.make_folds,
+# newest fold first) with synchronous successive halving: every trial of a
+# round is scored on the first fold, the best 1/ETA go on to more folds, and
+# only the survivors of the last rung are scored on all of them. Trials and
+# per-fold scores are written to a SQLite store as they finish, so an
+# interrupted search resumes where it stopped. forecasting.model_params
+# picks up the best complete trial for the Prediction page.
+TUNABLE_MODELS = ["LightGBM", "XGboost", "RandomForest"]
+SAMPLERS = ["random", "tpe"]
+DB_PATH = os.path.join(".cache", "tuning.sqlite")
+ETA = 3
+DEFAULT_ROUNDS = 3
+DEFAULT_TRIALS = 9
+DEFAULT_FOLDS = 3
+# folds forecast a quarter ahead from climatology, like the Prediction page
+DEFAULT_HORIZON = 90 * 24
+# sliding training window per fold, which also keeps each trial affordable
+DEFAULT_WINDOW = 3 * 365 * 24
+# random trials before the TPE sampler takes over, and its good-trial fraction
+STARTUP_TRIALS = 8
+TPE_GAMMA = 0.25
+TPE_CANDIDATES = 32
+
+# (kind, low, high) sampled uniformly ("int", "float") or log-uniformly ("log_int", "log");
+# ("choice", [values]) picks one. Fixed settings come from forecasting.MODEL_PARAMS.
+SEARCH_SPACES = {
+    "LightGBM": {
+        "n_estimators": ("int", 100, 800),
+        "learning_rate": ("log", 0.01, 0.2),
+        "num_leaves": ("log_int", 15, 255),
+        "min_child_samples": ("log_int", 5, 200),
+        "colsample_bytree": ("float", 0.5, 1.0),
+        "reg_lambda": ("log", 1e-3, 10.0),
+    },
+    "XGboost": {
+        "n_estimators": ("int", 100, 800),
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 3, 12),
+        "min_child_weight": ("log", 1.0, 50.0),
+        "subsample": ("float", 0.5, 1.0),
+        "colsample_bytree": ("float", 0.5, 1.0),
+        "reg_lambda": ("log", 1e-3, 10.0),
+    },
+    "RandomForest": {
+        "n_estimators": ("int", 50, 300),
+        "max_depth": ("int", 6, 24),
+        "min_samples_leaf": ("log_int", 1, 50),
+        "max_features": ("choice", [1.0, 0.5, "sqrt"]),
+        "max_samples": ("float", 0.1, 0.5),
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS studies (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE, model TEXT, target TEXT, sampler TEXT,
+    config TEXT, created REAL);
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY, study_id INTEGER, number INTEGER, bracket INTEGER, params TEXT,
+    state TEXT, rung INTEGER, score REAL, updated REAL, error TEXT, UNIQUE (study_id, number));
+CREATE TABLE IF NOT EXISTS fold_scores (
+    trial_id INTEGER, fold INTEGER, rmse REAL, mae REAL, r2 REAL, seconds REAL,
+    PRIMARY KEY (trial_id, fold));
+"""
+
+
+# ------------------Search space------------------
+def decode(model_name, point):
+    """Map a point of the unit cube to hyperparameters, overlaid on MODEL_PARAMS."""
+    params = dict(forecasting.MODEL_PARAMS[model_name])
+    for u, (name, spec) in zip(point, SEARCH_SPACES[model_name].items()):
+        kind = spec[0]
+        if kind == "choice":
+            params[name] = spec[1][min(int(u * len(spec[1])), len(spec[1]) - 1)]
+            continue
+        low, high = spec[1], spec[2]
+        if kind.startswith("log"):
+            value = math.exp(math.log(low) + u * (math.log(high) - math.log(low)))
+        else:
+            value = low + u * (high - low)
+        params[name] = int(round(value)) if kind.endswith("int") else float(value)
+    return params
+
+
+def tpe_point(history, dims, rng):
+    """
+    Tree-structured Parzen estimator step over the unit cube: candidates are
+    drawn around the best TPE_GAMMA of `history` [(point, score)] and the one
+    with the highest good/bad kernel density ratio is returned.
+    """
+    ordered = sorted(history, key=lambda item: item[1])
+    split = max(1, int(math.ceil(TPE_GAMMA * len(ordered))))
+    good = np.array([point for point, _ in ordered[:split]])
+    bad = np.array([point for point, _ in ordered[split:]])
+    bandwidth = max(0.05, len(history) ** (-1 / (dims + 4)) * 0.3)
+
+    candidates = good[rng.integers(0, len(good), TPE_CANDIDATES)]
+    candidates = np.clip(candidates + rng.normal(0, bandwidth, candidates.shape), 0, 1)
+
+    def density(points):
+        if len(points) == 0:
+            return np.ones(len(candidates))
+        distance = ((candidates[:, None, :] - points[None, :, :]) / bandwidth) ** 2
+        # the floor keeps the ratio finite far from every observed point
+        return np.exp(-0.5 * distance.sum(axis=2)).mean(axis=1) + 1e-12
+
+    return candidates[int(np.argmax(density(good) / density(bad)))]
+
+
+def rung_folds(n_folds, eta=ETA):
+    """Folds scored at each rung, e.g. 3 folds -> [1, 3], 9 folds -> [1, 3, 9]."""
+    folds = {n_folds}
+    while n_folds > 1:
+        n_folds //= eta
+        folds.add(max(1, n_folds))
+    return sorted(folds)
+
+
+# ------------------Trial store------------------
+def connect(db_path=DB_PATH):
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    # stores created before trials recorded their failure message
+    if "error" not in {row["name"] for row in conn.execute("PRAGMA table_info(trials)")}:
+        with conn:
+            conn.execute("ALTER TABLE trials ADD COLUMN error TEXT")
+    return conn
+
+
+def _study(conn, model_name, column, sampler, config):
+    """Id of the study with this exact configuration, created on first use."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    name = f"{model_name}/{column}/{sampler}/{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]}"
+    row = conn.execute("SELECT id FROM studies WHERE name = ?", (name,)).fetchone()
+    if row is not None:
+        return row["id"]
+    with conn:
+        cursor = conn.execute("INSERT INTO studies (name, model, target, sampler, config, created) "
+                              "VALUES (?, ?, ?, ?, ?, ?)",
+                              (name, model_name, column, sampler, payload, time.time()))
+    return cursor.lastrowid
+
+
+def _trials(conn, study_id, bracket=None):
+    query = "SELECT * FROM trials WHERE study_id = ?" + (" AND bracket = ?" if bracket is not None else "")
+    args = (study_id,) if bracket is None else (study_id, bracket)
+    return [dict(row) for row in conn.execute(query + " ORDER BY number", args)]
+
+
+def _fold_scores(conn, trial_id):
+    return {row["fold"]: row["rmse"] for row in
+            conn.execute("SELECT fold, rmse FROM fold_scores WHERE trial_id = ?", (trial_id,))}
+
+
+def _set_state(conn, trial_id, state, rung, score, error=None):
+    with conn:
+        conn.execute("UPDATE trials SET state = ?, rung = ?, score = ?, updated = ?, error = ? WHERE id = ?",
+                     (state, rung, score, time.time(), error, trial_id))
+
+
+# ------------------Evaluation------------------
+def evaluate_fold(csv_path, model_name, column, params, fold):
+    """Train on one fold and score its horizon. Runs in a worker process, like backtest.run_fold."""
+    started = time.time()
+    arrays = data_store.load_arrays(csv_path)
+    train = data_store.frame_from_arrays(arrays, fold["train_start"], fold["origin"])
+    test = data_store.frame_from_arrays(arrays, fold["origin"], fold["test_end"])
+    fitted = forecasting.train_model(model_name, train, column, params)
+    predicted = forecasting.predict(model_name, fitted, train, test.index)
+    metrics = evaluation.OnlineMetrics().update(test[column].to_numpy(dtype=float), predicted).regression()
+    return {"rmse": float(metrics["RMSE"]), "mae": float(metrics["MAE"]), "r2": float(metrics["R2"]),
+            "seconds": time.time() - started}
+
+
+def _sample(conn, study_id, model_name, sampler, bracket, count, rng):
+    """Add `count` new trials to a round, proposed from the first-fold scores so far."""
+    dims = len(SEARCH_SPACES[model_name])
+    history = []
+    for t in _trials(conn, study_id):
+        scores = _fold_scores(conn, t["id"])
+        if 0 in scores and t["state"] != "failed":
+            history.append((json.loads(t["params"])["point"], scores[0]))
+    number = conn.execute("SELECT COALESCE(MAX(number), -1) + 1 FROM trials WHERE study_id = ?",
+                          (study_id,)).fetchone()[0]
+    for i in range(count):
+        if sampler == "tpe" and len(history) >= STARTUP_TRIALS:
+            point = tpe_point(history, dims, rng)
+        else:
+            point = rng.random(dims)
+        params = {"point": [float(u) for u in point], "params": decode(model_name, point)}
+        with conn:
+            conn.execute("INSERT INTO trials (study_id, number, bracket, params, state, rung, updated) "
+                         "VALUES (?, ?, ?, ?, 'running', 0, ?)",
+                         (study_id, number + i, bracket, json.dumps(params), time.time()))
+
+
+def tune(model_name, column="hourly_demand", csv_path="data.csv", sampler="tpe", rounds=DEFAULT_ROUNDS,
+         trials=DEFAULT_TRIALS, n_folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, window=DEFAULT_WINDOW,
+         max_workers=None, db_path=DB_PATH, seed=0, progress=None):
+    """
+    Run (or resume) a search for model_name on column and return its best
+    complete trial. Each round samples `trials` configurations and halves
+    them over rung_folds(n_folds); (trial, fold) fits run in a process pool.
+    `progress`, if given, is called with a message as fits finish or fail;
+    a failed trial is stored with state "failed" and its error message.
+    """
+    if model_name not in SEARCH_SPACES:
+        raise ValueError(f"{model_name} has no search space; tunable models: {TUNABLE_MODELS}")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler: {sampler}")
+
+    data_store.ensure_store(csv_path)
+    n_rows = len(data_store.load_arrays(csv_path)[data_store.EPOCH_COLUMN])
+    # newest origin first, so the first rung scores the most recent quarter
+    folds = backtest.make_folds(n_rows, n_folds, horizon, "sliding", window)[::-1]
+    if not folds:
+        raise ValueError("Not enough history for the requested folds and horizon.")
+    rungs = rung_folds(len(folds))
+    config = {"data": data_store.data_version(csv_path), "folds": folds, "space": SEARCH_SPACES[model_name],
+              "base": forecasting.MODEL_PARAMS[model_name], "eta": ETA, "trials": trials, "seed": seed}
+
+    conn = connect(db_path)
+    study_id = _study(conn, model_name, column, sampler, config)
+    context = multiprocessing.get_context("spawn")
+    max_workers = max_workers or max(1, min(os.cpu_count() or 1, trials))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                 initializer=forecasting.limit_fit_threads,
+                                 initargs=(forecasting.worker_threads(max_workers),)) as pool:
+            for bracket in range(rounds):
+                existing = _trials(conn, study_id, bracket)
+                if len(existing) < trials:
+                    rng = np.random.default_rng([seed, bracket, len(existing)])
+                    _sample(conn, study_id, model_name, sampler, bracket, trials - len(existing), rng)
+                _run_round(conn, pool, study_id, bracket, model_name, column, csv_path, folds, rungs, progress)
+    finally:
+        conn.close()
+    return best_trial(model_name, column, db_path)
+
+
+def _run_round(conn, pool, study_id, bracket, model_name, column, csv_path, folds, rungs, progress):
+    # promotions are re-derived from the stored fold scores, so a resumed round
+    # only fits the (trial, fold) pairs that are missing
+    alive = [t for t in _trials(conn, study_id, bracket) if t["state"] != "failed"]
+    for rung, needed in enumerate(rungs):
+        jobs = [(t, k) for t in alive for k in range(needed) if k not in _fold_scores(conn, t["id"])]
+        futures = {pool.submit(evaluate_fold, csv_path, model_name, column,
+                               json.loads(t["params"])["params"], folds[k]): (t, k) for t, k in jobs}
+        failed = {}
+        for future in as_completed(futures):
+            trial, k = futures[future]
+            try:
+                scores = future.result()
+            except Exception as e:
+                failed.setdefault(trial["id"], f"fold {k}: {type(e).__name__}: {e}")
+                if progress is not None:
+                    progress(f"{model_name}/{column} round {bracket} trial {trial['number']} "
+                             f"failed on {failed[trial['id']]}")
+                continue
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO fold_scores VALUES (?, ?, ?, ?, ?, ?)",
+                             (trial["id"], k, scores["rmse"], scores["mae"], scores["r2"], scores["seconds"]))
+            if progress is not None:
+                progress(f"{model_name}/{column} round {bracket} trial {trial['number']} fold {k}: "
+                         f"RMSE {scores['rmse']:.2f} ({scores['seconds']:.1f}s)")
+
+        ranked = []
+        for t in alive:
+            if t["id"] in failed:
+                _set_state(conn, t["id"], "failed", rung, None, failed[t["id"]])
+                continue
+            score = float(np.mean([s for k, s in _fold_scores(conn, t["id"]).items() if k < needed]))
+            ranked.append((score, t))
+        ranked.sort(key=lambda item: item[0])
+        last = rung == len(rungs) - 1
+        keep = len(ranked) if last else max(1, math.ceil(len(ranked) / ETA))
+        for position, (score, t) in enumerate(ranked):
+            state = "complete" if last else ("running" if position < keep else "pruned")
+            _set_state(conn, t["id"], state, rung, score)
+        alive = [t for _, t in ranked[:keep]]
+
+
+# ------------------Results------------------
+def best_trial(model_name, column, db_path=DB_PATH):
+    """
+    Best complete trial of the newest study for (model_name, column) as a
+    dict with "params", "score" (mean fold RMSE), "number" and "study", or
+    None when nothing has been tuned.
+    """
+    if not os.path.exists(db_path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            "SELECT t.number, t.params, t.score, s.name, s.created FROM trials t JOIN studies s "
+            "ON t.study_id = s.id WHERE s.model = ? AND s.target = ? AND t.state = 'complete' "
+            "ORDER BY s.created DESC, t.score ASC LIMIT 1", (model_name, column)).fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return {"params": json.loads(row["params"])["params"], "score": row["score"], "number": row["number"],
+            "study": row["name"]}
+
+
+def leaderboard(model_name=None, column=None, db_path=DB_PATH, limit=10):
+    """Trials ranked by score per study, as a DataFrame."""
+    import pandas as pd
+    conn = connect(db_path)
+    frame = pd.read_sql_query(
+        "SELECT s.model, s.target, s.sampler, t.bracket, t.number, t.state, t.rung, t.score, t.error, t.params "
+        "FROM trials t JOIN studies s ON t.study_id = s.id "
+        "WHERE (? IS NULL OR s.model = ?) AND (? IS NULL OR s.target = ?) ORDER BY t.score",
+        conn, params=(model_name, model_name, column, column))
+    conn.close()
+    frame["params"] = [json.dumps(json.loads(p)["params"]) for p in frame["params"]]
+    return frame.groupby(["model", "target"], group_keys=False).head(limit).reset_index(drop=True)
+
+
+# ------------------Command line------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter search with successive halving.")
+    parser.add_argument("--data", default="data.csv", help="hourly dataset (default: data.csv)")
+    parser.add_argument("--models", nargs="+", choices=TUNABLE_MODELS, default=["LightGBM", "XGboost"])
+    parser.add_argument("--targets", nargs="+", choices=data_store.TARGET_COLUMNS,
+                        default=data_store.TARGET_COLUMNS)
+    parser.add_argument("--sampler", choices=SAMPLERS, default="tpe")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="successive-halving rounds")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="configurations sampled per round")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="forecast hours per fold")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="training hours per fold")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=DB_PATH, help="SQLite trial store")
+    args = parser.parse_args(argv)
+
+    for model_name in args.models:
+        for column in args.targets:
+            best = tune(model_name, column, args.data, args.sampler, args.rounds, args.trials, args.folds,
+                        args.horizon, args.window, args.workers, args.db, args.seed, progress=print)
+            if best is not None:
+                print(f"Best {model_name}/{column}: RMSE {best['score']:.2f} (trial {best['number']}) "
+                      f"{json.dumps(best['params'])}")
+    print(leaderboard(db_path=args.db).drop(columns="params").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()